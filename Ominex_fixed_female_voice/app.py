@@ -1,11 +1,11 @@
 # app.py
-import os
-from flask import Flask, request, jsonify, render_template
+import hmac, os, re, json, uuid
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 from flask.typing import ResponseReturnValue
 from flask_cors import CORS
 
 
-from core.brain import think
+from core.brain import think, think_stream
 
 try:
     from dotenv import load_dotenv
@@ -20,13 +20,22 @@ CORS(app)
 # optional scheduler (kept)
 try:
     from apscheduler.schedulers.background import BackgroundScheduler
-    from core.learner import learn_tick
     sched = BackgroundScheduler(daemon=True)
-    sched.add_job(lambda: learn_tick(max_per_topic=2), "interval", minutes=60, id="ominex_learn")
-    sched.start()
 except Exception as e:
+    sched = None
     print("Scheduler not started (optional):", e)
 
+if sched is not None:
+    # memory upkeep doesn't depend on the learner: schedule it even when the learner can't load
+    from core.brain import mem
+    sched.add_job(mem.sweep, "interval", minutes=10, id="ominex_memory_sweep")   # TTL expiry + flush
+    try:
+        from core.learner import learn_tick
+        sched.add_job(lambda: learn_tick(max_per_topic=2), "interval", minutes=60, id="ominex_learn")
+    except Exception as e:
+        print("Learner job not scheduled (optional):", e)
+    sched.start()
+
 @app.get("/")
 def home():
     return render_template("index.html")
@@ -39,6 +48,13 @@ def api_ping():
 def ping():
     return "ok", 200
 
+_SESSION_RX = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def _session_id(data: dict) -> str:
+    """Client session id (body or X-Session-Id header); a fresh one when missing or malformed."""
+    sid = str(data.get("session_id") or request.headers.get("X-Session-Id") or "")
+    return sid if _SESSION_RX.match(sid) else uuid.uuid4().hex
+
 @app.post("/api/chat")
 def api_chat():
     data = request.get_json(force=True) or {}
@@ -48,16 +64,89 @@ def api_chat():
     if not user_msg:
         return jsonify({"reply": "Say something.", "mood": "Neutral"}), 400
 
-    result = think(user_msg, user_mood=user_mood)
+    sid = _session_id(data)
+    result = think(user_msg, user_mood=user_mood, ctx={"session_id": sid})
 
     return jsonify({
         "reply": result.get("reply"),
         "mood": result.get("mood"),
         "intent": result.get("intent"),
         "tts": result.get("tts"),
-        "memory_used": result.get("memory_used", 0)
+        "memory_used": result.get("memory_used", 0),
+        "session_id": sid,
     }), 200
 
+# ---------- learner (optional; the UI's "Learn" panel) ----------
+try:
+    from core import learner
+except Exception as e:
+    learner = None
+    print("Learner not available (optional):", e)
+
+# adding topics and starting crawls change state and cost real time: only with this token
+# (X-Learn-Token header); unset = the learner is read-only over HTTP
+LEARN_TOKEN = os.getenv("OMINEX_LEARN_TOKEN", "")
+
+def _learner_off():
+    return jsonify({"ok": False, "error": "Learner unavailable."}), 503
+
+def _learn_denied():
+    """Error response unless the caller may change learner state."""
+    if not LEARN_TOKEN:
+        return jsonify({"ok": False, "error": "Learning is disabled on this server "
+                                              "(set OMINEX_LEARN_TOKEN to enable it)."}), 403
+    if not hmac.compare_digest(request.headers.get("X-Learn-Token", ""), LEARN_TOKEN):
+        return jsonify({"ok": False, "error": "Learner token required."}), 401
+    return None
+
+@app.get("/api/learn/topics")
+def api_learn_topics():
+    if learner is None: return _learner_off()
+    return jsonify({"topics": learner.list_topics(), "stats": learner.kb_stats(per_topic=True),
+                    "cache": learner.kb_cache_stats(), "tick": learner.tick_status()})
+
+@app.post("/api/learn/topics")
+def api_learn_add_topic():
+    if learner is None: return _learner_off()
+    denied = _learn_denied()
+    if denied: return denied
+    data = request.get_json(force=True) or {}
+    res = learner.add_topic(data.get("topic") or "")
+    return jsonify(res), (200 if res.get("ok") else 400)
+
+@app.post("/api/learn/tick")
+def api_learn_tick():
+    """Start a crawl in the background (202); 409 while one (this or the hourly job) is running."""
+    if learner is None: return _learner_off()
+    denied = _learn_denied()
+    if denied: return denied
+    data = request.get_json(force=True) or {}
+    per_topic = max(1, min(5, int(data.get("max_per_topic") or 2)))
+    if not learner.start_learn_tick(max_per_topic=per_topic):
+        return jsonify({"ok": False, "error": "A crawl is already running.", "tick": learner.tick_status()}), 409
+    return jsonify({"ok": True, "started": True, "tick": learner.tick_status()}), 202
+
+@app.post("/api/learn/query")
+def api_learn_query():
+    if learner is None: return _learner_off()
+    data = request.get_json(force=True) or {}
+    q = (data.get("q") or data.get("question") or "").strip()
+    if not q:
+        return jsonify({"answer": "", "matches": []}), 400
+    try:
+        k = max(1, min(10, int(data.get("k") or 5)))
+    except (TypeError, ValueError):
+        return jsonify({"answer": "", "matches": [], "error": "k must be an integer."}), 400
+    return jsonify(learner.kb_query(q, k=k))
+
+@app.get("/api/llm/stats")
+def api_llm_stats():
+    from core.brain import responses
+    from core.singleflight import singleflight_stats
+    from services import llm
+    return jsonify({"gateway": llm.gateway.stats(), "response_cache": responses.stats(),
+                    "singleflight": singleflight_stats()})
+
 @app.route("/api/trade/alerts/check")
 def check_alerts():
     return {"status": "ok", "alerts": []}
@@ -67,6 +156,9 @@ def favicon():
     return "", 204
 
 
+def _demo_blocked(msg: str) -> bool:
+    return any(w in msg.lower() for w in ["trade", "delete", "alert", "learn", "backtest"])
+
 @app.post("/api/demo")
 def api_demo():
     data = request.get_json(force=True) or {}
@@ -76,20 +168,62 @@ def api_demo():
         return jsonify({"reply": "Say something.", "mood": "Neutral"}), 400
 
     # Basic demo restriction
-    if any(w in user_msg.lower() for w in ["trade", "delete", "alert", "learn", "backtest"]):
+    if _demo_blocked(user_msg):
         return jsonify({
             "reply": "This feature is disabled in demo mode.",
             "mood": "Neutral"
         })
 
-    result = think(user_msg)
+    sid = _session_id(data)
+    result = think(user_msg, ctx={"session_id": sid})
 
     return jsonify({
         "reply": result.get("reply"),
-        "mood": result.get("mood")
+        "mood": result.get("mood"),
+        "session_id": sid,
     }), 200
 
 
+# ---------- streaming chat (SSE) ----------
+# POST {message, session_id} → text/event-stream:
+#   event: meta  {intent, mood, tts, session_id}
+#   event: chunk {text}          one sentence at a time (concatenate for the full reply)
+#   event: done  {reply}
+def _sse(event: str, obj: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(obj, ensure_ascii=False)}\n\n"
+
+def _chat_stream(demo: bool) -> ResponseReturnValue:
+    data = request.get_json(force=True) or {}
+    user_msg = (data.get("message") or data.get("text") or "").strip()
+    if not user_msg:
+        return jsonify({"reply": "Say something.", "mood": "Neutral"}), 400
+
+    sid = _session_id(data)
+    if demo and _demo_blocked(user_msg):
+        meta, chunks = {"intent": "demo", "mood": "Neutral"}, iter(["This feature is disabled in demo mode."])
+    else:
+        meta, chunks = think_stream(user_msg, user_mood=data.get("mood"), ctx={"session_id": sid})
+
+    def events():
+        yield _sse("meta", {**meta, "session_id": sid})
+        parts = []
+        for text in chunks:
+            parts.append(text)
+            yield _sse("chunk", {"text": text})
+        yield _sse("done", {"reply": "".join(parts).strip()})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/chat/stream")
+def api_chat_stream():
+    return _chat_stream(demo=False)
+
+@app.post("/api/demo/stream")
+def api_demo_stream():
+    return _chat_stream(demo=True)
+
+
 # Optional alias if frontend calls /chat
 @app.post("/chat")
 def chat_alias() -> ResponseReturnValue:
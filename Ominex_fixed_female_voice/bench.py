@@ -0,0 +1,54 @@
+# bench.py — OMINEX micro-benchmarks
+# usage: python bench.py <name> [key=value ...]   (python bench.py lists the names)
+import sys, json
+
+def _kb_recall(**kw):
+    from core.learner import kb_recall_at_k
+    return kb_recall_at_k(**kw)
+
+def _kb_writes(**kw):
+    from core.learner import bench_kb_writes
+    return bench_kb_writes(**kw)
+
+def _memory_turns(**kw):
+    from core.memory import bench_turns
+    return bench_turns(**kw)
+
+def _memory_search(**kw):
+    from core.memory import bench_search
+    return bench_search(**kw)
+
+def _response_cache(**kw):
+    from core.response_cache import bench_response_cache
+    return bench_response_cache(**kw)
+
+def _intents(**kw):
+    from core.intents import bench_intents
+    return bench_intents(**kw)
+
+def _intent_model(**kw):
+    from core.intent_model import bench_intent_model
+    return bench_intent_model(**kw)
+
+BENCHES = {
+    "kb_recall": _kb_recall,     # ivf vs exact recall@k + latency on data/learn.db
+    "kb_writes": _kb_writes,     # learn.db write throughput: legacy vs pooled WAL
+    "memory_turns": _memory_turns,  # Memory.add_turn turns/sec at 10k / 100k LTM: journal vs JSON rewrite
+    "memory_search": _memory_search,  # Memory.search latency as LTM grows (inverted index)
+    "response_cache": _response_cache,  # semantic LLM reply cache: lookup latency + p50 on a repeat-heavy mix
+    "intents": _intents,         # intent tables: per-rule chains vs keyword-indexed single pass (µs/msg)
+    "intent_model": _intent_model,  # learned intents: held-out accuracy vs the regexes, µs/prediction
+}
+
+def _arg(v: str):
+    try:
+        return json.loads(v)
+    except ValueError:
+        return v
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHES:
+        print("benchmarks:", ", ".join(BENCHES))
+        sys.exit(1)
+    kwargs = dict(a.split("=", 1) for a in sys.argv[2:])
+    print(json.dumps(BENCHES[sys.argv[1]](**{k: _arg(v) for k, v in kwargs.items()}), indent=2))
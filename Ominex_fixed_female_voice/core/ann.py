@@ -0,0 +1,186 @@
+# core/ann.py — approximate nearest-neighbour indexes over the learner VecStore
+# "exact" scores every row; "ivf" is a coarse quantizer (spherical k-means in
+# NumPy) that only scores the rows filed under the few centroids nearest the query.
+import os, json, threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from .vecstore import VecStore, SparseVec
+
+MIN_TRAIN_ROWS = 1024     # below this brute force is already cheap
+RETRAIN_GROWTH = 4.0      # retrain once the store has grown 4× since the last training
+MAX_LISTS = 256
+_BATCH = 256
+
+
+class ExactIndex:
+    """Brute force over the whole store (the recall@k reference)."""
+    name = "exact"
+
+    def __init__(self, store: VecStore) -> None:
+        self.store = store
+
+    def refresh(self, train: bool = False) -> None:
+        pass
+
+    def search(self, q: SparseVec, k: int, **_) -> Tuple[np.ndarray, np.ndarray]:
+        return self.store.top_k(q, k)
+
+    def stats(self) -> dict:
+        return {"index": self.name, "rows": self.store.rows}
+
+
+class IVFIndex(ExactIndex):
+    """Inverted-file index: each row is filed under its nearest centroid; queries probe `nprobe` lists.
+
+    On disk next to the store: <base>.centroids.npy, <base>.assign (int32 per row, -1 = empty) and
+    <base>.json (training metadata). New rows are assigned incrementally by `refresh()`.
+    """
+    name = "ivf"
+
+    def __init__(self, store: VecStore, base_path: str, nprobe: int = 8, seed: int = 7) -> None:
+        super().__init__(store)
+        self.nprobe = nprobe
+        self.seed = seed
+        self.cent_path = base_path + ".centroids.npy"
+        self.assign_path = base_path + ".assign"
+        self.meta_path = base_path + ".json"
+        self._lock = threading.RLock()
+        self.centroids: Optional[np.ndarray] = None
+        self._cent_t: Optional[np.ndarray] = None     # (dim × nlist) copy: row gathers are cache friendly
+        self.meta: Dict[str, int] = {}
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self) -> None:
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+            self._set_centroids(np.load(self.cent_path))
+            if self.centroids.shape[1] != self.store.dim:
+                raise ValueError("dimension changed")
+        except Exception:
+            self.meta, self.centroids, self._cent_t = {}, None, None
+            self._drop_assign()
+
+    def _set_centroids(self, cent: np.ndarray) -> None:
+        self.centroids = cent
+        self._cent_t = np.ascontiguousarray(cent.T)
+
+    def _drop_assign(self) -> None:
+        try:
+            os.remove(self.assign_path)
+        except OSError:
+            pass
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _assigned(self) -> int:
+        try:
+            return os.path.getsize(self.assign_path) // 4
+        except OSError:
+            return 0
+
+    # ---------- training ----------
+    def _nearest(self, ids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(ids), dtype=np.int32)
+        for a in range(0, len(ids), _BATCH):
+            sims = self.store.dot_rows(self._cent_t, ids[a:a + _BATCH])
+            out[a:a + _BATCH] = sims.argmax(axis=1) if sims.size else 0
+        return out
+
+    def train(self, iters: int = 8, sample: int = 20000) -> None:
+        """Spherical k-means on a row sample, then (re)assign every row."""
+        with self._lock:
+            norms = np.asarray(self.store.arrays()["norms"])
+            live = np.flatnonzero(norms > 0)
+            if len(live) < MIN_TRAIN_ROWS:
+                return
+            rng = np.random.default_rng(self.seed)
+            pick = np.sort(rng.choice(live, size=min(sample, len(live)), replace=False))
+            nlist = int(min(MAX_LISTS, max(8, np.sqrt(len(live)))))
+            m = self.store.arrays()
+            dim = self.store.dim
+            cent = np.zeros((nlist, dim), dtype=np.float32)
+            for j, r in enumerate(rng.choice(pick, size=nlist, replace=False)):
+                a, b = m["indptr"][r], m["indptr"][r + 1]
+                cent[j, m["indices"][a:b]] = m["data"][a:b] / norms[r]
+            self._set_centroids(cent)
+            flat, bounds = VecStore._segments(m["indptr"], pick)
+            cols = m["indices"][flat].astype(np.int64)
+            vals = m["data"][flat] / np.repeat(norms[pick], np.diff(bounds))
+            for _ in range(iters):
+                lab = self._nearest(pick)
+                # centroid = normalized sum of its members (bincount over label*dim + column)
+                key = np.repeat(lab.astype(np.int64), np.diff(bounds)) * dim + cols
+                cent = np.bincount(key, weights=vals, minlength=nlist * dim).reshape(nlist, dim).astype(np.float32)
+                n = np.linalg.norm(cent, axis=1, keepdims=True)
+                empty = n[:, 0] == 0
+                cent[empty] = self.centroids[empty]       # keep old centroid for an empty cluster
+                n[empty] = 1.0
+                self._set_centroids(cent / n)
+            rows = self.store.rows
+            assign = np.full(rows, -1, dtype=np.int32)
+            live = np.flatnonzero(np.asarray(self.store.arrays()["norms"])[:rows] > 0)
+            assign[live] = self._nearest(live)
+            tmp = self.cent_path + ".tmp.npy"
+            np.save(tmp, self.centroids); os.replace(tmp, self.cent_path)
+            assign.tofile(self.assign_path + ".tmp"); os.replace(self.assign_path + ".tmp", self.assign_path)
+            self.meta = {"nlist": nlist, "trained_rows": int(len(live)), "dim": dim}
+            with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.meta, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    # ---------- incremental updates ----------
+    def refresh(self, train: bool = False) -> None:
+        """File rows appended to the store since the last call; optionally (re)train when due."""
+        with self._lock:
+            rows = self.store.rows
+            if train and (not self.trained and rows >= MIN_TRAIN_ROWS
+                          or self.trained and rows >= RETRAIN_GROWTH * self.meta.get("trained_rows", rows)):
+                self.train()
+                return
+            if not self.trained:
+                return
+            done = self._assigned()
+            if done >= rows:
+                return
+            ids = np.arange(done, rows)
+            norms = np.asarray(self.store.arrays()["norms"])[done:rows]
+            assign = np.full(len(ids), -1, dtype=np.int32)
+            live = norms > 0
+            assign[live] = self._nearest(ids[live])
+            with open(self.assign_path, "ab") as f:
+                f.write(assign.tobytes())
+
+    # ---------- queries ----------
+    def search(self, q: SparseVec, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if not self.trained:
+                return self.store.top_k(q, k)
+            idx, val = q
+            keep = idx < self.store.dim
+            csims = val[keep] @ self._cent_t[idx[keep]]
+            if not np.any(csims > 0):
+                # query terms unseen at training time: no list is closer than another
+                return self.store.top_k(q, k)
+            lists = np.argsort(-csims)[: (nprobe or self.nprobe)]
+            n = self._assigned()
+            assign = np.memmap(self.assign_path, dtype=np.int32, mode="r", shape=(n,)) if n else np.zeros(0, np.int32)
+            cand = np.flatnonzero(np.isin(assign, lists))
+        # rows appended after the last refresh are scored exactly so nothing new is missed
+        cand = np.concatenate((cand, np.arange(n, self.store.rows)))
+        return VecStore._rank(cand, self.store.score(q, cand), k)
+
+    def stats(self) -> dict:
+        return {"index": self.name, "rows": self.store.rows, "assigned": self._assigned(),
+                "nprobe": self.nprobe, **self.meta}
+
+
+def make_index(kind: str, store: VecStore, base_path: str) -> ExactIndex:
+    kind = (kind or "exact").lower()
+    if kind == "ivf":
+        return IVFIndex(store, base_path)
+    return ExactIndex(store)
@@ -1,15 +1,18 @@
 
 # core/brain.py — OMINEX Core Brain (CLEAN STABLE)
 # Single entry: think()
-from services.llm import ask_ominex
-from typing import Any, Dict, Optional, Tuple, List
-import re
+from services.llm import ask_ominex, llm_available, stream_ominex, sentence_chunks
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, List
+import os, re, time
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 
 
 # Core systems
+from .intents import BRAIN, CANNED
 from .memory import Memory
+from .response_cache import ResponseCache
 from .mood import detect_mood
 from .planner import plan_and_execute
 from .conversion import temp_convert, length_convert, weight_convert, currency_convert
@@ -27,7 +30,7 @@ except Exception:
     safe = _Safe()
 
 try:
-    from .kb import kb_query
+    from .learner import kb_query
 except Exception:
     def kb_query(*args, **kwargs):
         return {}
@@ -43,56 +46,42 @@ try:
 except Exception:
     learn_autoroute = None
 
+try:
+    from .intent_model import classify as model_intent
+except Exception:
+    model_intent = None
+
 
 # -------------------- STATE --------------------
 mem = Memory()
 todos = TodoStore()
+responses = ResponseCache()      # LLM replies, reused for repeated / reworded questions
 
 
 # -------------------- INTENT SYSTEM --------------------
-_RX = {
-    "remember": re.compile(r"\b(remember that|remember this|save this|note that|store this)\b", re.I),
-    "recall": re.compile(r"\b(recall|what did i say|memory)\b", re.I),
-    "clear_memory": re.compile(r"\b(clear memory|reset memory)\b", re.I),
-    "calculate": re.compile(r"^\s*(?:calc|calculate)\b|^\s*[+\-/*().\d\s]{3,}\s*$", re.I),
-
-    "search": re.compile(
-    r"\b(search|look up|find|google|wiki)\b",
-    re.I
-        ),
-
-    "time": re.compile(r"\b(time now|date now|what time)\b", re.I),
-    "help": re.compile(r"\b(help|what can you do)\b", re.I),
-    "news": re.compile(r"\b(news|latest|headlines)\b", re.I),
-    "greet": re.compile(r"\b(hi|hello|hey|molo)\b", re.I),
-    "convert": re.compile(r"\bconvert\b", re.I),
-    "task_add": re.compile(r"\b(add task|todo)\b", re.I),
-    "task_list": re.compile(r"\b(list tasks|show tasks)\b", re.I),
+# rule tables live in core/intents.py (shared with nlu and router); with OMINEX_INTENT_MODEL=1 the
+# learned classifier (core/intent_model.py) answers first and the rules only decide when it's unsure
+INTENT_MODEL = os.getenv("OMINEX_INTENT_MODEL", "0") == "1"
+_CANNED = {
+    "identity": "I was built by Luvo Maphela as part of the OMINEX system.",
+    "python": "Python is a high-level programming language used for AI, web development, automation, and more.",
+    "infinity": "Infinity is the concept of something without limit or end. It is used in mathematics, philosophy, and physics to describe endlessness.",
+    "hello": "Hello. OMINEX online.",
 }
 
 def _classify_intent(text: str) -> str:
-    for name, rx in _RX.items():
-        if rx.search(text):
-            return name
-    return "chat"
+    if INTENT_MODEL and model_intent is not None:
+        try:
+            label = model_intent(text)
+            if label:
+                return label
+        except Exception as e:
+            print("INTENT model error:", e)
+    return BRAIN.first(text) or "chat"
 
 
 def conversational_response(text: str):
-    text = text.lower()
-
-    if "who made you" in text:
-        return "I was built by Luvo Maphela as part of the OMINEX system."
-
-    if "what is python" in text:
-        return "Python is a high-level programming language used for AI, web development, automation, and more."
-
-    if "what is infinite" in text or "what is infinity" in text:
-        return "Infinity is the concept of something without limit or end. It is used in mathematics, philosophy, and physics to describe endlessness."
-
-    if "hello" in text or "hi" in text:
-        return "Hello. OMINEX online."
-
-    return "I'm processing that. Tell me more."
+    return _CANNED.get(CANNED.first(text), "I'm processing that. Tell me more.")
 
 
 # -------------------- HELPERS --------------------
@@ -110,6 +99,107 @@ def _now_string():
     return datetime.now().strftime("%A, %d %B %Y • %H:%M")
 
 
+# -------------------- PARALLEL FAN-OUT --------------------
+# Unclassified chat used to try KB → planner → LLM one after another; the branches are
+# independent, so they now run together on a shared pool, each with its own deadline (s).
+BRANCH_DEADLINES = {"kb": 2.0, "plan": 1.0, "llm": 20.0}
+KB_MIN_SCORE = float(os.getenv("OMINEX_KB_MIN_SCORE", "0.35"))   # weaker KB matches defer to the LLM
+KB_GRACE_S = float(os.getenv("OMINEX_KB_GRACE_S", "0.3"))        # the paid LLM call waits this long for a KB hit
+_fanout = ThreadPoolExecutor(max_workers=int(os.getenv("OMINEX_FANOUT_WORKERS", "16")),
+                             thread_name_prefix="think")
+
+def _kb_branch(text: str) -> str:
+    kb = kb_query(text, k=4) or {}
+    matches = kb.get("matches") or []
+    # hybrid results come in RRF order, so the first match isn't necessarily the closest one
+    if matches and max(m.get("score", 0) for m in matches) >= KB_MIN_SCORE:
+        return kb.get("answer") or ""
+    return ""
+
+def _plan_branch(text: str) -> str:
+    return plan_and_execute(user_text=text, context=[]) or ""
+
+def _llm_branch(text: str) -> str:
+    return ask_ominex(text, timeout=BRANCH_DEADLINES["llm"])
+
+_BRANCHES: Dict[str, Callable[[str], str]] = {"kb": _kb_branch, "plan": _plan_branch, "llm": _llm_branch}
+
+def _fan_out(user_text: str, deadlines: Optional[Dict[str, float]] = None,
+             branches: Optional[Tuple[str, ...]] = None) -> Tuple[str, str]:
+    """Run the branches (default: all) concurrently and return (reply, branch) for the first
+    non-empty answer. A branch that fails or misses its deadline is dropped; with none left,
+    the canned reply. The LLM branch is skipped outright while its circuit breaker is open, and
+    held back for up to KB_GRACE_S while the KB branch runs, so a KB hit never pays for an LLM call."""
+    deadlines = {**BRANCH_DEADLINES, **(deadlines or {})}
+    branches = [b for b in (branches or _BRANCHES) if b != "llm" or llm_available()]
+    held = "llm" in branches and "kb" in branches
+    t0 = time.monotonic()
+    pending = {_fanout.submit(_BRANCHES[name], user_text): name for name in branches
+               if not (held and name == "llm")}
+    try:
+        while pending or held:
+            now = time.monotonic() - t0
+            if held and (now >= KB_GRACE_S or "kb" not in pending.values()):
+                held = False                    # the KB missed or is slow: the LLM races it
+                pending[_fanout.submit(_BRANCHES["llm"], user_text)] = "llm"
+            for f in [f for f, name in pending.items() if now >= deadlines[name]]:
+                print("THINK branch timeout:", pending.pop(f))
+            if not pending:
+                continue
+            budget = min(deadlines[name] for name in pending.values()) - now
+            if held:
+                budget = min(budget, KB_GRACE_S - now)
+            done, _ = wait(pending, timeout=max(0.0, budget), return_when=FIRST_COMPLETED)
+            for f in done:
+                name = pending.pop(f)
+                try:
+                    reply = f.result()
+                except Exception as e:
+                    print(f"THINK branch {name} error:", e)
+                    continue
+                if reply:
+                    return reply, name
+    finally:
+        for f in pending:
+            f.cancel()      # not started yet → never runs; running ones finish in the background
+    return conversational_response(user_text), "fallback"
+
+
+# -------------------- STREAMING --------------------
+def _stream_reply(user_text: str, sid: Optional[str], intent: str = "chat") -> Iterator[str]:
+    """LLM reply as sentence-sized chunks; the assistant turn is saved once the stream ends
+    (and the reply cached if it streamed to completion). A failure before the first sentence
+    falls back to the canned reply."""
+    sent: List[str] = []
+    try:
+        for chunk in sentence_chunks(stream_ominex(user_text, timeout=BRANCH_DEADLINES["llm"])):
+            sent.append(chunk)
+            yield chunk
+        responses.put(user_text, "".join(sent).strip(), intent)
+    except Exception as e:
+        print("THINK stream error:", e)
+        if not sent:
+            sent.append(conversational_response(user_text))
+            yield sent[0]
+    finally:
+        try:
+            mem.add_turn(role="assistant", text="".join(sent).strip(), session_id=sid)
+        except Exception:
+            pass
+
+
+def think_stream(user_text: str,
+                 user_mood: Optional[str] = None,
+                 ctx: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], Iterator[str]]:
+    """think() for streaming clients: (meta without the reply, iterator of reply chunks).
+    Open chat is answered by the LLM token stream; finished replies (other intents, cache hits)
+    are split into the same sentence chunks."""
+    result = think(user_text, user_mood=user_mood, ctx={**(ctx or {}), "stream": True})
+    chunks = result.pop("stream", None)
+    reply = result.pop("reply", "")
+    return result, (chunks if chunks is not None else sentence_chunks([reply]))
+
+
 # -------------------- MAIN BRAIN --------------------
 
 
@@ -118,6 +208,7 @@ def think(user_text: str,
           ctx: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 
     ctx = ctx or {}
+    sid = ctx.get("session_id")          # per-browser STM; None = the shared default session
 
     # Safety
     s = safe.scan(user_text)
@@ -130,12 +221,12 @@ def think(user_text: str,
         }
 
     mood = user_mood or detect_mood(user_text) or "Neutral"
-    intent = _classify_intent(user_text)
+    canned = CANNED.first(user_text)     # one pass decides both canned checks below
     # 🔒 HARD IDENTITY LOCK (NO FALLTHROUGH)
-    if "who made you" in user_text.lower():
-        reply = "I was built by Luvo Maphela as part of the OMINEX system."
+    if canned == "identity":
+        reply = _CANNED["identity"]
         try:
-            mem.add_turn(role="assistant", text=reply)
+            mem.add_turn(role="assistant", text=reply, session_id=sid)
         except Exception:
             pass
 
@@ -148,10 +239,16 @@ def think(user_text: str,
 
     
     # Identity & hard-coded responses
-    identity = conversational_response(user_text)
+    identity = _CANNED.get(canned)
+    intent = None
+    if canned == "hello" and INTENT_MODEL:
+        # the canned greeting is a substring test ("hi" in "this"); the model has to agree
+        intent = _classify_intent(user_text)
+        if intent != "greet":
+            identity = None
     if identity and "OMINEX" in identity:
         try:
-            mem.add_turn(role="assistant", text=identity)
+            mem.add_turn(role="assistant", text=identity, session_id=sid)
         except Exception:
             pass
 
@@ -162,12 +259,12 @@ def think(user_text: str,
             "tts": {"pitch": 1.0, "rate": 1.0},
         }
 
-    
+    intent = intent or _classify_intent(user_text)
     print("DEBUG INTENT:", intent, "TEXT:", user_text)
 
     # Record user turn
     try:
-        mem.add_turn(role="user", text=user_text)
+        mem.add_turn(role="user", text=user_text, session_id=sid)
     except Exception:
         pass
 
@@ -182,7 +279,7 @@ def think(user_text: str,
         reply = f"It’s {_now_string()}."
 
     elif intent == "remember":
-        fact = re.sub(_RX["remember"], "", user_text, count=1).strip(": -")
+        fact = re.sub(BRAIN.rx("remember"), "", user_text, count=1).strip(": -")
         if fact:
             try:
                 mem.remember(fact, importance=0.7, source="user")
@@ -197,7 +294,7 @@ def think(user_text: str,
             hits = mem.search(user_text, k=5)
             if hits:
                 reply = "Here’s what I remember:\n• " + "\n• ".join(
-                    h if isinstance(h, str) else getattr(h, "text", "")
+                    h if isinstance(h, str) else h.get("text", "")
                     for h in hits
                 )
             else:
@@ -210,7 +307,7 @@ def think(user_text: str,
         reply = calc or "I couldn’t compute that safely."
 
     elif intent == "search":
-        cleaned = re.sub(_RX["search"], "", user_text, count=1).strip()
+        cleaned = re.sub(BRAIN.rx("search"), "", user_text, count=1).strip()
         cleaned = cleaned or user_text
 
         try:
@@ -258,37 +355,36 @@ def think(user_text: str,
         items = todos.list()
         reply = "Tasks:\n" + "\n".join(f"{i}. {t}" for i, t in enumerate(items)) if items else "No tasks."
 
-    else:
-    # 1️⃣ Try KB
+    elif ctx.get("stream"):
+        # cached answer, else local branches first (short deadlines); nothing good → stream the LLM
+        cached = responses.get(user_text, intent)
+        reply, source = (cached, "cache") if cached is not None else _fan_out(user_text, branches=("kb", "plan"))
+        if source == "fallback" and llm_available():
+            return {
+                "intent": "chat",
+                "reply": "",
+                "stream": _stream_reply(user_text, sid, intent),
+                "mood": mood,
+                "tts": {"pitch": 1.0, "rate": 1.0},
+            }
         try:
-            kb = kb_query(user_text, k=4)
-            if kb.get("answer"):
-                reply = kb["answer"]
+            mem.add_turn(role="assistant", text=reply, session_id=sid)
         except Exception:
             pass
 
-        # 2️⃣ Try planner
-        if not reply:
-            try:
-                planned = plan_and_execute(user_text=user_text, context=[])
-                if planned:
-                    reply = planned
-            except Exception:
-                pass
-
-        # 3️⃣ REAL LLM (THIS IS THE IMPORTANT PART)
-        if not reply:
-            try:
-                reply = ask_ominex(user_text)
-                intent = "chat"
-            except Exception:
-                # 4️⃣ ONLY if LLM fails → demo fallback
-                reply = conversational_response(user_text)
-                intent = "chat"
+    else:
+        # a cached LLM answer to the same (or a reworded) question; else KB, planner and LLM
+        # race and the first good answer wins
+        cached = responses.get(user_text, intent)
+        reply, source = (cached, "cache") if cached is not None else _fan_out(user_text)
+        if source == "llm":
+            responses.put(user_text, reply, intent)
+        if source in ("llm", "fallback", "cache"):
+            intent = "chat"
 
         # Save assistant turn
         try:
-            mem.add_turn(role="assistant", text=reply)
+            mem.add_turn(role="assistant", text=reply, session_id=sid)
         except Exception:
             pass
 
@@ -0,0 +1,66 @@
+# core/cache.py — small thread-safe LRU + TTL cache with hit/miss counters
+import re, threading, time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key form of a question: lowercase, punctuation dropped, whitespace collapsed."""
+    return " ".join(re.sub(r"[^\w\s]", " ", (text or "").lower()).split())
+
+
+class TTLCache:
+    """Least-recently-used cache whose entries also expire `ttl` seconds after being set (None = never)."""
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 600.0, name: str = "") -> None:
+        self.maxsize, self.ttl, self.name = maxsize, ttl, name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            ttl = self.ttl if ttl is None else ttl
+            self._data[key] = (time.monotonic() + ttl if ttl is not None else float("inf"), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Live (unexpired) entry present; unlike get(), touches neither the LRU order nor the counters."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            return entry is not _MISSING and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"name": self.name, "size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "expirations": self.expirations, "hit_rate": round(self.hits / total, 4) if total else 0.0}
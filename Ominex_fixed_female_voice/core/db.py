@@ -0,0 +1,80 @@
+# core/db.py — shared SQLite connection pool (WAL) for OMINEX stores
+import os, queue, sqlite3, threading
+from contextlib import contextmanager
+from typing import Iterator
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers never block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",    # fsync at checkpoints, not on every commit
+    "PRAGMA busy_timeout=30000",
+)
+
+
+class SQLitePool:
+    """Fixed-size pool of connections to one database file.
+
+    `connection()` hands out a pooled connection (commit on success, rollback on error, like
+    sqlite3's own context manager) and `transaction()` wraps it in BEGIN IMMEDIATE so a
+    multi-statement write takes the write lock once and commits once.
+    """
+
+    def __init__(self, path: str, size: int = 4) -> None:
+        self.path = path
+        self.size = size
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _open(self) -> sqlite3.Connection:
+        c = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        for p in PRAGMAS:
+            c.execute(p)
+        return c
+
+    def _get(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()       # pool exhausted: wait for a connection to come back
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        c = self._get()
+        try:
+            yield c
+            if c.in_transaction:
+                c.commit()
+        except BaseException:
+            if c.in_transaction:
+                c.rollback()
+            raise
+        finally:
+            self._idle.put(c)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connection() as c:
+            if c.in_transaction:
+                c.commit()
+            c.execute("BEGIN IMMEDIATE")
+            yield c
+
+    def close(self) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._opened = 0
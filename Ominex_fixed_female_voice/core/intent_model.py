@@ -0,0 +1,210 @@
+# core/intent_model.py — small learned intent classifier (optional, in front of the BRAIN regexes)
+# Softmax regression over hashed features: lowercase words, word bigrams, and char trigrams of each
+# word padded with its boundaries ("<hi>" ≠ any piece of "<this>"). Trained with NumPy on the
+# labelled corpus in core/intent_corpus.tsv; the weights are cached next to the other data and
+# retrained whenever the corpus changes. Inference is a row gather and a softmax — no sklearn.
+import hashlib, os, re, threading, time, zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "intent_corpus.tsv")
+MODEL_PATH = os.getenv("OMINEX_INTENT_MODEL_PATH") or os.path.join(os.path.dirname(__file__), "data", "intent_model.npz")
+INTENT_DIM = 1 << int(os.getenv("OMINEX_INTENT_BITS", "14"))       # hashed feature space
+INTENT_MIN_CONF = float(os.getenv("OMINEX_INTENT_MIN_CONF", "0.4"))  # below → the regex tables decide
+FEATURES_VERSION = "1"                 # bump when _features changes (invalidates cached weights)
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def _features(text: str) -> List[str]:
+    toks = _TOKEN.findall((text or "").lower())
+    toks = ["<num>" if t.isdigit() else t for t in toks]
+    feats = ["w:" + t for t in toks]
+    feats += ["b:" + a + " " + b for a, b in zip(toks, toks[1:])]
+    if toks:
+        feats.append("s:" + toks[0])
+    for t in toks:
+        if t.isalpha() and len(t) > 1:
+            p = "<" + t + ">"
+            feats += ["c:" + p[i:i + 3] for i in range(len(p) - 2)]
+    return feats
+
+
+def _hash(text: str, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Unique hashed feature ids with L2-normalized binary weights."""
+    idx = np.unique(np.fromiter((zlib.crc32(f.encode()) & (dim - 1) for f in _features(text)), np.int64))
+    val = np.full(len(idx), 1.0 / np.sqrt(len(idx)) if len(idx) else 0.0, np.float32)
+    return idx, val
+
+
+def _hash_batch(texts: Sequence[str], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Concatenated (idx, val) of all texts plus each entry's row number."""
+    pairs = [_hash(t, dim) for t in texts]
+    rows = np.repeat(np.arange(len(pairs)), [len(i) for i, _ in pairs])
+    if not pairs:
+        return np.zeros(0, np.int64), np.zeros(0, np.float32), rows
+    return np.concatenate([i for i, _ in pairs]), np.concatenate([v for _, v in pairs]), rows
+
+
+def load_corpus(path: str = CORPUS_PATH) -> Tuple[List[str], List[str]]:
+    """(texts, labels) from `label<TAB>text` lines; '#' lines are comments."""
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            label, text = line.rstrip("\n").split("\t", 1)
+            texts.append(text)
+            labels.append(label)
+    return texts, labels
+
+
+class IntentModel:
+    """`predict(text)` → (label, confidence); `predict_batch(texts)` → the same for many texts."""
+
+    def __init__(self, W: np.ndarray, b: np.ndarray, labels: Sequence[str]) -> None:
+        self.W, self.b, self.labels = W.astype(np.float32), b.astype(np.float32), list(labels)
+        self.dim = W.shape[0]
+
+    @classmethod
+    def train(cls, texts: Sequence[str], labels: Sequence[str], dim: int = INTENT_DIM, epochs: int = 300,
+              lr: float = 0.1, l2: float = 1e-4, seed: int = 7) -> "IntentModel":
+        """Full-batch Adam on the softmax cross-entropy (+ L2); deterministic for a given corpus.
+        Only the features the corpus uses get weights, so training runs on a small dense matrix."""
+        names = sorted(set(labels))
+        y = np.array([names.index(l) for l in labels])
+        idx, val, rows = _hash_batch(texts, dim)
+        used, col = np.unique(idx, return_inverse=True)
+        n, c = len(texts), len(names)
+        X = np.zeros((n, len(used)), np.float32)
+        X[rows, col] = val
+        Y = np.zeros((n, c), np.float32)
+        Y[np.arange(n), y] = 1.0
+        rng = np.random.default_rng(seed)
+        Wu = (0.01 * rng.standard_normal((len(used), c))).astype(np.float32)
+        b = np.zeros(c, np.float32)
+        params, m, v = [Wu, b], [np.zeros_like(Wu), np.zeros_like(b)], [np.zeros_like(Wu), np.zeros_like(b)]
+        for step in range(1, epochs + 1):
+            G = (_softmax(X @ Wu + b) - Y) / n
+            for p, g, mp, vp in zip(params, (X.T @ G + l2 * Wu, G.sum(0)), m, v):
+                mp *= 0.9; mp += 0.1 * g
+                vp *= 0.999; vp += 0.001 * g * g
+                p -= lr * (mp / (1 - 0.9 ** step)) / (np.sqrt(vp / (1 - 0.999 ** step)) + 1e-8)
+        W = np.zeros((dim, c), np.float32)
+        W[used] = Wu
+        return cls(W, b, names)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        idx, val = _hash(text, self.dim)
+        p = _softmax(val @ self.W[idx] + self.b)
+        k = int(p.argmax())
+        return self.labels[k], float(p[k])
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        idx, val, rows = _hash_batch(texts, self.dim)
+        Z = np.zeros((len(texts), len(self.labels)), np.float32)
+        np.add.at(Z, rows, self.W[idx] * val[:, None])
+        P = _softmax(Z + self.b)
+        best = P.argmax(1)
+        return [(self.labels[k], float(P[i, k])) for i, k in enumerate(best)]
+
+    def save(self, path: str, digest: str = "") -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, W=self.W, b=self.b, labels=np.array(self.labels), digest=np.array(digest))
+
+    @classmethod
+    def load(cls, path: str, digest: str = "") -> Optional["IntentModel"]:
+        """The cached model, or None if missing, unreadable or trained on another corpus."""
+        try:
+            with np.load(path) as z:
+                if str(z["digest"]) != digest:
+                    return None
+                return cls(z["W"], z["b"], z["labels"].tolist())
+        except Exception:
+            return None
+
+
+def _softmax(Z: np.ndarray) -> np.ndarray:
+    Z = Z - Z.max(axis=-1, keepdims=True)
+    E = np.exp(Z)
+    return E / E.sum(axis=-1, keepdims=True)
+
+
+def _digest(path: str, dim: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read() + f"|{dim}|{FEATURES_VERSION}".encode()).hexdigest()
+
+
+_model: Optional[IntentModel] = None
+_model_lock = threading.Lock()
+
+
+def get_model(corpus: str = CORPUS_PATH, path: str = MODEL_PATH) -> IntentModel:
+    """Cached weights if they match the corpus, else train (≈1 s) and cache them."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            digest = _digest(corpus, INTENT_DIM)
+            model = IntentModel.load(path, digest)
+            if model is None or model.dim != INTENT_DIM:
+                model = IntentModel.train(*load_corpus(corpus))
+                try:
+                    model.save(path, digest)
+                except OSError as e:
+                    print("INTENT model not cached:", e)
+            _model = model
+        return _model
+
+
+def classify(text: str, min_conf: Optional[float] = None) -> Optional[str]:
+    """Model label if it is at least `min_conf` (default INTENT_MIN_CONF) sure, else None —
+    the caller then falls back to the regexes."""
+    label, conf = get_model().predict(text)
+    return label if conf >= (INTENT_MIN_CONF if min_conf is None else min_conf) else None
+
+
+def bench_intent_model(n: int = 5000, folds: int = 5, min_conf: Optional[float] = None) -> dict:
+    """Held-out accuracy (k-fold over the corpus) of the BRAIN regexes, the model, and the model with
+    regex fallback below `min_conf`; plus single and batch prediction latency."""
+    from .intents import BRAIN
+    min_conf = INTENT_MIN_CONF if min_conf is None else min_conf
+    texts, labels = load_corpus()
+    order = np.random.default_rng(7).permutation(len(texts))
+    hits = {"regex": 0, "model": 0, "hybrid": 0}
+    fallbacks = 0
+    for f in range(folds):
+        test = set(order[f::folds].tolist())
+        model = IntentModel.train([texts[i] for i in range(len(texts)) if i not in test],
+                                  [labels[i] for i in range(len(texts)) if i not in test])
+        for i in test:
+            regex = BRAIN.first(texts[i]) or "chat"
+            label, conf = model.predict(texts[i])
+            hybrid = label if conf >= min_conf else regex
+            fallbacks += conf < min_conf
+            hits["regex"] += regex == labels[i]
+            hits["model"] += label == labels[i]
+            hits["hybrid"] += hybrid == labels[i]
+    model = get_model()
+    msgs = [texts[i % len(texts)] for i in range(n)]
+    t0 = time.perf_counter()
+    for m in msgs:
+        model.predict(m)
+    t1 = time.perf_counter()
+    model.predict_batch(msgs)
+    t2 = time.perf_counter()
+    for m in msgs:
+        BRAIN.first(m)
+    t3 = time.perf_counter()
+    return {"corpus": len(texts), "labels": len(model.labels),
+            **{f"{k}_acc": round(v / len(texts), 4) for k, v in hits.items()},
+            "fallback_rate": round(fallbacks / len(texts), 4), "min_conf": min_conf,
+            "predict_us": round(1e6 * (t1 - t0) / n, 2), "batch_us_per_msg": round(1e6 * (t2 - t1) / n, 2),
+            "regex_us": round(1e6 * (t3 - t2) / n, 2)}
+
+
+if __name__ == "__main__":
+    # retrain from the corpus and refresh the cached weights
+    texts, labels = load_corpus()
+    IntentModel.train(texts, labels).save(MODEL_PATH, _digest(CORPUS_PATH, INTENT_DIM))
+    print(f"trained on {len(texts)} examples → {MODEL_PATH}")
@@ -0,0 +1,166 @@
+# core/intents.py — compiled intent tables shared by brain, nlu and router
+# A table is an ordered list of rules; the first rule (in order) that matches wins. Instead of
+# running every rule's regex over the text, a table reads the text once: its words are looked up
+# in a keyword index (word → bitmask of rules that cannot match without that word), giving the
+# candidate rules; those are then confirmed with their own pattern, best priority first, and the
+# first confirmed one is the answer. Words are only a prefilter — confirmation uses the original
+# pattern, so the result is the same as checking the rules one by one.
+import re, time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+class Rule:
+    """`test(text, low)` decides the rule (`low` = text.lower()); `words` are the lowercase words
+    of which at least one must occur in a matching text (empty = no prefilter, always tested)."""
+    __slots__ = ("name", "test", "words", "rx")
+
+    def __init__(self, name: str, test: Callable[[str, str], bool], words: Sequence[str] = (),
+                 rx: Optional["re.Pattern"] = None) -> None:
+        self.name, self.test, self.words, self.rx = name, test, tuple(words), rx
+
+
+def pattern(name: str, pat: str, *words: str, flags: int = re.I) -> Rule:
+    """Regex rule (searched in the original text); `words` = its trigger words, if it has any."""
+    rx = re.compile(pat, flags)
+    return Rule(name, lambda text, low: rx.search(text) is not None, words, rx)
+
+
+def contains(name: str, *literals: str) -> Rule:
+    """Substring rule (`any(lit in text.lower())`)."""
+    return Rule(name, lambda text, low: any(lit in low for lit in literals),
+                rx=re.compile("|".join(map(re.escape, literals)), re.I))
+
+
+def prefix(name: str, *literals: str) -> Rule:
+    """Prefix rule (`text.lower().startswith(literals)`)."""
+    return Rule(name, lambda text, low: low.startswith(literals),
+                rx=re.compile("^(?:" + "|".join(map(re.escape, literals)) + ")", re.I))
+
+
+class IntentTable:
+    """`first(text)` → name of the highest-priority matching rule (or None);
+    `rx(name)` → that rule's compiled pattern, for slot extraction after classification."""
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = list(rules)
+        self.names = list(dict.fromkeys(r.name for r in self.rules))
+        self._always = 0                      # rules without trigger words
+        self._index: Dict[str, int] = {}      # word → bitmask of the rules it can trigger
+        for i, r in enumerate(self.rules):
+            if not r.words:
+                self._always |= 1 << i
+            for w in r.words:
+                self._index[w] = self._index.get(w, 0) | (1 << i)
+
+    def first(self, text: str) -> Optional[str]:
+        text = text or ""
+        low = text.lower()
+        mask, index = self._always, self._index
+        if index:
+            for w in _WORD.findall(low):
+                mask |= index.get(w, 0)
+        while mask:
+            low_bit = mask & -mask               # lowest set bit = best remaining priority
+            rule = self.rules[low_bit.bit_length() - 1]
+            if rule.test(text, low):
+                return rule.name
+            mask ^= low_bit
+        return None
+
+    def sequential(self, text: str) -> Optional[str]:
+        """Reference answer: every rule in order, no prefilter (tests and the benchmark)."""
+        text = text or ""
+        low = text.lower()
+        return next((r.name for r in self.rules if r.test(text, low)), None)
+
+    def rx(self, name: str) -> "re.Pattern":
+        return next(r.rx for r in self.rules if r.name == name)
+
+
+# ---------- brain._classify_intent ----------
+BRAIN = IntentTable([
+    pattern("remember", r"\b(remember that|remember this|save this|note that|store this)\b",
+            "remember", "save", "note", "store"),
+    pattern("recall", r"\b(recall|what did i say|memory)\b", "recall", "what", "memory"),
+    pattern("clear_memory", r"\b(clear memory|reset memory)\b", "clear", "reset"),
+    pattern("calculate", r"^\s*(?:calc|calculate)\b|^\s*[+\-/*().\d\s]{3,}\s*$"),
+    pattern("search", r"\b(search|look up|find|google|wiki)\b", "search", "look", "find", "google", "wiki"),
+    pattern("time", r"\b(time now|date now|what time)\b", "time", "date", "what"),
+    pattern("help", r"\b(help|what can you do)\b", "help", "what"),
+    pattern("news", r"\b(news|latest|headlines)\b", "news", "latest", "headlines"),
+    pattern("greet", r"\b(hi|hello|hey|molo)\b", "hi", "hello", "hey", "molo"),
+    pattern("convert", r"\bconvert\b", "convert"),
+    pattern("task_add", r"\b(add task|todo)\b", "add", "todo"),
+    pattern("task_list", r"\b(list tasks|show tasks)\b", "list", "show"),
+])
+
+# ---------- brain.conversational_response (substring checks) ----------
+CANNED = IntentTable([
+    contains("identity", "who made you"),
+    contains("python", "what is python"),
+    contains("infinity", "what is infinite", "what is infinity"),
+    contains("hello", "hello", "hi"),
+])
+
+# ---------- nlu.detect_intent ----------
+NLU = IntentTable([
+    # Utilities / reasoning
+    pattern("calc", r"\b(calc(ulate)?|what is|=)\b"),      # "=" between word chars: no trigger word
+    pattern("convert", r"\b(convert|in\s+(?:meters|km|cm)|celsius|fahrenheit)\b",
+            "convert", "in", "celsius", "fahrenheit"),
+    pattern("plan", r"\b(plan|steps|roadmap|how do i)\b", "plan", "steps", "roadmap", "how"),
+    pattern("compare", r"\b(compare|pros and cons|vs\.?)\b", "compare", "pros", "vs"),
+    pattern("summarize", r"\b(summar(?:y|ise)|tl;dr|short version)\b", "summary", "summarise", "tl", "short"),
+    # Web lookup
+    pattern("web_query", r"\b(search|look\s*up|lookup|find)\b", "search", "look", "lookup", "find"),
+    pattern("wh_q", r"^\s*(who|what|when|where|why|how)\b.*\?*$"),
+    pattern("latest", r"\b(latest|news|update)\b", "latest", "news", "update"),
+    # Tasks
+    pattern("todo_add", r"\b(add|remember)\s+(this\s+)?(task|to[-\s]?do)\b", "add", "remember"),
+    pattern("todo_list", r"\b(list|show)\s+(tasks?|todos?)\b", "list", "show"),
+    pattern("todo_done", r"\b(done|finish|complete)\s+(task\s*)?#?(\d+)\b", "done", "finish", "complete"),
+    pattern("todo_clear", r"\b(clear|delete|remove)\s+(all\s+)?(tasks?|todos?)\b", "clear", "delete", "remove"),
+])
+
+# ---------- router.decide (prefix / substring checks on the stripped message) ----------
+DEMO_BLOCKED_WORDS = ("trade", "buy", "sell", "delete", "system", "file", "learn", "alert", "backtest")
+ROUTER_DEMO = IntentTable([contains("blocked", *DEMO_BLOCKED_WORDS)])
+ROUTER = IntentTable([
+    prefix("trade", "trade ", "plan ", "signal "),
+    contains("news", "latest", "news", "headline", "breaking"),
+    prefix("wiki", "wiki ", "wikipedia ", "who is ", "what is ", "define "),
+    prefix("search", "search ", "look up "),
+    contains("search", "google "),
+    prefix("weather", "weather "),
+    prefix("crypto", "crypto ", "price "),
+    prefix("summarize", "summarize ", "read ", "open "),
+])
+
+TABLES: Dict[str, IntentTable] = {"brain": BRAIN, "canned": CANNED, "nlu": NLU, "router": ROUTER}
+
+
+def bench_intents(n: int = 20000) -> dict:
+    """Per-message routing cost: every rule in order (the old if/for chains) vs the keyword-indexed
+    tables, on a mixed corpus; also checks both give the same answer."""
+    import random
+    rng = random.Random(7)
+    corpus = ["hello there", "what is python", "search rust lifetimes", "remember that I parked on level 3",
+              "convert 5 kg to lb", "tell me about black holes and why they evaporate", "list tasks", "12 * 7",
+              "what time is it", "latest news on the rand", "I feel like writing a long message today " * 4,
+              "compare python vs go", "how do I bake bread?", "done task #3", "weather Durban", "thanks, bye"]
+    msgs = [rng.choice(corpus) for _ in range(n)]
+    out = {}
+    for name, table in TABLES.items():
+        assert all(table.sequential(m) == table.first(m) for m in corpus)
+        t0 = time.perf_counter()
+        for m in msgs:
+            table.sequential(m)
+        t1 = time.perf_counter()
+        for m in msgs:
+            table.first(m)
+        t2 = time.perf_counter()
+        out[name] = {"rules": len(table.rules), "sequential_us": round(1e6 * (t1 - t0) / n, 2),
+                     "indexed_us": round(1e6 * (t2 - t1) / n, 2)}
+    return out
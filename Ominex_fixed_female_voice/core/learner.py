@@ -1,6 +1,9 @@
 # core/learner.py — OMINEX Web Learner (topics → crawl → summarize → RAG)
-import os, re, json, time, sqlite3, math, hashlib          # ✅ add hashlib
-from typing import List, Dict, Tuple, Optional, Any        # ✅ add Optional, Any
+import os, re, json, time, sqlite3, math, hashlib, threading          # ✅ add hashlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Tuple, Optional, Any, Iterator        # ✅ add Optional, Any
 import numpy as np
 
 # Optional deps guarded
@@ -13,8 +16,17 @@ from .web import search_web_list, fetch_url_readable       # ✅ use list versio
 import requests
 from duckduckgo_search import DDGS
 from .memory import Memory
+from .db import SQLitePool
+from .vecstore import VecStore, SparseVec
+from .ann import ExactIndex, make_index
+from .cache import TTLCache, normalize_text
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "learn.db")
+LEARN_DIR = os.getenv("OMINEX_LEARN_DIR") or os.path.join(os.path.dirname(__file__), "..", "data")
+DB_PATH = os.path.join(LEARN_DIR, "learn.db")
+VEC_PATH = os.path.join(os.path.dirname(DB_PATH), "learn_vecs")   # → learn_vecs.indptr / .indices / .data / .norms
+ANN_PATH = os.path.join(os.path.dirname(DB_PATH), "learn_ivf")    # → learn_ivf.centroids.npy / .assign / .json
+KB_INDEX = os.getenv("OMINEX_KB_INDEX", "ivf")                    # "ivf" (approximate) | "exact"
+KB_RETRIEVAL = os.getenv("OMINEX_KB_RETRIEVAL", "hybrid")         # "hybrid" (BM25 + vector) | "vector"
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 ALLOW_DOMAINS = {
@@ -26,34 +38,115 @@ ALLOW_DOMAINS = {
 }
 BLOCK_DOMAINS = {"baidu.com","weibo.com","bilibili.com","zhihu.com"}
 
+# one pool per process: WAL lets chat-time reads run while the scheduler writes
+_pool = SQLitePool(DB_PATH, size=4)
+
 def _conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    return _pool.connection()
 
 def init_db():
+    global HAS_FTS
     with _conn() as c:
-        c.execute("""CREATE TABLE IF NOT EXISTS topics(
-            id INTEGER PRIMARY KEY, topic TEXT UNIQUE, added_ts INTEGER)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS sources(
-            id INTEGER PRIMARY KEY, url TEXT UNIQUE, domain TEXT, title TEXT,
-            topic TEXT, first_seen INTEGER, last_seen INTEGER)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS chunks(
-            id INTEGER PRIMARY KEY, source_id INTEGER, text TEXT, vec BLOB,
-            FOREIGN KEY(source_id) REFERENCES sources(id))""")
+        _create_schema(c)
+        HAS_FTS = bool(c.execute("SELECT 1 FROM sqlite_master WHERE name='chunks_fts'").fetchone())
     return True
 
+HAS_FTS = False
+
+def _create_schema(c: sqlite3.Connection) -> None:
+    c.execute("""CREATE TABLE IF NOT EXISTS topics(
+        id INTEGER PRIMARY KEY, topic TEXT UNIQUE, added_ts INTEGER)""")
+    c.execute("""CREATE TABLE IF NOT EXISTS sources(
+        id INTEGER PRIMARY KEY, url TEXT UNIQUE, domain TEXT, title TEXT,
+        topic TEXT, first_seen INTEGER, last_seen INTEGER)""")
+    c.execute("""CREATE TABLE IF NOT EXISTS chunks(
+        id INTEGER PRIMARY KEY, source_id INTEGER, text TEXT, vec BLOB,
+        FOREIGN KEY(source_id) REFERENCES sources(id))""")
+    # vfmt: 0 = dense float32 BLOB (legacy), 1 = sparse int32 indices + float32 values
+    _add_columns(c, "chunks", {"vfmt": "INTEGER NOT NULL DEFAULT 0"})
+    # HTTP validators + hash of the extracted text, so revisits can skip unchanged pages
+    _add_columns(c, "sources", {"etag": "TEXT", "last_modified": "TEXT", "content_hash": "TEXT"})
+    # sources(url) is already indexed through its UNIQUE constraint
+    c.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sources_topic ON sources(topic)")
+    # materialized counters, kept in step with the ingest transaction ('' = totals row)
+    c.execute("""CREATE TABLE IF NOT EXISTS topic_stats(
+        topic TEXT PRIMARY KEY, sources INTEGER NOT NULL DEFAULT 0, chunks INTEGER NOT NULL DEFAULT 0,
+        bytes INTEGER NOT NULL DEFAULT 0, last_crawl INTEGER)""")
+    if not c.execute("SELECT 1 FROM topic_stats WHERE topic=''").fetchone():
+        _rebuild_stats(c)
+    # corpus_version: bumped by every chunk write, so cached query results know when they went stale
+    c.execute("CREATE TABLE IF NOT EXISTS kb_meta(key TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+    c.execute("INSERT OR IGNORE INTO kb_meta(key, value) VALUES('corpus_version', 0)")
+    # content-addressed embeddings (sha1 of embedder dim + text → packed sparse vector), FIFO-bounded by rowid
+    c.execute("CREATE TABLE IF NOT EXISTS embed_cache(key TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+    _create_fts(c)
+
+def _create_fts(c: sqlite3.Connection) -> bool:
+    """BM25 inverted index over chunks.text (external-content FTS5, synced by triggers)."""
+    try:
+        fresh = not c.execute("SELECT 1 FROM sqlite_master WHERE name='chunks_fts'").fetchone()
+        c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='id')")
+    except sqlite3.OperationalError:
+        return False      # SQLite built without FTS5: vector-only retrieval
+    c.execute("""CREATE TRIGGER IF NOT EXISTS chunks_fts_ai AFTER INSERT ON chunks BEGIN
+        INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text); END""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS chunks_fts_ad AFTER DELETE ON chunks BEGIN
+        INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); END""")
+    c.execute("""CREATE TRIGGER IF NOT EXISTS chunks_fts_au AFTER UPDATE OF text ON chunks BEGIN
+        INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text); END""")
+    if fresh:
+        c.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")   # index existing chunks once
+    return True
+
+def _rebuild_stats(c: sqlite3.Connection) -> None:
+    """Recount topic_stats from scratch (one full scan; run once when the table is new)."""
+    c.execute("DELETE FROM topic_stats")
+    c.execute("""INSERT INTO topic_stats(topic, sources, chunks, bytes, last_crawl)
+        SELECT s.topic, COUNT(DISTINCT s.id), COUNT(ch.id),
+               COALESCE(SUM(LENGTH(CAST(ch.text AS BLOB)) + LENGTH(ch.vec)), 0), MAX(s.last_seen)
+        FROM sources s LEFT JOIN chunks ch ON ch.source_id = s.id
+        WHERE s.topic IS NOT NULL AND s.topic != '' GROUP BY s.topic""")
+    c.execute("""INSERT INTO topic_stats(topic, sources, chunks, bytes, last_crawl)
+        SELECT '', COALESCE(SUM(sources), 0), COALESCE(SUM(chunks), 0), COALESCE(SUM(bytes), 0), MAX(last_crawl)
+        FROM topic_stats""")
+
+def _bump_stats(c: sqlite3.Connection, topic: str, sources: int = 0, chunks: int = 0,
+                nbytes: int = 0, last_crawl: Optional[int] = None) -> None:
+    """Apply counter deltas to a topic row and the totals row (inside the caller's transaction)."""
+    for t in {topic or "", ""}:
+        c.execute("""INSERT INTO topic_stats(topic, sources, chunks, bytes, last_crawl) VALUES(?,?,?,?,?)
+            ON CONFLICT(topic) DO UPDATE SET sources=sources+excluded.sources, chunks=chunks+excluded.chunks,
+            bytes=bytes+excluded.bytes, last_crawl=COALESCE(excluded.last_crawl, last_crawl)""",
+                  (t, sources, chunks, nbytes, last_crawl))
+
+def _add_columns(c: sqlite3.Connection, table: str, cols: Dict[str, str]) -> None:
+    have = {r[1] for r in c.execute(f"PRAGMA table_info({table})")}
+    for name, decl in cols.items():
+        if name not in have:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
 init_db()
 
 # ---------- tiny embedding (no big downloads) ----------
 # Fast, zero-fit hashing vectorizer → cosine similarity
 try:
     from sklearn.feature_extraction.text import HashingVectorizer
-    _hv = HashingVectorizer(n_features=16384, alternate_sign=False, norm="l2")
+    EMBED_DIM = 16384
+    _hv = HashingVectorizer(n_features=EMBED_DIM, alternate_sign=False, norm="l2")
     def _embed(texts: List[str]) -> np.ndarray:
         if not isinstance(texts, list): texts = [texts]
         X = _hv.transform(texts).astype(np.float32)
         return X.toarray()
+    def _vectorize(texts: List[str]) -> List[SparseVec]:
+        X = _hv.transform(texts).tocsr()
+        X.sort_indices()
+        return [(X.indices[a:b].astype(np.int32), X.data[a:b].astype(np.float32))
+                for a, b in zip(X.indptr[:-1], X.indptr[1:])]
 except Exception:
     # Fallback: simple bag-of-words
+    EMBED_DIM = 256
     def _embed(texts: List[str]) -> np.ndarray:
         if not isinstance(texts, list): texts = [texts]
         arr = np.zeros((len(texts), 256), dtype=np.float32)
@@ -63,6 +156,162 @@ except Exception:
             n = np.linalg.norm(arr[i]); 
             if n>0: arr[i]/=n
         return arr
+    def _vectorize(texts: List[str]) -> List[SparseVec]:
+        return [_to_sparse(v) for v in _embed(texts)]
+
+# ---------- sparse vector BLOBs (chunks.vec with vfmt=1) ----------
+def _to_sparse(dense: np.ndarray) -> SparseVec:
+    idx = np.flatnonzero(dense).astype(np.int32)
+    return idx, dense[idx].astype(np.float32)
+
+def _pack_sparse(v: SparseVec) -> bytes:
+    idx, val = v
+    return idx.astype("<i4").tobytes() + val.astype("<f4").tobytes()
+
+def _unpack_vec(blob: bytes, vfmt: int) -> SparseVec:
+    if not vfmt:
+        return _to_sparse(np.frombuffer(blob, dtype=np.float32))
+    n = len(blob) // 8
+    return np.frombuffer(blob, dtype="<i4", count=n), np.frombuffer(blob, dtype="<f4", offset=4 * n)
+
+# ---------- embedding cache (in-process LRU over the on-disk embed_cache table) ----------
+EMBED_CACHE_SIZE = int(os.getenv("OMINEX_EMBED_CACHE_SIZE", "4096"))      # vectors kept in process
+EMBED_CACHE_ROWS = int(os.getenv("OMINEX_EMBED_CACHE_ROWS", "200000"))    # rows kept on disk
+_emb_lru = TTLCache(maxsize=EMBED_CACHE_SIZE, ttl=None, name="embed")
+_emb_lock = threading.Lock()
+_emb_disk = {"hits": 0, "misses": 0}
+
+def _text_key(text: str) -> str:
+    # the dimension is part of the key: the sklearn and fallback embedders must never share entries
+    return hashlib.sha1(f"{EMBED_DIM}\0{text}".encode("utf-8", "replace")).hexdigest()
+
+def _embed_sparse(texts: List[str]) -> List[SparseVec]:
+    """Sparse embeddings, vectorizing only texts not seen before (mirrored chunks, repeated questions)."""
+    if not isinstance(texts, list): texts = [texts]
+    keys = [_text_key(t or "") for t in texts]
+    got: Dict[str, SparseVec] = {}
+    for k in dict.fromkeys(keys):
+        v = _emb_lru.get(k)
+        if v is not None:
+            got[k] = v
+    miss = [k for k in dict.fromkeys(keys) if k not in got]
+    if miss:
+        try:
+            with _conn() as c:
+                rows = c.execute(f"SELECT key, vec FROM embed_cache WHERE key IN ({','.join('?' * len(miss))})",
+                                 miss).fetchall()
+        except sqlite3.Error as e:
+            print("LEARN embed cache error:", e)
+            rows = []
+        for k, blob in rows:
+            got[k] = _unpack_vec(blob, 1)
+            _emb_lru.set(k, got[k])
+        todo = {k: t for k, t in zip(keys, texts) if k not in got}
+        with _emb_lock:
+            _emb_disk["hits"] += len(rows); _emb_disk["misses"] += len(todo)
+        if todo:
+            fresh = dict(zip(todo, _vectorize([t or "" for t in todo.values()])))
+            got.update(fresh)
+            for k, v in fresh.items():
+                _emb_lru.set(k, v)
+            try:
+                with _pool.transaction() as c:
+                    c.executemany("INSERT OR IGNORE INTO embed_cache(key, vec) VALUES(?,?)",
+                                  [(k, memoryview(_pack_sparse(v))) for k, v in fresh.items()])
+                    c.execute("DELETE FROM embed_cache WHERE rowid <= (SELECT MAX(rowid) FROM embed_cache) - ?",
+                              (EMBED_CACHE_ROWS,))
+            except sqlite3.Error as e:
+                print("LEARN embed cache error:", e)
+    return [got[k] for k in keys]
+
+def embed_cache_stats() -> dict:
+    with _emb_lock:
+        hits, misses = _emb_disk["hits"], _emb_disk["misses"]
+    return {"memory": _emb_lru.stats(),
+            "disk": {"hits": hits, "misses": misses,
+                     "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0}}
+
+def _migrate_sparse(batch: int = 256) -> int:
+    """One-time rewrite of legacy dense chunk vectors to the sparse format (then VACUUM to give space back)."""
+    done = 0
+    with _conn() as c:
+        if not c.execute("SELECT 1 FROM chunks WHERE vfmt=0 LIMIT 1").fetchone():
+            return 0
+        while True:
+            rows = c.execute("SELECT id, vec FROM chunks WHERE vfmt=0 LIMIT ?", (batch,)).fetchall()
+            if not rows: break
+            c.executemany("UPDATE chunks SET vec=?, vfmt=1 WHERE id=?",
+                          [(memoryview(_pack_sparse(_unpack_vec(v, 0))), i) for i, v in rows])
+            c.commit()
+            done += len(rows)
+    with _conn() as c:
+        c.execute("VACUUM")
+    # the dense matrix file written before the sparse store existed is no longer read
+    try:
+        os.remove(VEC_PATH + ".f32")
+    except OSError:
+        pass
+    return done
+
+_migrate_sparse()
+
+# chunk vectors are mirrored into a memory-mapped CSR matrix (row == chunks.id)
+_vecs = VecStore(VEC_PATH, EMBED_DIM)
+_index = make_index(KB_INDEX, _vecs, ANN_PATH)
+_indexes = {"exact": ExactIndex(_vecs), _index.name: _index}
+
+# the matrix is append-only: every append, and whatever decides the ids it appends at, holds this
+_vec_lock = threading.RLock()
+_vec_repair = True      # look for live chunks with a lost row: once per process, again after a failed append
+
+def _sync_vecs() -> None:
+    """Backfill matrix rows for chunks stored before the matrix existed (or after a reset), and
+    re-home live chunks whose row is empty."""
+    global _vec_repair
+    with _conn() as c:
+        if (c.execute("SELECT MAX(id) FROM chunks").fetchone()[0] or 0) < _vecs.rows and not _vec_repair:
+            return
+    with _vec_lock:
+        with _conn() as c:
+            # re-read under the lock: a concurrent query may have backfilled these rows meanwhile
+            cur = c.execute("SELECT id, vec, vfmt FROM chunks WHERE id >= ? ORDER BY id", (_vecs.rows,))
+            while True:
+                batch = cur.fetchmany(512)
+                if not batch: break
+                _vecs.put([r[0] for r in batch], [_unpack_vec(r[1], r[2]) for r in batch])
+        if _vec_repair:
+            _vec_repair = False
+            moved = _rehome_lost()
+            if moved:
+                print(f"LEARN re-homed {moved} chunks whose vectors were lost")
+
+def _rehome_lost(batch: int = 500) -> int:
+    """Rows can't be rewritten in place, so live chunks whose row has norm 0 (an append that failed
+    after its commit) move to fresh ids past the end of the store and are appended again.
+    Caller holds _vec_lock."""
+    norms = np.asarray(_vecs.arrays()["norms"])
+    with _conn() as c:
+        ids = np.array([r[0] for r in c.execute("SELECT id FROM chunks WHERE id < ?", (len(norms),))], np.int64)
+    lost = ids[norms[ids] == 0].tolist() if len(ids) else []
+    if not lost:
+        return 0
+    with _pool.transaction() as c:
+        moved = []
+        for a in range(0, len(lost), batch):
+            part = lost[a:a + batch]
+            moved += c.execute(f"SELECT id, source_id, text, vec, vfmt FROM chunks WHERE id IN ({','.join('?' * len(part))})",
+                               part).fetchall()
+        moved = [r for r in moved if len(_unpack_vec(r[3], r[4])[0])]   # genuinely empty vectors stay put
+        if not moved:
+            return 0
+        c.executemany("DELETE FROM chunks WHERE id=?", [(r[0],) for r in moved])
+        base = max(c.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM chunks").fetchone()[0], _vecs.rows)
+        ids = list(range(base, base + len(moved)))
+        c.executemany("INSERT INTO chunks(id,source_id,text,vec,vfmt) VALUES(?,?,?,?,?)",
+                      [(i,) + tuple(r[1:]) for i, r in zip(ids, moved)])
+        c.execute("UPDATE kb_meta SET value=value+1 WHERE key='corpus_version'")
+    _vecs.put(ids, [_unpack_vec(r[3], r[4]) for r in moved])
+    return len(moved)
 
 def _domain(url: str) -> str:
     try:
@@ -84,17 +333,47 @@ def _clean_text(text: str) -> str:
     text = re.sub(r"\s+", " ", (text or "")).strip()
     return text
 
-def _split_chunks(text: str, max_chars=900) -> List[str]:
-    words = text.split()
-    out, cur = [], []
-    n=0
-    for w in words:
-        n += len(w)+1
-        cur.append(w)
-        if n >= max_chars:
-            out.append(" ".join(cur)); cur=[]; n=0
-    if cur: out.append(" ".join(cur))
-    return out
+# ---------- chunking (one streaming pass, sentence-aligned, with overlap) ----------
+CHUNK_CHARS = 900
+CHUNK_OVERLAP = 150
+EMBED_BATCH = 64
+_SENT_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+def _sentence_spans(text: str, max_chars: int) -> Iterator[Tuple[int, int]]:
+    """(start, end) offsets of sentences; a sentence longer than max_chars is cut at word breaks."""
+    start, n = 0, len(text)
+    ends = (m.end() for m in _SENT_END.finditer(text))
+    while start < n:
+        end = next(ends, n)
+        while end - start > max_chars:
+            cut = text.rfind(" ", start + 1, start + max_chars)
+            cut = cut if cut > start else start + max_chars
+            yield start, cut
+            start = cut
+        if end > start:
+            yield start, end
+        start = end
+
+def iter_chunks(text: str, max_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """Yield ~max_chars chunks made of whole sentences; consecutive chunks share up to
+    `overlap` characters of trailing sentences. Works on offsets, so the page is only
+    copied once (as the chunks themselves)."""
+    window: deque = deque()
+    for s, e in _sentence_spans(text or "", max_chars):
+        if window and e - window[0][0] > max_chars:
+            yield text[window[0][0]:window[-1][1]].strip()
+            while window and window[-1][1] - window[0][0] > overlap:
+                window.popleft()
+            while window and e - window[0][0] > max_chars:
+                window.popleft()
+        window.append((s, e))
+    if window:
+        tail = text[window[0][0]:window[-1][1]].strip()
+        if tail:
+            yield tail
+
+def _split_chunks(text: str, max_chars=CHUNK_CHARS) -> List[str]:
+    return [c for c in iter_chunks(text, max_chars) if c]
 
 def add_topic(topic: str) -> dict:
     topic = (topic or "").strip()
@@ -109,35 +388,67 @@ def list_topics() -> List[str]:
         rows = c.execute("SELECT topic FROM topics ORDER BY added_ts DESC").fetchall()
     return [r[0] for r in rows]
 
-def _extract_readable(url: str) -> str:
-    # 1) Try trafilatura (best)
+# ---------- fetch / extract (separate stages so the crawler can overlap them) ----------
+FETCH_TIMEOUT = 15.0
+
+def _fetch_page(url: str, timeout: float = FETCH_TIMEOUT,
+                etag: Optional[str] = None, last_modified: Optional[str] = None) -> dict:
+    """GET with If-None-Match / If-Modified-Since when validators are known.
+    Returns {"status", "html", "etag", "last_modified"}; status 304 means unchanged (no body)."""
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if etag: headers["If-None-Match"] = etag
+    if last_modified: headers["If-Modified-Since"] = last_modified
+    # 1) requests first: it exposes the validators
+    try:
+        r = requests.get(url, timeout=min(12.0, timeout), headers=headers)
+        if r.status_code == 304:
+            return {"status": 304, "html": "", "etag": etag, "last_modified": last_modified}
+        if r.ok and r.text:
+            return {"status": r.status_code, "html": r.text,
+                    "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+    except Exception:
+        pass
+    # 2) Fallback: trafilatura's downloader (no validators)
     if trafilatura is not None:
         try:
-            downloaded = trafilatura.fetch_url(url, timeout=15)
+            downloaded = trafilatura.fetch_url(url, timeout=timeout)
             if downloaded:
-                text = trafilatura.extract(downloaded, include_comments=False, favor_recall=True) or ""
-                text = _clean_text(text)
-                if len(text) >= 200:
-                    return text
+                return {"status": 200, "html": downloaded, "etag": None, "last_modified": None}
         except Exception:
             pass
-    # 2) Fallback: requests + BeautifulSoup (no lxml requirement)
-    try:
-        r = requests.get(url, timeout=12, headers={"User-Agent":"Mozilla/5.0"})
-        if r.ok and r.text:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(r.text, "html.parser")   # ✅ use std parser
-            for tag in soup(["script","style","noscript","header","footer","nav","aside"]):
-                tag.extract()
-            text = " ".join((soup.get_text(" ") or "").split())
+    return {"status": 0, "html": "", "etag": None, "last_modified": None}
+
+def _fetch_html(url: str, timeout: float = FETCH_TIMEOUT) -> str:
+    return _fetch_page(url, timeout)["html"]
+
+def _extract_html(html: str) -> str:
+    if not html:
+        return ""
+    if trafilatura is not None:
+        try:
+            text = trafilatura.extract(html, include_comments=False, favor_recall=True) or ""
+            text = _clean_text(text)
             if len(text) >= 200:
                 return text
+        except Exception:
+            pass
+    # BeautifulSoup fallback (no lxml requirement)
+    try:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "html.parser")   # ✅ use std parser
+        for tag in soup(["script","style","noscript","header","footer","nav","aside"]):
+            tag.extract()
+        text = " ".join((soup.get_text(" ") or "").split())
+        if len(text) >= 200:
+            return text
     except Exception:
         pass
     return ""
 
-def crawl_topic_once(topic: str, max_new: int = 3) -> List[dict]:
-    """search → fetch → chunk → embed → store"""
+def _extract_readable(url: str) -> str:
+    return _extract_html(_fetch_html(url))
+
+def _search_candidates(topic: str) -> List[dict]:
     # Prefer centralised search
     hits = search_web_list(topic, max_results=12) or []
     results = [{"title": h.get("title",""), "url": h.get("url","")} for h in hits if _looks_ok(h.get("url",""))]
@@ -155,67 +466,467 @@ def crawl_topic_once(topic: str, max_new: int = 3) -> List[dict]:
                         break
         except Exception:
             pass
-        
-    stored = []
+    return results
+
+def _chunk_embed(text: str) -> Tuple[List[str], List[SparseVec]]:
+    """Stream chunks into the embedder EMBED_BATCH at a time."""
+    chunks: List[str] = []
+    vecs: List[SparseVec] = []
+    batch: List[str] = []
+    for ch in iter_chunks(text):
+        if not ch: continue
+        batch.append(ch)
+        if len(batch) >= EMBED_BATCH:
+            chunks += batch; vecs += _embed_sparse(batch); batch = []
+    if batch:
+        chunks += batch; vecs += _embed_sparse(batch)
+    return chunks, vecs
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _known_sources(urls: List[str]) -> Dict[str, dict]:
+    """url → stored validators/hash for the urls already in `sources`."""
+    if not urls: return {}
+    marks = ",".join("?" * len(urls))
     with _conn() as c:
-        for item in results:
-            if len(stored) >= max_new: break
-            url = item["url"]; dom = _domain(url)
-            try:
-                text = _extract_readable(url)
-                if not text: 
-                    continue  # skip if extraction failed
-                c.execute("INSERT OR IGNORE INTO sources(url,domain,title,topic,first_seen,last_seen) VALUES(?,?,?,?,?,?)",
-                          (url, dom, item.get("title",""), topic, int(time.time()), int(time.time())))
-                c.execute("UPDATE sources SET last_seen=? WHERE url=?", (int(time.time()), url))
-                sid = c.execute("SELECT id FROM sources WHERE url=?", (url,)).fetchone()[0]
-
-                chunks = _split_chunks(text, 900)
-                vecs = _embed(chunks)
-                for ch, v in zip(chunks, vecs):
-                    c.execute("INSERT INTO chunks(source_id,text,vec) VALUES(?,?,?)",
-                              (sid, ch, memoryview(v.tobytes())))
-                stored.append({"url": url, "title": item.get("title",""), "chunks": len(chunks)})
-            except Exception as e:
-                print("LEARN fetch error:", url, e)
-                continue
-    return stored
+        rows = c.execute(f"SELECT url, etag, last_modified, content_hash FROM sources WHERE url IN ({marks})",
+                         urls).fetchall()
+    return {u: {"etag": e, "last_modified": lm, "content_hash": h} for u, e, lm, h in rows}
+
+def _touch_source(url: str, page: Optional[dict] = None) -> None:
+    """Page unchanged: bump last_seen (and refresh validators if the server sent new ones)."""
+    page = page or {}
+    with _conn() as c:
+        c.execute("UPDATE sources SET last_seen=?, etag=COALESCE(?, etag), last_modified=COALESCE(?, last_modified) "
+                  "WHERE url=?", (int(time.time()), page.get("etag"), page.get("last_modified"), url))
 
-def learn_tick(max_per_topic: int = 2) -> dict:
-    """Run one learning cycle over all topics."""
-    topics = list_topics()
-    summary = {}
-    for t in topics:
-        summary[t] = crawl_topic_once(t, max_new=max_per_topic)
-    return {"ok": True, "summary": summary}
+def _store_page(topic: str, item: dict, chunks: List[str], vecs: List[SparseVec]) -> dict:
+    """Upsert the source and replace its chunks in one write transaction (bulk executemany)."""
+    url = item["url"]; now = int(time.time())
+    page = item.get("page") or {}
+    global _vec_repair
+    with _vec_lock:
+        with _pool.transaction() as c:
+            prev = c.execute("SELECT id, topic FROM sources WHERE url=?", (url,)).fetchone()
+            if prev:
+                sid, owner = prev
+                c.execute("UPDATE sources SET last_seen=?, etag=?, last_modified=?, content_hash=? WHERE id=?",
+                          (now, page.get("etag"), page.get("last_modified"), item.get("content_hash"), sid))
+            else:
+                owner = topic
+                sid = c.execute("INSERT INTO sources(url,domain,title,topic,first_seen,last_seen,etag,last_modified,content_hash) "
+                                "VALUES(?,?,?,?,?,?,?,?,?)",
+                                (url, _domain(url), item.get("title",""), topic, now, now,
+                                 page.get("etag"), page.get("last_modified"), item.get("content_hash"))).lastrowid
+            # content changed: the new chunks replace the old ones instead of piling up next to them
+            old_rows = c.execute("SELECT id, LENGTH(CAST(text AS BLOB)) + LENGTH(vec) FROM chunks WHERE source_id=?", (sid,)).fetchall()
+            old = [r[0] for r in old_rows]
+            c.execute("DELETE FROM chunks WHERE source_id=?", (sid,))
+            # explicit ids: never reuse an id the vector store has already seen (SQLite would, after
+            # deleting the highest rows); _vec_lock keeps MAX(id) and the store's rows in step
+            # until the matching put, so overlapping writers can't claim each other's rows
+            base = max(c.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM chunks").fetchone()[0], _vecs.rows)
+            ids = list(range(base, base + len(chunks)))
+            rows = [(i, sid, ch, memoryview(_pack_sparse(v))) for i, ch, v in zip(ids, chunks, vecs)]
+            c.executemany("INSERT INTO chunks(id,source_id,text,vec,vfmt) VALUES(?,?,?,?,1)", rows)
+            new_bytes = sum(len(ch.encode("utf-8")) + len(v) for _, _, ch, v in rows)
+            _bump_stats(c, owner, sources=0 if prev else 1, chunks=len(ids) - len(old),
+                        nbytes=new_bytes - sum(r[1] or 0 for r in old_rows))
+            c.execute("UPDATE kb_meta SET value=value+1 WHERE key='corpus_version'")
+        try:
+            _vecs.drop(old)
+            _vecs.put(ids, vecs)
+        except Exception:
+            _vec_repair = True      # committed chunks without rows: the next query re-homes them
+            raise
+    return {"url": url, "title": item.get("title",""), "chunks": len(chunks)}
 
-def kb_stats() -> dict:
+# ---------- concurrent crawl pipeline ----------
+class _DomainLimiter:
+    """Politeness: at most `per_domain` requests in flight per host, started `min_interval` s apart."""
+    def __init__(self, per_domain: int = 2, min_interval: float = 1.0) -> None:
+        self.per_domain, self.min_interval = per_domain, min_interval
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._next: Dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, domain: str):
+        with self._lock:
+            sem = self._slots.setdefault(domain, threading.BoundedSemaphore(self.per_domain))
+        sem.acquire()
+        try:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next.get(domain, 0.0))
+                self._next[domain] = start + self.min_interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+        finally:
+            sem.release()
+
+CRAWL_STAGES = ("search", "fetch", "extract", "embed", "store")
+
+def crawl_topics(topics: List[str], max_per_topic: int = 2, workers: int = 8,
+                 per_domain: int = 2, min_interval: float = 1.0, deadline_s: float = 900.0) -> dict:
+    """search → fetch → extract → embed → store, overlapped across topics and URLs.
+
+    Network stages (search, fetch) share a bounded thread pool behind a per-domain limiter;
+    extract/embed run on a small CPU pool; SQLite writes stay on the calling thread. Nothing new
+    is started after `deadline_s`, and in-flight work is abandoned. Returns per-topic results
+    plus cumulative per-stage timings (seconds).
+
+    Known sources are revisited with conditional GETs; a 304 or an unchanged content hash skips
+    the embed/insert work, and a changed page replaces its old chunks. Unchanged pages do not
+    count towards `max_per_topic`."""
+    t_start = time.monotonic()
+    deadline = t_start + deadline_s
+    limiter = _DomainLimiter(per_domain, min_interval)
+    timings = {s: 0.0 for s in CRAWL_STAGES}
+    pages = {"candidates": 0, "fetched": 0, "extracted": 0, "stored": 0, "unchanged": 0, "failed": 0}
+    summary: Dict[str, List[dict]] = {t: [] for t in topics}
+    queue: Dict[str, List[dict]] = {t: [] for t in topics}
+    inflight = {t: 0 for t in topics}
+    tlock = threading.Lock()
+
+    def timed(stage, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with tlock:
+                timings[stage] += time.perf_counter() - t0
+
+    def left() -> float:
+        return deadline - time.monotonic()
+
+    def search(topic):
+        with limiter.slot("search"):
+            return timed("search", _search_candidates, topic)
+
+    def fetch(item):
+        if left() <= 0: return None
+        known = item.get("known") or {}
+        with limiter.slot(_domain(item["url"])):
+            return timed("fetch", _fetch_page, item["url"], max(1.0, min(FETCH_TIMEOUT, left())),
+                         known.get("etag"), known.get("last_modified"))
+
+    def extract(item, html):
+        text = _extract_html(html)
+        if text:
+            item["content_hash"] = _content_hash(text)
+        return text
+
+    net = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="learn-net")
+    cpu = ThreadPoolExecutor(max_workers=max(1, min(4, os.cpu_count() or 1)), thread_name_prefix="learn-cpu")
+    pending: Dict[Any, Tuple[str, str, Optional[dict]]] = {}
+
+    def feed(topic):
+        # keep just enough pages in flight to reach max_per_topic; failures pull in the next candidate
+        while queue[topic] and len(summary[topic]) + inflight[topic] < max_per_topic:
+            item = queue[topic].pop(0)
+            inflight[topic] += 1
+            pending[net.submit(fetch, item)] = ("fetch", topic, item)
+
+    deadline_hit = False
+    try:
+        for t in topics:
+            pending[net.submit(search, t)] = ("search", t, None)
+        while pending:
+            if left() <= 0:
+                deadline_hit = True
+                break
+            done, _ = wait(list(pending), timeout=left(), return_when=FIRST_COMPLETED)
+            for f in done:
+                stage, topic, item = pending.pop(f)
+                try:
+                    res = f.result()
+                except Exception as e:
+                    print("LEARN", stage, "error:", (item or {}).get("url", topic), e)
+                    res = None
+                if stage == "search":
+                    queue[topic] = res or []
+                    pages["candidates"] += len(queue[topic])
+                    known = _known_sources([it["url"] for it in queue[topic]])
+                    for it in queue[topic]:
+                        it["known"] = known.get(it["url"])
+                elif stage == "fetch" and res and res["status"] == 304:
+                    # not modified: nothing to download, extract or embed
+                    _touch_source(item["url"], res)
+                    pages["unchanged"] += 1
+                    inflight[topic] -= 1
+                elif stage == "fetch" and res and res["html"]:
+                    pages["fetched"] += 1
+                    item["page"] = res
+                    pending[cpu.submit(timed, "extract", extract, item, res["html"])] = ("extract", topic, item)
+                    continue
+                elif stage == "extract" and res and item["content_hash"] == (item.get("known") or {}).get("content_hash"):
+                    # same text as last time (server lacked validators): skip embed + insert
+                    _touch_source(item["url"], item.get("page"))
+                    pages["unchanged"] += 1
+                    inflight[topic] -= 1
+                elif stage == "extract" and res:
+                    pages["extracted"] += 1
+                    pending[cpu.submit(timed, "embed", _chunk_embed, res)] = ("embed", topic, item)
+                    continue
+                elif stage == "embed" and res:
+                    try:
+                        summary[topic].append(timed("store", _store_page, topic, item, *res))
+                        pages["stored"] += 1
+                    except Exception as e:
+                        print("LEARN store error:", item["url"], e)
+                        pages["failed"] += 1
+                    inflight[topic] -= 1
+                else:
+                    pages["failed"] += 1          # fetch/extract/embed came back empty
+                    inflight[topic] -= 1
+                feed(topic)
+    finally:
+        net.shutdown(wait=False, cancel_futures=True)
+        cpu.shutdown(wait=False, cancel_futures=True)
+    try:
+        with _pool.transaction() as c:
+            now = int(time.time())
+            for t in topics:
+                _bump_stats(c, t, last_crawl=now)
+    except Exception as e:
+        print("LEARN stats error:", e)
+    try:
+        _index.refresh(train=True)
+    except Exception as e:
+        print("LEARN index refresh error:", e)
+    return {"ok": True, "summary": summary, "pages": pages, "deadline_hit": deadline_hit,
+            "wall_s": round(time.monotonic() - t_start, 3),
+            "timings": {s: round(v, 3) for s, v in timings.items()}, "embed_cache": embed_cache_stats()}
+
+def crawl_topic_once(topic: str, max_new: int = 3) -> List[dict]:
+    """search → fetch → chunk → embed → store"""
+    return crawl_topics([topic], max_per_topic=max_new)["summary"][topic]
+
+# one crawl at a time per process: the hourly job and /api/learn/tick share this
+_crawl_lock = threading.Lock()
+_last_tick: Dict[str, Any] = {}
+
+def _run_tick(max_per_topic: int, workers: int, deadline_s: float) -> dict:
+    res = crawl_topics(list_topics(), max_per_topic=max_per_topic, workers=workers, deadline_s=deadline_s)
+    _last_tick.clear()
+    _last_tick.update(finished=int(time.time()), pages=res["pages"], deadline_hit=res["deadline_hit"],
+                      summary={t: len(v) for t, v in res["summary"].items()})
+    return res
+
+def learn_tick(max_per_topic: int = 2, workers: int = 8, deadline_s: float = 900.0) -> dict:
+    """Run one learning cycle over all topics (concurrently, bounded by `deadline_s`).
+    If a crawl is already running, returns at once with busy=True."""
+    if not _crawl_lock.acquire(blocking=False):
+        return {"ok": False, "busy": True, "summary": {}}
+    try:
+        return _run_tick(max_per_topic, workers, deadline_s)
+    finally:
+        _crawl_lock.release()
+
+def start_learn_tick(max_per_topic: int = 2, workers: int = 8, deadline_s: float = 900.0) -> bool:
+    """learn_tick on a background thread; False (nothing started) if a crawl is already running."""
+    if not _crawl_lock.acquire(blocking=False):
+        return False
+    def run():
+        try:
+            _run_tick(max_per_topic, workers, deadline_s)
+        except Exception as e:
+            print("LEARN tick error:", e)
+        finally:
+            _crawl_lock.release()
+    threading.Thread(target=run, name="learn-tick", daemon=True).start()
+    return True
+
+def tick_status() -> dict:
+    return {"running": _crawl_lock.locked(), **_last_tick}
+
+def kb_stats(per_topic: bool = False) -> dict:
+    """Counts from the materialized topic_stats rows (no scans over sources/chunks)."""
     with _conn() as c:
         n_topics = c.execute("SELECT COUNT(*) FROM topics").fetchone()[0]
-        n_sources = c.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
-        n_chunks = c.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
-    return {"topics": n_topics, "sources": n_sources, "chunks": n_chunks}
+        tot = c.execute("SELECT sources, chunks, bytes, last_crawl FROM topic_stats WHERE topic=''").fetchone()
+        rows = c.execute("SELECT t.topic, s.sources, s.chunks, s.bytes, s.last_crawl FROM topics t "
+                         "LEFT JOIN topic_stats s ON s.topic = t.topic ORDER BY t.added_ts DESC").fetchall() if per_topic else []
+    n_sources, n_chunks, n_bytes, last = tot or (0, 0, 0, None)
+    out = {"topics": n_topics, "sources": n_sources, "chunks": n_chunks, "bytes": n_bytes, "last_crawl": last}
+    if per_topic:
+        out["per_topic"] = {t: {"sources": s or 0, "chunks": ch or 0, "bytes": b or 0, "last_crawl": lc}
+                            for t, s, ch, b, lc in rows}
+    return out
+
+# ---------- hybrid retrieval: BM25 pre-filter + vector rescoring, fused with RRF ----------
+RRF_K = 60
+LEX_CANDIDATES = 200
+_FTS_STOP = set("""a an the and or but if of in on at to for from by with about into as is are was were be been
+do does did can could should would will it its this that these those what which who whom whose when where why
+how i you he she we they me my your our their not no yes""".split())
+
+def _fts_query(question: str) -> str:
+    terms = [t for t in re.findall(r"[a-z0-9]{2,}", (question or "").lower()) if t not in _FTS_STOP]
+    return " OR ".join(f'"{t}"' for t in list(dict.fromkeys(terms))[:32])
+
+def _lexical(question: str, limit: int = LEX_CANDIDATES) -> List[int]:
+    """Chunk ids ranked by BM25 (best first); empty if FTS5 is unavailable or nothing matches."""
+    q = _fts_query(question)
+    if not (HAS_FTS and q):
+        return []
+    try:
+        with _conn() as c:
+            rows = c.execute("SELECT rowid FROM chunks_fts WHERE chunks_fts MATCH ? "
+                             "ORDER BY bm25(chunks_fts) LIMIT ?", (q, limit)).fetchall()
+    except sqlite3.OperationalError as e:
+        print("LEARN fts error:", e)
+        return []
+    return [r[0] for r in rows]
+
+def _hybrid(question: str, qv: SparseVec, k: int, index: ExactIndex) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lexical candidates are rescored by cosine and the two rankings fused with reciprocal rank
+    fusion. Only when BM25 yields fewer than k candidates does the vector index search the corpus.
+    Returns (ids, cosine, rrf) best first."""
+    lex = _lexical(question)
+    extra = index.search(qv, max(k, 20))[0].tolist() if len(lex) < k else []
+    cand = np.array(list(dict.fromkeys(lex + extra)), dtype=np.int64)
+    if not len(cand):
+        return cand, np.zeros(0, np.float32), np.zeros(0, np.float32)
+    sims = _vecs.score(qv, cand)
+    live = np.isfinite(sims)
+    cand, sims = cand[live], sims[live]
+    vec_rank = np.empty(len(cand), dtype=np.int64)
+    vec_rank[np.argsort(-sims, kind="stable")] = np.arange(len(cand))
+    lex_rank = {cid: r for r, cid in enumerate(lex)}
+    rrf = 1.0 / (RRF_K + 1 + vec_rank) + np.array(
+        [1.0 / (RRF_K + 1 + lex_rank[c]) if c in lex_rank else 0.0 for c in cand.tolist()])
+    top = np.argsort(-rrf, kind="stable")[:k]
+    return cand[top], sims[top], rrf[top].astype(np.float32)
 
-def kb_query(question: str, k: int = 5) -> dict:
-    """Return top-k supporting snippets for a question."""
-    qv = _embed([question])[0]
+# ---------- query-result cache (LRU + TTL, invalidated by the corpus version) ----------
+KB_CACHE_SIZE = int(os.getenv("OMINEX_KB_CACHE_SIZE", "512"))
+KB_CACHE_TTL = float(os.getenv("OMINEX_KB_CACHE_TTL", "900"))
+_kb_cache = TTLCache(maxsize=KB_CACHE_SIZE, ttl=KB_CACHE_TTL, name="kb_query")
+
+def corpus_version() -> int:
+    """Counter bumped in the same transaction as every chunk write (shared by all processes)."""
+    with _conn() as c:
+        row = c.execute("SELECT value FROM kb_meta WHERE key='corpus_version'").fetchone()
+    return row[0] if row else 0
+
+def kb_cache_stats() -> dict:
+    return {**_kb_cache.stats(), "corpus_version": corpus_version(), "embed": embed_cache_stats()}
+
+def kb_query(question: str, k: int = 5, mode: Optional[str] = None, retrieval: Optional[str] = None) -> dict:
+    """Return top-k supporting snippets for a question.
+    mode: vector index, "exact" | "ivf" (default KB_INDEX); retrieval: "hybrid" | "vector" (default KB_RETRIEVAL).
+    Repeated questions (after normalize_text) are answered from the cache until new chunks are stored."""
+    mode = mode or _index.name
+    retrieval = retrieval or KB_RETRIEVAL
+    key = (normalize_text(question), k, mode, retrieval, corpus_version())
+    hit = _kb_cache.get(key)
+    if hit is None:
+        hit = _kb_query(question, k, mode, retrieval)
+        _kb_cache.set(key, hit)
+    # callers may annotate the result: hand out copies, keep the cached one pristine
+    return {**hit, "matches": [dict(m) for m in hit["matches"]]}
+
+def _kb_query(question: str, k: int, mode: str, retrieval: str) -> dict:
+    _sync_vecs()
+    index = _indexes.get(mode, _index)
+    index.refresh()
+    qv = _embed_sparse([question])[0]
+    if retrieval == "hybrid" and HAS_FTS:
+        ids, sims, fused = _hybrid(question, qv, k, index)
+    else:
+        ids, sims = index.search(qv, k)
+        fused = None
+    if not len(ids): return {"matches": []}
+    marks = ",".join("?" * len(ids))
     with _conn() as c:
-        rows = c.execute("SELECT chunks.id, chunks.text, chunks.vec, sources.url, sources.title "
-                         "FROM chunks JOIN sources ON chunks.source_id=sources.id").fetchall()
-    if not rows: return {"matches": []}
-    texts, sims = [], []
-    for _cid, text, vec_blob, url, title in rows:
-        v = np.frombuffer(vec_blob, dtype=np.float32)
-        sim = float(np.dot(qv, v) / (np.linalg.norm(qv)*np.linalg.norm(v) + 1e-9))
-        texts.append((sim, text, url, title))
-    texts.sort(key=lambda x: x[0], reverse=True)
-    top = texts[:k]
+        rows = c.execute("SELECT chunks.id, chunks.text, sources.url, sources.title "
+                         "FROM chunks JOIN sources ON chunks.source_id=sources.id "
+                         f"WHERE chunks.id IN ({marks})", [int(i) for i in ids]).fetchall()
+    by_id = {r[0]: r[1:] for r in rows}
+    top = [(float(s),) + by_id[int(i)] for i, s in zip(ids, sims) if int(i) in by_id]
     out = [{"score": round(s,3), "text": t, "url": u, "title": ti} for s,t,u,ti in top]
+    if fused is not None:
+        rrf = {int(i): float(f) for i, f in zip(ids, fused)}
+        for m, i in zip(out, [int(i) for i in ids if int(i) in by_id]):
+            m["rrf"] = round(rrf[i], 4)
     # tiny synth answer (concatenate top snippets)
     answer = " ".join([t for _,t,_,_ in top])[:1200]
     return {"answer": answer, "matches": out}
 
-# ====================== ADD BELOW (do not delete your existing code) ======================
+def kb_recall_at_k(questions: Optional[List[str]] = None, k: int = 5,
+                   nprobe: Optional[int] = None, n_sample: int = 50) -> dict:
+    """Benchmark the approximate index against exact brute force: mean recall@k and per-query latency.
+    Without explicit questions, the first sentence of randomly sampled chunks is used as the query."""
+    _sync_vecs()
+    if not questions:
+        with _conn() as c:
+            rows = c.execute("SELECT text FROM chunks ORDER BY RANDOM() LIMIT ?", (n_sample,)).fetchall()
+        questions = [re.split(r"(?<=[.!?])\s+", r[0])[0][:200] for r in rows]
+    _index.refresh()
+    recalls, t_exact, t_ann = [], 0.0, 0.0
+    for q in questions:
+        qv = _embed_sparse([q])[0]
+        t0 = time.perf_counter(); ref, _ = _vecs.top_k(qv, k)
+        t1 = time.perf_counter(); got, _ = _index.search(qv, k, nprobe=nprobe)
+        t2 = time.perf_counter()
+        t_exact += t1 - t0; t_ann += t2 - t1
+        if len(ref):
+            recalls.append(len(set(ref.tolist()) & set(got.tolist())) / len(ref))
+    n = max(1, len(questions))
+    return {"queries": len(questions), "k": k, "recall": round(float(np.mean(recalls)) if recalls else 1.0, 4),
+            "exact_ms": round(1000 * t_exact / n, 3), "ann_ms": round(1000 * t_ann / n, 3), **_index.stats()}
+
+def bench_kb_writes(n_sources: int = 200, chunks_per_source: int = 8, threads: int = 4) -> dict:
+    """Write-throughput benchmark on a scratch database, `threads` writers in parallel.
+    legacy: a fresh connection per source, rollback journal, one INSERT per chunk.
+    pooled: shared WAL pool, one BEGIN IMMEDIATE transaction + executemany per source."""
+    import tempfile, shutil
+    text = "lorem ipsum dolor sit amet " * 35
+    vec = memoryview(_pack_sparse(_embed_sparse([text])[0]))
+    out = {"sources": n_sources, "chunks_per_source": chunks_per_source, "threads": threads}
+    tmp = tempfile.mkdtemp(prefix="ominex-bench-")
+    try:
+        for mode in ("legacy", "pooled"):
+            path = os.path.join(tmp, f"{mode}.db")
+            with sqlite3.connect(path) as c:
+                _create_schema(c)
+            pool = SQLitePool(path, size=threads)
+
+            def write(i):
+                url = f"https://bench.example/{mode}/{i}"; now = int(time.time())
+                if mode == "legacy":
+                    c = sqlite3.connect(path, timeout=30)
+                    with c:
+                        c.execute("INSERT OR IGNORE INTO sources(url,domain,title,topic,first_seen,last_seen) "
+                                  "VALUES(?,?,?,?,?,?)", (url, "bench.example", "", "bench", now, now))
+                        c.execute("UPDATE sources SET last_seen=? WHERE url=?", (now, url))
+                        sid = c.execute("SELECT id FROM sources WHERE url=?", (url,)).fetchone()[0]
+                        for _ in range(chunks_per_source):
+                            c.execute("INSERT INTO chunks(source_id,text,vec,vfmt) VALUES(?,?,?,1)", (sid, text, vec))
+                    c.close()
+                else:
+                    with pool.transaction() as c:
+                        sid = c.execute("INSERT INTO sources(url,domain,title,topic,first_seen,last_seen) "
+                                        "VALUES(?,?,?,?,?,?)", (url, "bench.example", "", "bench", now, now)).lastrowid
+                        c.executemany("INSERT INTO chunks(source_id,text,vec,vfmt) VALUES(?,?,?,1)",
+                                      [(sid, text, vec)] * chunks_per_source)
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as ex:
+                list(ex.map(write, range(n_sources)))
+            dt = time.perf_counter() - t0
+            pool.close()
+            out[mode] = {"seconds": round(dt, 3), "sources_per_s": round(n_sources / dt, 1),
+                         "chunks_per_s": round(n_sources * chunks_per_source / dt, 1)}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    out["speedup"] = round(out["pooled"]["sources_per_s"] / max(1e-9, out["legacy"]["sources_per_s"]), 2)
+    return out
+
 # --- Simple summarizer (sentence scoring) ---
 import re as _re
 from typing import Optional as _Optional, List as _List, Dict as _Dict, Tuple as _Tuple
@@ -382,27 +1093,6 @@ def _clean(txt: str) -> str:
     txt = re.sub(r"\s+", " ", txt).strip()
     return txt
 
-# ...
-def learn_auto(topic: str, mem: Memory, tags: List[str] | None = None) -> Dict[str, Any]:
-    """
-    Learn about a *topic* safely, verify across multiple sources,
-    and persist high-confidence facts into Memory as knowledge objects.
-    Returns a brief report for UI.
-    """
-    tags = tags or ["auto-learn"]
-    results = search_web_list(topic, max_results=SAFE_MAX_PAGES)   # ✅ list of dicts
-
-    pages = []
-    for r in results:
-        url = r.get("url")
-        if not url:
-            continue
-        try:
-            html_text, title, final_url = fetch_url_readable(url)
-            pages.append({"title": title or final_url, "url": final_url, "text": html_text})
-        except Exception:
-            continue
-
 def _extract_facts(text: str) -> List[str]:
     """
     Extract bullet-like factual statements (simple heuristic).
@@ -437,10 +1127,12 @@ def learn_auto(topic: str, mem: Memory, tags: List[str] | None = None) -> Dict[s
     Returns a brief report for UI.
     """
     tags = tags or ["auto-learn"]
-    results = search_web(topic, limit=SAFE_MAX_PAGES)  # your existing search wrapper
+    results = search_web_list(topic, max_results=SAFE_MAX_PAGES)
 
     pages = []
     for r in results:
+        if not r.get("url"):
+            continue                     # "search unavailable" placeholder rows carry no url
         try:
             html_text, title, url = fetch_url_readable(r["url"])
             pages.append({"title": title or url, "url": url, "text": html_text})
@@ -457,21 +1149,22 @@ def learn_auto(topic: str, mem: Memory, tags: List[str] | None = None) -> Dict[s
     merged = _merge_and_score(fact_sources)
 
     stored = []
-    for fact, conf, sources in merged:
-        item = {
-            "id": _hash(f"{topic}|{fact}"),
-            "topic": topic,
-            "content": fact,
-            "sources": sources[:4],          # keep it light
-            "confidence": conf,
-            "created_at": time.time(),
-            "updated_at": time.time(),
-            "tags": tags,
-            # time-sensitive topics can expire; set TTL if needed e.g., 90 days:
-            # "ttl": 90*86400
-        }
-        mem.upsert_knowledge(item)
-        stored.append(item)
+    with mem.batch():                    # one backend write for the whole run
+        for fact, conf, sources in merged:
+            item = {
+                "id": _hash(f"{topic}|{fact}"),
+                "topic": topic,
+                "content": fact,
+                "sources": sources[:4],          # keep it light
+                "confidence": conf,
+                "created_at": time.time(),
+                "updated_at": time.time(),
+                "tags": tags,
+                # time-sensitive topics can expire; set TTL if needed e.g., 90 days:
+                # "ttl": 90*86400
+            }
+            mem.upsert_knowledge(item)
+            stored.append(item)
 
     return {
         "topic": topic,
@@ -480,5 +1173,3 @@ def learn_auto(topic: str, mem: Memory, tags: List[str] | None = None) -> Dict[s
         "low_confidence_dropped": max(0, len(fact_sources) - len(merged)),
         "sample": stored[:3]
     }
-
-# ====================== END PATCH ======================
\ No newline at end of file
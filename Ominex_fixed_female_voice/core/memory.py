@@ -1,26 +1,411 @@
-import json, os
-from datetime import datetime
-from typing import Any, List, Dict
-import json, os, time, math
-from typing import Any, Dict, List
+# core/memory.py — OMINEX memory engine
+# One store for everything the assistant remembers, split into namespaces:
+#   turns (STM chat turns) · facts (LTM, incl. notes) · knowledge (learned items) · tasks · profile
+# Records live in process and are written through to a pluggable backend (core/memstore.py);
+# facts and knowledge share one inverted index for search.
+import itertools, json, os, re, time, math, heapq, atexit, threading, functools
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 from math import exp
 
+from .memstore import InMemoryBackend, JournalBackend, SQLiteBackend, make_backend, Op
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+os.makedirs(DATA_DIR, exist_ok=True)
+MEM_PATH = os.path.join(DATA_DIR, "memory.json")        # legacy JSON store (imported once)
+STORE_PATH = os.path.join(DATA_DIR, "memstore")         # → memstore.db (sqlite) / memstore.json (journal)
+MEMORY_BACKEND = os.getenv("OMINEX_MEMORY_BACKEND", "sqlite")   # "sqlite" | "journal" | "memory"
+FLUSH_INTERVAL = float(os.getenv("OMINEX_MEMORY_FLUSH_S", "2.0"))   # write-behind period; 0 = write-through
+STM_TURNS = 40               # per session
+DEFAULT_SESSION = "default"
+SESSION_IDLE_S = float(os.getenv("OMINEX_SESSION_IDLE_S", "3600"))   # idle sessions are dropped by sweep()
+KNOWLEDGE_DECAY = 0.01      # confidence decay per day of age (applied when read, never written back)
+FRESHNESS_DECAY = 0.03      # search_knowledge freshness boost decay per day
+NAMESPACES = ("turns", "facts", "knowledge", "tasks", "profile")
+
+
+_WORD = re.compile(r"\w+")
+
+def _words(s: str) -> List[str]:
+    """Lowercase word tokens, punctuation dropped ("python?" and "python." are both "python")."""
+    return _WORD.findall((s or "").lower())
+
+def _tf(s: str) -> Tuple[Dict[str, int], float]:
+    """Bag-of-words term counts + L2 norm (the vector `_cosine` compares)."""
+    d: Dict[str, int] = {}
+    for t in _words(s):
+        d[t] = d.get(t, 0) + 1
+    return d, math.sqrt(sum(v*v for v in d.values())) or 1.0
+
+def _cosine(a: str, b: str) -> float:
+    (va, na), (vb, nb) = _tf(a), _tf(b)
+    dot = sum(v*vb.get(k,0) for k, v in va.items())
+    return dot/(na*nb)
+
+COMMON_POSTING = 1000   # a term in more entries than this (and >5% of the namespace) doesn't widen the candidate set
+
+
+class _TextIndex:
+    """Inverted index ((ns, token) → keys) + cached term vectors ((ns, key) → tf, norm) + each
+    key's insertion sequence number (re-indexing a key keeps it), so candidates can be put in
+    namespace order without walking the namespace."""
+
+    def __init__(self) -> None:
+        self.vecs: Dict[Tuple[str, str], Tuple[Dict[str, int], float]] = {}
+        self.postings: Dict[Tuple[str, str], Set[str]] = {}
+        self.order: Dict[Tuple[str, str], int] = {}
+        self._seq = itertools.count()
+
+    def add(self, ns: str, key: str, text: str) -> None:
+        self._unpost(ns, key)
+        tf = _tf(text)
+        self.vecs[(ns, key)] = tf
+        for t in tf[0]:
+            self.postings.setdefault((ns, t), set()).add(key)
+        self.order.setdefault((ns, key), next(self._seq))
+
+    def remove(self, ns: str, key: str) -> None:
+        self._unpost(ns, key)
+        self.order.pop((ns, key), None)
+
+    def _unpost(self, ns: str, key: str) -> None:
+        tf = self.vecs.pop((ns, key), None)
+        for t in (tf[0] if tf else ()):
+            p = self.postings.get((ns, t))
+            if p is not None:
+                p.discard(key)
+                if not p:
+                    del self.postings[(ns, t)]
+
+    def clear(self, ns: str) -> None:
+        for table in (self.vecs, self.postings, self.order):
+            for k in [k for k in table if k[0] == ns]:
+                del table[k]
+
+    def ordered(self, ns: str, keys: Set[str]) -> List[str]:
+        return sorted(keys, key=lambda key: self.order[(ns, key)])
+
+    def candidates(self, ns: str, qv: Dict[str, int], size: int) -> Set[str]:
+        lists = [self.postings[(ns, t)] for t in qv if (ns, t) in self.postings]
+        common = max(COMMON_POSTING, 0.05 * size)
+        out: Set[str] = set()
+        for p in [p for p in lists if len(p) <= common] or lists:
+            out |= p
+        return out
+
+    def cosine(self, ns: str, key: str, qv: Dict[str, int], qn: float) -> float:
+        tf, n = self.vecs.get((ns, key), ({}, 1.0))
+        return sum(v*tf.get(t,0) for t, v in qv.items()) / (qn*n)
+
+
+def _locked(fn):
+    """Run a Memory method under the instance lock (Flask request threads + scheduler + flusher)."""
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._wlock:
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
+class _Session:
+    __slots__ = ("turns", "last_active")
+
+    def __init__(self) -> None:
+        self.turns: deque = deque(maxlen=STM_TURNS)     # (record key, turn)
+        self.last_active = time.time()
+
 
 class Memory:
-    def __init__(self, path: str = "memory.json"):
-        self.path = path
-        self.db: Dict[str, Any] = {"version": 2, "notes": [], "knowledge": []}
-        if os.path.exists(path):
-            try:
-                self.db = json.load(open(path, "r", encoding="utf-8"))
-            except Exception:
-                pass
-
-    def _save(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.db, f, ensure_ascii=False, indent=2)
-
-    # ---- NEW: knowledge upsert/search/decay ----
+    """Short-term turns, long-term facts with decay, learned knowledge, tasks and profile.
+
+    `backend` defaults to OMINEX_MEMORY_BACKEND at STORE_PATH; pass InMemoryBackend() in tests.
+    Mutations are queued (one pending op per record) and written to the backend in one call:
+    at the end of a `batch()`, by a background flush every `flush_interval` s, or on `flush()` /
+    `close()` / exit. With flush_interval=0 every mutation is written through immediately.
+    One re-entrant lock per instance guards the records, the index and the write queue; backend
+    writes happen under it too, so a flush always sees a consistent set of records.
+    """
+    def __init__(self, backend=None, flush_interval: Optional[float] = None) -> None:
+        self.backend = backend if backend is not None else make_backend(MEMORY_BACKEND, STORE_PATH)
+        self.flush_interval = FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._pending: Dict[Tuple[str, Optional[str]], Op] = {}
+        self._wlock = threading.RLock()
+        self._batch_depth = 0
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.decay_rate = KNOWLEDGE_DECAY
+        self._next: Dict[str, int] = {}
+        data = self.backend.load()
+        self._ns: Dict[str, Dict[str, Any]] = {ns: data.get(ns, {}) for ns in NAMESPACES}
+        self._meta: Dict[str, Any] = data.get("meta", {})
+        self._index = _TextIndex()
+        if not self._meta.get("legacy_import") and backend is None:
+            self._import_legacy(MEM_PATH)
+        self._sessions: Dict[str, _Session] = {}
+        self._load_sessions(self._ns["turns"])
+        self._ns["turns"] = {}                         # turns live in the per-session ring buffers
+        self._next["facts"] = max((int(k) for k in self._ns["facts"]), default=0) + 1
+        self._next["tasks"] = max((int(k) for k in self._ns["tasks"]), default=0) + 1
+        for key, m in self._ns["facts"].items():
+            self._index.add("facts", key, m.get("text", ""))
+        self._expiry: List[Tuple[float, str]] = []     # min-heap of (expires_at, knowledge id)
+        self._expiry_at: Dict[str, float] = {}          # id → the heap entry that is current
+        for key, k in self._ns["knowledge"].items():
+            self._index.add("knowledge", key, _knowledge_text(k))
+            self._schedule_expiry(key, k)
+
+    # ---------- storage (write-behind) ----------
+    def _write(self, ops: List[Op]) -> None:
+        with self._wlock:
+            for op in ops:
+                _, ns, key, _ = op
+                if op[0] == "clear":          # supersedes everything queued for the namespace
+                    for pk in [pk for pk in self._pending if pk[0] == ns]:
+                        del self._pending[pk]
+                self._pending[(ns, key)] = op
+            if self._batch_depth:
+                return
+            if self.flush_interval <= 0:
+                self.flush()
+            elif self._flusher is None:
+                self._start_flusher()
+
+    def flush(self) -> int:
+        """Write every queued op to the backend in one call; returns how many were written."""
+        with self._wlock:
+            ops, self._pending = list(self._pending.values()), {}
+            if ops:
+                try:
+                    self.backend.write(ops)
+                except Exception:
+                    for op in ops:                # keep them for the next attempt (newer ops win)
+                        self._pending.setdefault((op[1], op[2]), op)
+                    raise
+            return len(ops)
+
+    @contextmanager
+    def batch(self) -> Iterator["Memory"]:
+        """Group mutations: nothing is written until the outermost batch exits, then once."""
+        with self._wlock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._wlock:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self.flush()
+
+    def _start_flusher(self) -> None:
+        def loop() -> None:
+            while not self._stop.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    print("MEMORY flush error:", e)
+        self._flusher = threading.Thread(target=loop, name="memory-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _new_key(self, ns: str) -> str:
+        n = self._next[ns]
+        self._next[ns] = n + 1
+        return str(n)
+
+    def _import_legacy(self, path: str) -> None:
+        """One-time import of the old memory.json (any of its three layouts)."""
+        old = _read_legacy(path)
+        ops: List[Op] = []
+        for i, t in enumerate(old.get("stm") or [], 1):
+            ops.append(("put", "turns", str(i), t))
+        facts = list(old.get("ltm") or [])
+        facts += [{"text": n, "importance": 0.5, "source": "note", "at": time.time()} for n in old.get("notes") or []]
+        for i, m in enumerate(facts, 1):
+            ops.append(("put", "facts", str(i), m))
+        for k in old.get("knowledge") or []:
+            if k.get("id"):
+                ops.append(("put", "knowledge", k["id"], k))
+        for t in old.get("tasks") or []:
+            if isinstance(t.get("id"), int):
+                ops.append(("put", "tasks", str(t["id"]), t))
+        for key, value in (old.get("profile") or {}).items():
+            ops.append(("put", "profile", key, value))
+        ops.append(("put", "meta", "legacy_import", int(time.time())))
+        self.backend.write(ops)
+        self._meta["legacy_import"] = True
+        for op, ns, key, value in ops:
+            if ns in self._ns:
+                self._ns[ns][key] = value
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+        self.backend.close()
+
+    # ---------- STM (chat turns, one ring buffer per session) ----------
+    def _load_sessions(self, recs: Dict[str, Any]) -> None:
+        # keys are "<session>:<n>"; turns stored before sessions existed are just "<n>"
+        rows = []
+        for key, t in recs.items():
+            sid, _, n = key.rpartition(":")
+            rows.append((int(n), sid or DEFAULT_SESSION, key, t))
+        for n, sid, key, t in sorted(rows, key=lambda r: r[0]):
+            s = self._session(sid)
+            if len(s.turns) == s.turns.maxlen:
+                self._write([("del", "turns", s.turns[0][0], None)])
+            s.turns.append((key, t))
+            s.last_active = t.get("at", s.last_active)
+        self._next["turns"] = max((r[0] for r in rows), default=0) + 1
+
+    def _session(self, session_id: Optional[str]) -> "_Session":
+        sid = session_id or DEFAULT_SESSION
+        s = self._sessions.get(sid)
+        if s is None:
+            s = self._sessions[sid] = _Session()
+        return s
+
+    def add_turn(self, role: str, text: str, session_id: Optional[str] = None) -> None:
+        with self._wlock:
+            s = self._session(session_id)
+            key = f"{session_id or DEFAULT_SESSION}:{self._new_key('turns')}"
+            t = {"role": role, "text": text, "at": time.time()}
+            ops: List[Op] = [("put", "turns", key, t)]
+            if len(s.turns) == s.turns.maxlen:          # the append below pushes the oldest turn out
+                ops.append(("del", "turns", s.turns[0][0], None))
+            s.turns.append((key, t))
+            s.last_active = t["at"]
+            self._write(ops)
+
+    @_locked
+    def turns(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        s = self._sessions.get(session_id or DEFAULT_SESSION)
+        return [t for _, t in s.turns] if s else []
+
+    @_locked
+    def sessions(self) -> Dict[str, Dict[str, Any]]:
+        return {sid: {"turns": len(s.turns), "last_active": s.last_active} for sid, s in self._sessions.items()}
+
+    def end_session(self, session_id: Optional[str]) -> None:
+        with self._wlock:
+            s = self._sessions.pop(session_id or DEFAULT_SESSION, None)
+            if s:
+                self._write([("del", "turns", key, None) for key, _ in s.turns])
+
+    @_locked
+    def evict_idle(self, max_idle: float = SESSION_IDLE_S, now: Optional[float] = None) -> int:
+        """Drop sessions (and their stored turns) idle for longer than `max_idle` seconds."""
+        now = time.time() if now is None else now
+        idle = [sid for sid, s in list(self._sessions.items()) if now - s.last_active > max_idle]
+        for sid in idle:
+            self.end_session(sid)
+        return len(idle)
+
+    # ---------- LTM (facts) ----------
+    @_locked
+    def remember(self, text: str, importance: float = 0.6, source: str = "user") -> None:
+        key = self._new_key("facts")
+        m = {"text": text, "importance": float(importance), "source": source, "at": time.time()}
+        self._ns["facts"][key] = m
+        self._index.add("facts", key, text)
+        self._write([("put", "facts", key, m)])
+
+    @_locked
+    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        """Top-k facts by importance × age decay × (0.5 + 0.5·cosine). Only facts sharing a query
+        term are scored, unless fewer than k do; then every fact is."""
+        now = time.time()
+        facts = self._ns["facts"]
+        qv, qn = _tf(query or "")
+        scored = []
+        for key in self._candidates("facts", qv, k):
+            m = facts[key]
+            age_days = (now - m.get("at", now)) / 86400.0
+            decay = max(0.2, 1.0 - 0.01 * age_days)    # 1% per day, floor 0.2
+            sim = self._index.cosine("facts", key, qv, qn)
+            score = (m.get("importance",0.5)) * decay * (0.5 + 0.5*sim)
+            scored.append((score, m))
+        return [m for _, m in heapq.nlargest(k, scored, key=lambda x: x[0])]
+
+    def _candidates(self, ns: str, qv: Dict[str, int], k: int) -> List[str]:
+        recs = self._ns[ns]
+        cand = self._index.candidates(ns, qv, len(recs))
+        if len(cand) < k:
+            return list(recs)       # too few exact-token hits: rank everything (substrings, filler)
+        # insertion order, so equal scores rank the way a full scan would
+        return sorted(cand, key=int) if ns == "facts" else self._index.ordered(ns, cand)
+
+    def clear_all(self) -> None:
+        """Forget every conversation and every fact."""
+        with self._wlock:
+            self._sessions.clear()
+            self._ns["facts"].clear()
+            self._index.clear("facts")
+            self._write([("clear", "turns", None, None), ("clear", "facts", None, None)])
+
+    # ---------- notes (facts with source="note") ----------
+    def add_note(self, text: str) -> None:
+        if not text:
+            return
+        self.remember(text, importance=0.5, source="note")
+
+    @_locked
+    def list_notes(self) -> List[str]:
+        return [m["text"] for m in self._ns["facts"].values() if m.get("source") == "note"]
+
+    # ---------- profile ----------
+    @_locked
+    def set_profile(self, key: str, value: Any) -> None:
+        self._ns["profile"][key] = value
+        self._write([("put", "profile", key, value)])
+
+    @_locked
+    def get_profile(self, key: str, default: Any = None) -> Any:
+        return self._ns["profile"].get(key, default)
+
+    # ---------- tasks ----------
+    @_locked
+    def add_task(self, text: str) -> Dict:
+        key = self._new_key("tasks")
+        t = {"id": int(key), "text": text, "done": False}
+        self._ns["tasks"][key] = t
+        self._write([("put", "tasks", key, t)])
+        return t
+
+    @_locked
+    def list_tasks(self, include_done: bool = True) -> List[Dict]:
+        tasks = list(self._ns["tasks"].values())
+        return tasks if include_done else [t for t in tasks if not t.get("done")]
+
+    @_locked
+    def mark_done(self, task_id: int) -> bool:
+        t = self._ns["tasks"].get(str(task_id))
+        if t is None:
+            return False
+        t["done"] = True
+        self._write([("put", "tasks", str(task_id), t)])
+        return True
+
+    @_locked
+    def clear_tasks(self) -> None:
+        self._ns["tasks"].clear()
+        self._write([("clear", "tasks", None, None)])
+
+    @_locked
+    def clear(self) -> None:
+        """Reset notes, profile and tasks."""
+        notes = [key for key, m in self._ns["facts"].items() if m.get("source") == "note"]
+        for key in notes:
+            del self._ns["facts"][key]
+            self._index.remove("facts", key)
+        self._ns["profile"].clear()
+        self._ns["tasks"].clear()
+        self._write([("del", "facts", key, None) for key in notes]
+                    + [("clear", "profile", None, None), ("clear", "tasks", None, None)])
+
+    # ---------- knowledge (learned items) ----------
+    @_locked
     def upsert_knowledge(self, item: Dict[str, Any]) -> None:
         """
         item schema:
@@ -28,7 +413,7 @@ class Memory:
           "id": str,                       # stable hash of content
           "topic": str,
           "content": str,                  # concise summary / fact(s)
-          "sources": [{"url": str, "title": str}], 
+          "sources": [{"url": str, "title": str}],
           "confidence": float,             # 0..1
           "created_at": float,             # time.time()
           "updated_at": float,
@@ -36,14 +421,14 @@ class Memory:
           "ttl": float | None              # seconds, optional
         }
         """
-        existing = next((k for k in self.db["knowledge"] if k["id"] == item["id"]), None)
+        existing = self._ns["knowledge"].get(item["id"])
         if existing:
             # merge: keep best confidence, union sources, update timestamp
             existing["confidence"] = max(existing.get("confidence", 0), item.get("confidence", 0))
             seen = {s["url"] for s in existing.get("sources", [])}
             for s in item.get("sources", []):
                 if s["url"] not in seen:
-                    existing["sources"].append(s)
+                    existing.setdefault("sources", []).append(s)
                     seen.add(s["url"])
             existing["content"] = item.get("content", existing["content"])
             existing["topic"] = item.get("topic", existing["topic"])
@@ -52,213 +437,153 @@ class Memory:
             if item.get("ttl") is not None:
                 existing["ttl"] = item["ttl"]
         else:
-            self.db["knowledge"].append(item)
-        self._save()
+            existing = self._ns["knowledge"][item["id"]] = item
+        self._index.add("knowledge", item["id"], _knowledge_text(existing))
+        self._schedule_expiry(item["id"], existing)
+        self._write([("put", "knowledge", item["id"], existing)])
 
+    def knowledge_confidence(self, k: Dict[str, Any], now: Optional[float] = None) -> float:
+        """Stored confidence decayed by age since the last update (lazily, at read time)."""
+        now = time.time() if now is None else now
+        return k.get("confidence", 0.5) * _day_factor(self.decay_rate, _age_days(k, now))
+
+    @_locked
     def search_knowledge(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
-        q = query.lower()
+        words = _words(query)
+        qv, _ = _tf(query)
+        now = time.time()
         scored = []
-        for k in self.db["knowledge"]:
-            text = (k.get("topic","") + " " + k.get("content","")).lower()
-            score = sum(1 for token in q.split() if token in text) + k.get("confidence",0)
-            # freshness boost (you can tweak decay_rate)
-            age_days = max(0.0, (time.time() - k.get("updated_at", k.get("created_at", time.time()))) / 86400.0)
-            freshness = exp(-0.03 * age_days)  # slower decay
+        for key in self._candidates("knowledge", qv, limit):
+            k = self._ns["knowledge"][key]
+            if _expires_at(k) <= now:
+                continue                           # due, the sweeper just hasn't run yet
+            text = _knowledge_text(k)
+            score = sum(1 for token in words if token in text) + self.knowledge_confidence(k, now)
+            # freshness boost, bucketed per day of age
+            freshness = _day_factor(FRESHNESS_DECAY, _age_days(k, now))
             scored.append((score + 0.5*freshness, k))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [k for _, k in scored[:limit]]
-
-    def decay(self, decay_rate_per_day: float = 0.01) -> None:
-        now = time.time()
-        changed = False
-        kept = []
-        for k in self.db["knowledge"]:
-            age_days = (now - k.get("updated_at", k.get("created_at", now))) / 86400.0
-            k["confidence"] = max(0.0, k.get("confidence", 0.5) * exp(-decay_rate_per_day * age_days))
-            if k.get("ttl") and now - k["created_at"] > k["ttl"]:
-                changed = True
-                continue  # drop expired
-            kept.append(k)
-        if changed:
-            self.db["knowledge"] = kept
-            self._save()
-
-     
-class Memory:
-    def __init__(self, path: str = "data/memory.json") -> None:
-        self.path = path
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        self._data = {
-            "notes": [],
-            "profile": {},
-            "tasks": [],   # ⬅️ add
-            "created": datetime.utcnow().isoformat(timespec="seconds"),
-        }
-        self._load()
-
-    # ... keep _load() and save() as you have them ...
-
-    # ---------- notes ----------
-    def add_note(self, text: str) -> None:
-        if not text: 
-            return
-        self._data.setdefault("notes", []).append(text)
-        self.save()
-
-    def list_notes(self) -> List[str]:
-        return list(self._data.get("notes") or [])
-
-    # ---------- profile ----------
-    def set_profile(self, key: str, value: Any) -> None:
-        self._data.setdefault("profile", {})[key] = value
-        self.save()
-
-    def get_profile(self, key: str, default: Any = None) -> Any:
-        return (self._data.get("profile") or {}).get(key, default)
-
-    # ---------- tasks ----------
-    def add_task(self, text: str) -> Dict:
-        t = {"id": self._next_task_id(), "text": text, "done": False}
-        self._data.setdefault("tasks", []).append(t)
-        self.save()
-        return t
-
-    def list_tasks(self, include_done: bool = True) -> List[Dict]:
-        tasks = list(self._data.get("tasks") or [])
-        return tasks if include_done else [t for t in tasks if not t.get("done")]
-
-    def mark_done(self, task_id: int) -> bool:
-        for t in self._data.get("tasks", []):
-            if t.get("id") == task_id:
-                t["done"] = True
-                self.save()
-                return True
-        return False
-
-    def clear_tasks(self) -> None:
-        self._data["tasks"] = []
-        self.save()
-
-    def _next_task_id(self) -> int:
-        tasks = self._data.get("tasks") or []
-        return (max([t.get("id", 0) for t in tasks]) + 1) if tasks else 1
-
-    # ---------- reset ----------
-    def clear(self) -> None:
-        self._data["notes"] = []
-        self._data["profile"] = {}
-        self._data["tasks"] = []
-        self.save()   
-
-    # ---------- persistence ----------
-    def _load(self) -> None:
-        if os.path.exists(self.path):
-            try:
-                with open(self.path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        self._data.update(data)
-            except Exception:
-                # Corrupt file? start fresh but keep the old around
-                backup = self.path + ".bak"
-                try:
-                    os.replace(self.path, backup)
-                except Exception:
-                    pass
-                self._data["notes"] = []
-                self._data["profile"] = {}
-
-    def save(self) -> None:
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, ensure_ascii=False, indent=2)
-
-    # ---------- operations ----------
-    def add_note(self, text: str) -> None:
-        if not text: 
-            return
-        self._data.setdefault("notes", []).append(text)
-        self.save()
-
-    def list_notes(self) -> List[str]:
-        return list(self._data.get("notes") or [])
-
-    def set_profile(self, key: str, value: Any) -> None:
-        self._data.setdefault("profile", {})[key] = value
-        self.save()
-
-    def get_profile(self, key: str, default: Any = None) -> Any:
-        return (self._data.get("profile") or {}).get(key, default)
-
-    def clear(self) -> None:
-        self._data["notes"] = []
-        self._data["profile"] = {}
-        self.save()
-
-    # convenient properties
-    @property
-    def data(self) -> dict:
-        return self._data
-
-DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
-os.makedirs(DATA_DIR, exist_ok=True)
-MEM_PATH = os.path.join(DATA_DIR, "memory.json")
-
-def _load() -> Dict[str, Any]:
-    if not os.path.exists(MEM_PATH):
-        return {"ltm": [], "stm": []}
-    with open(MEM_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def _save(obj: Dict[str, Any]) -> None:
-    with open(MEM_PATH, "w", encoding="utf-8") as f:
-        json.dump(obj, f, ensure_ascii=False, indent=2)
-
-def _cosine(a: str, b: str) -> float:
-    def vec(s: str):
-        d: Dict[str, int] = {}
-        for t in s.lower().split():
-            if not t: continue
-            d[t] = d.get(t, 0) + 1
-        return d
-    va, vb = vec(a), vec(b)
-    keys = set(va) | set(vb)
-    dot = sum(va.get(k,0)*vb.get(k,0) for k in keys)
-    na = math.sqrt(sum(v*v for v in va.values())) or 1.0
-    nb = math.sqrt(sum(v*v for v in vb.values())) or 1.0
-    return dot/(na*nb)
-
-class Memory:
-    """Short-term (session turns) + long-term memories with decay."""
-    def __init__(self) -> None:
-        self._cache = _load()
-
-    # ----- STM (chat turns) -----
-    def add_turn(self, role: str, text: str) -> None:
-        self._cache.setdefault("stm", []).append({"role": role, "text": text, "at": time.time()})
-        # keep last ~40 turns
-        self._cache["stm"] = self._cache["stm"][-40:]
-        _save(self._cache)
-
-    # ----- LTM (facts) -----
-    def remember(self, text: str, importance: float = 0.6, source: str = "user") -> None:
-        self._cache.setdefault("ltm", []).append({
-            "text": text, "importance": float(importance), "source": source, "at": time.time()
-        })
-        _save(self._cache)
-
-    def search(self, query: str, k: int = 3):
+        return [k for _, k in heapq.nlargest(limit, scored, key=lambda x: x[0])]
+
+    # ---------- TTL expiry ----------
+    def _schedule_expiry(self, key: str, k: Dict[str, Any]) -> None:
+        at = _expires_at(k)
+        if at != math.inf and self._expiry_at.get(key) != at:
+            with self._wlock:
+                self._expiry_at[key] = at
+                heapq.heappush(self._expiry, (at, key))
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop knowledge whose TTL has run out. Only due heap entries are touched; entries made
+        stale by a later upsert (new TTL or created_at) are discarded as they surface."""
+        now = time.time() if now is None else now
+        ops: List[Op] = []
+        with self._wlock:
+            while self._expiry and self._expiry[0][0] <= now:
+                at, key = heapq.heappop(self._expiry)
+                if self._expiry_at.get(key) != at:
+                    continue
+                del self._expiry_at[key]
+                if self._ns["knowledge"].pop(key, None) is None:
+                    continue
+                self._index.remove("knowledge", key)
+                ops.append(("del", "knowledge", key, None))
+            if ops:
+                self._write(ops)
+        return len(ops)
+
+    def sweep(self) -> int:
+        """Scheduler job: expire due knowledge, drop idle sessions and flush queued writes."""
+        n = self.expire()
+        self.evict_idle()
+        self.flush()
+        return n
+
+    @_locked
+    def decay(self, decay_rate_per_day: float = KNOWLEDGE_DECAY) -> None:
+        """Set the read-time decay rate and drop expired items (confidence is not rewritten)."""
+        self.decay_rate = decay_rate_per_day
+        self.expire()
+
+
+def _knowledge_text(k: Dict[str, Any]) -> str:
+    return (k.get("topic","") + " " + k.get("content","")).lower()
+
+def _expires_at(k: Dict[str, Any]) -> float:
+    return k.get("created_at", 0.0) + k["ttl"] if k.get("ttl") else math.inf
+
+def _age_days(k: Dict[str, Any], now: float) -> int:
+    return max(0, int((now - k.get("updated_at", k.get("created_at", now))) // 86400))
+
+@lru_cache(maxsize=4096)
+def _day_factor(rate: float, days: int) -> float:
+    return exp(-rate * days)
+
+def _read_legacy(path: str = MEM_PATH) -> Dict[str, Any]:
+    """The pre-engine store: the whole memory.json."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(old, dict):
+        return {}
+    old["stm"] = (old.get("stm") or [])[-STM_TURNS:]
+    return old
+
+
+# ---------- benchmarks ----------
+def bench_turns(ltm_sizes: Tuple[int, ...] = (10000, 100000), turns: int = 2000, legacy_turns: int = 20) -> dict:
+    """add_turn throughput per backend (scratch directory) with `ltm_sizes` facts already stored.
+    legacy: the old full `json.dump(indent=2)` rewrite of memory.json per turn."""
+    import tempfile, shutil
+    out = {}
+    for n in ltm_sizes:
+        tmp = tempfile.mkdtemp(prefix="ominex_mem_")
+        try:
+            now = time.time()
+            facts = [("put", "facts", str(i), {"text": f"fact {i} about topic {i % 97}", "importance": 0.6,
+                                               "source": "bench", "at": now}) for i in range(1, n + 1)]
+            res = {}
+            for name, backend in (("sqlite", SQLiteBackend(os.path.join(tmp, "m.db"))),
+                                  ("journal", JournalBackend(os.path.join(tmp, "m.json")))):
+                backend.write(facts)
+                t0 = time.perf_counter()
+                m = Memory(backend, flush_interval=0)     # write-through: one backend write per turn
+                res[f"{name}_load_s"] = round(time.perf_counter() - t0, 3)
+                t0 = time.perf_counter()
+                for i in range(turns):
+                    m.add_turn("user", f"turn {i}")
+                res[f"{name}_turns_per_s"] = round(turns / (time.perf_counter() - t0), 1)
+                m.close()
+            legacy = {"ltm": [v for _, _, _, v in facts], "stm": []}
+            path = os.path.join(tmp, "memory.json")
+            t0 = time.perf_counter()
+            for i in range(legacy_turns):
+                legacy["stm"].append({"role": "user", "text": f"turn {i}", "at": time.time()})
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(legacy, f, ensure_ascii=False, indent=2)
+            res["legacy_turns_per_s"] = round(legacy_turns / (time.perf_counter() - t0), 1)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        out[str(n)] = res
+    return out
+
+def bench_search(ltm_sizes: Tuple[int, ...] = (1000, 10000, 100000), queries: int = 200) -> dict:
+    """Memory.search latency as LTM grows (in-memory backend, synthetic facts over a 5k-word vocabulary)."""
+    import random
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(5000)]
+    qs = [" ".join(rng.sample(vocab, 4)) for _ in range(queries)]
+    out = {}
+    for n in ltm_sizes:
+        backend = InMemoryBackend()
         now = time.time()
-        items = self._cache.get("ltm", [])
-        scored = []
-        for m in items:
-            age_days = (now - m.get("at", now)) / 86400.0
-            decay = max(0.2, 1.0 - 0.01 * age_days)    # 1% per day, floor 0.2
-            sim = _cosine(query or "", m.get("text",""))
-            score = (m.get("importance",0.5)) * decay * (0.5 + 0.5*sim)
-            scored.append((score, m))
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [m for _, m in scored[:k]]
-
-    def clear_all(self) -> None:
-        self._cache = {"ltm": [], "stm": []}
-        _save(self._cache)
+        backend.write([("put", "facts", str(i), {"text": "the user " + " ".join(rng.sample(vocab, 8)),
+                                                 "importance": 0.6, "source": "bench", "at": now})
+                       for i in range(1, n + 1)])
+        m = Memory(backend, flush_interval=0)
+        t0 = time.perf_counter()
+        for q in qs:
+            m.search(q, k=5)
+        out[str(n)] = {"search_ms": round(1000 * (time.perf_counter() - t0) / queries, 3)}
+    return out
@@ -0,0 +1,165 @@
+# core/memstore.py — storage backends for the Memory engine
+# Every backend stores namespaced records (ns → key → JSON value) and applies a
+# list of ops atomically: ("put", ns, key, value) | ("del", ns, key, None) | ("clear", ns, None, None).
+import os, json, threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import SQLitePool
+
+Op = Tuple[str, str, Optional[str], Any]
+Records = Dict[str, Dict[str, Any]]
+
+
+def apply_ops(data: Records, ops: List[Op]) -> None:
+    for op, ns, key, value in ops:
+        if op == "put":
+            data.setdefault(ns, {})[key] = value
+        elif op == "del":
+            data.get(ns, {}).pop(key, None)
+        elif op == "clear":
+            data.pop(ns, None)
+
+
+class InMemoryBackend:
+    """Nothing persisted (tests, benchmarks)."""
+    name = "memory"
+
+    def __init__(self) -> None:
+        self._data: Records = {}
+
+    def load(self) -> Records:
+        return {ns: dict(recs) for ns, recs in self._data.items()}
+
+    def write(self, ops: List[Op]) -> None:
+        apply_ops(self._data, ops)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    """One row per record in a WAL database; a write is one transaction (default backend)."""
+    name = "sqlite"
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._pool = SQLitePool(path, size=2)
+        with self._pool.connection() as c:
+            c.execute("""CREATE TABLE IF NOT EXISTS memory(
+                ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY(ns, key))""")
+
+    def load(self) -> Records:
+        data: Records = {}
+        with self._pool.connection() as c:
+            for ns, key, value in c.execute("SELECT ns, key, value FROM memory ORDER BY rowid"):
+                data.setdefault(ns, {})[key] = json.loads(value)
+        return data
+
+    def write(self, ops: List[Op]) -> None:
+        if not ops:
+            return
+        with self._pool.transaction() as c:
+            for op, ns, key, value in ops:
+                if op == "put":
+                    c.execute("INSERT INTO memory(ns, key, value) VALUES(?,?,?) "
+                              "ON CONFLICT(ns, key) DO UPDATE SET value=excluded.value",
+                              (ns, key, json.dumps(value, ensure_ascii=False)))
+                elif op == "del":
+                    c.execute("DELETE FROM memory WHERE ns=? AND key=?", (ns, key))
+                elif op == "clear":
+                    c.execute("DELETE FROM memory WHERE ns=?", (ns,))
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+class JournalBackend:
+    """Snapshot (<path>) + append-only journal (<path minus .json>.jsonl): a write appends one
+    numbered line; once the journal outgrows the snapshot (min `compact_bytes`) the two are
+    folded into a new snapshot, written to a temp file, fsynced and renamed into place."""
+    name = "journal"
+
+    def __init__(self, path: str, compact_bytes: int = 1 << 20) -> None:
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + ".jsonl"
+        self.compact_bytes = compact_bytes
+        self._lock = threading.Lock()
+        self._data: Records = {}
+        self._seq = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            self._data, self._seq = snap.get("data", {}), int(snap.get("seq", 0))
+        self._snapshot_bytes = os.path.getsize(path) if os.path.exists(path) else 0
+        self._journal_bytes = self._replay()
+        self._log = open(self.journal_path, "a", encoding="utf-8")
+
+    def _replay(self) -> int:
+        """Apply journal lines newer than the snapshot; a torn last line (crash mid-append) is cut off."""
+        if not os.path.exists(self.journal_path):
+            return 0
+        good = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("torn record")
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                if rec.get("seq", 0) > self._seq:
+                    apply_ops(self._data, [tuple(op) for op in rec["ops"]])
+                    self._seq = rec["seq"]
+                good += len(line)
+        if good < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+        return good
+
+    def load(self) -> Records:
+        with self._lock:
+            return {ns: dict(recs) for ns, recs in self._data.items()}
+
+    def write(self, ops: List[Op]) -> None:
+        if not ops:
+            return
+        with self._lock:
+            self._seq += 1
+            apply_ops(self._data, ops)
+            line = json.dumps({"seq": self._seq, "ops": ops}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            self._log.write(line)
+            self._log.flush()
+            self._journal_bytes += len(line.encode("utf-8"))
+            if self._journal_bytes > max(self.compact_bytes, self._snapshot_bytes):
+                self._compact()
+
+    def _compact(self) -> None:
+        # a crash between the snapshot and the journal reset is harmless: replay skips seq <= snapshot seq
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self._seq, "data": self._data}, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._snapshot_bytes = os.path.getsize(self.path)
+        self._log.close()
+        self._log = open(self.journal_path, "w", encoding="utf-8")
+        self._journal_bytes = 0
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact()
+
+    def close(self) -> None:
+        with self._lock:
+            self._log.close()
+
+
+def make_backend(kind: str, path: str):
+    """kind: "sqlite" (default, `path`.db) | "journal" (`path`.json + .jsonl) | "memory"."""
+    kind = (kind or "sqlite").lower()
+    if kind == "memory":
+        return InMemoryBackend()
+    if kind == "journal":
+        return JournalBackend(path + ".json")
+    return SQLiteBackend(path + ".db")
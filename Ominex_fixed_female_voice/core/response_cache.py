@@ -0,0 +1,182 @@
+# core/response_cache.py — semantic cache for LLM replies
+# Lookup: exact match on (intent, squashed text) first — case and spacing only, punctuation kept —
+# then the closest cached question of the same intent by cosine over the learner's hashing
+# embedding, if above RESPONSE_CACHE_SIM and made of exactly the same tokens (words and symbols),
+# so a reworded repeat can hit but "2+2" never answers "2-2" and "France" never answers "Spain".
+# Entries expire after RESPONSE_CACHE_TTL and the least recently used go beyond RESPONSE_CACHE_SIZE.
+import os, re, threading, time
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .cache import TTLCache, normalize_text
+from .singleflight import squash
+
+try:
+    from .learner import _vectorize          # same zero-fit HashingVectorizer the KB uses
+except Exception:
+    _vectorize = None                        # learner unavailable → exact matches only
+
+RESPONSE_CACHE_SIZE = int(os.getenv("OMINEX_RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("OMINEX_RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SIM = float(os.getenv("OMINEX_RESPONSE_CACHE_SIM", "0.92"))   # cosine, on top of the same-tokens check
+# intents whose answers must never be reused (comma-separated; "chat" here turns the cache off)
+RESPONSE_CACHE_OFF = {i.strip() for i in os.getenv("OMINEX_RESPONSE_CACHE_OFF", "time,news,search,recall").split(",") if i.strip()}
+# time-sensitive wording makes any question uncacheable
+_VOLATILE = re.compile(r"\b(today|tonight|now|right now|currently|current|latest|recent|yesterday|tomorrow|"
+                       r"this (?:week|month|year)|price|weather|score)\b", re.I)
+# words and meaningful symbols ("+", "#", "-" …); sentence punctuation doesn't change the question
+_TOKEN = re.compile(r"\w+|[^\w\s?!.,;:'\"]")
+
+Key = Tuple[str, str]     # (intent, squashed text)
+
+
+def _tokens(text: str) -> FrozenSet[str]:
+    return frozenset(_TOKEN.findall((text or "").lower()))
+
+
+class ResponseCache:
+    """`get(text, intent)` → cached reply or None; `put(text, reply, intent)` after a real LLM answer."""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: Optional[float] = RESPONSE_CACHE_TTL,
+                 threshold: float = RESPONSE_CACHE_SIM, off: Optional[Set[str]] = None,
+                 vectorize: Optional[Callable] = _vectorize) -> None:
+        self.threshold, self.off, self._vectorize = threshold, set(RESPONSE_CACHE_OFF if off is None else off), vectorize
+        self._store = TTLCache(maxsize=maxsize, ttl=ttl, name="response")
+        self._vecs: Dict[Key, Dict[int, float]] = {}          # semantic index over the stored keys
+        self._toks: Dict[Key, FrozenSet[str]] = {}
+        self._postings: Dict[Tuple[str, int], Set[Key]] = {}  # (intent, feature) → keys
+        self._lock = threading.Lock()
+        self.exact_hits = self.semantic_hits = self.misses = self.skipped = 0
+
+    def cacheable(self, text: str, intent: str = "chat") -> bool:
+        return intent not in self.off and not _VOLATILE.search(text or "")
+
+    def get(self, text: str, intent: str = "chat") -> Optional[str]:
+        if not self.cacheable(text, intent):
+            with self._lock:
+                self.skipped += 1
+            return None
+        key = (intent, squash(text))
+        reply = self._store.get(key)
+        if reply is not None:
+            with self._lock:
+                self.exact_hits += 1
+            return reply
+        near = self._nearest(key, text)
+        reply = self._store.get(near) if near else None
+        with self._lock:
+            if reply is not None:
+                self.semantic_hits += 1
+            else:
+                self.misses += 1
+        return reply
+
+    def put(self, text: str, reply: str, intent: str = "chat") -> None:
+        if not reply or not self.cacheable(text, intent):
+            return
+        key = (intent, squash(text))
+        self._store.set(key, reply)
+        vec = self._embed(text)
+        if vec is None:
+            return
+        with self._lock:
+            self._unindex(key)
+            self._vecs[key] = vec
+            self._toks[key] = _tokens(text)
+            for f in vec:
+                self._postings.setdefault((intent, f), set()).add(key)
+            if len(self._vecs) > 2 * self._store.maxsize:      # drop index entries the store let go
+                for k in [k for k in self._vecs if k not in self._store]:
+                    self._unindex(k)
+
+    def clear(self) -> None:
+        self._store.clear()
+        with self._lock:
+            self._vecs.clear()
+            self._toks.clear()
+            self._postings.clear()
+
+    # ---------- semantic side ----------
+    def _embed(self, text: str) -> Optional[Dict[int, float]]:
+        norm = normalize_text(text)
+        if self._vectorize is None or not norm:
+            return None
+        idx, val = self._vectorize([norm])[0]
+        return dict(zip(idx.tolist(), val.tolist())) or None
+
+    def _nearest(self, key: Key, text: str) -> Optional[Key]:
+        """Best cached question of the same intent with the same tokens and cosine ≥ threshold
+        (vectors are L2-normalized). Cosine alone can't tell one swapped key word in a long question."""
+        qv = self._embed(text)
+        if not qv:
+            return None
+        toks = _tokens(text)
+        best, best_key = self.threshold, None
+        with self._lock:
+            lists = [(w, self._postings.get((key[0], f), set())) for f, w in qv.items()]
+            common = max(32, len(self._vecs) // 20)
+            # a question sharing only common terms scores at most ‖q restricted to them‖ (Cauchy-Schwarz);
+            # below the threshold those terms can't produce a hit on their own, so skip their postings
+            if sum(w * w for w, p in lists if len(p) > common) ** 0.5 < self.threshold:
+                lists = [(w, p) for w, p in lists if len(p) <= common]
+            cands: Set[Key] = set()
+            for _, p in lists:
+                cands |= p
+            for k in cands:
+                if self._toks[k] != toks:
+                    continue
+                v = self._vecs[k]
+                s = sum(w * v.get(f, 0.0) for f, w in qv.items())
+                if s >= best:
+                    best, best_key = s, k
+            if best_key is not None and best_key not in self._store:     # expired / evicted
+                self._unindex(best_key)
+                return None
+        return best_key
+
+    def _unindex(self, key: Key) -> None:
+        self._toks.pop(key, None)
+        for f in self._vecs.pop(key, {}):
+            p = self._postings.get((key[0], f))
+            if p is not None:
+                p.discard(key)
+                if not p:
+                    del self._postings[(key[0], f)]
+
+    def stats(self) -> dict:
+        s = self._store.stats()
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            total = hits + self.misses
+            return {"size": s["size"], "maxsize": s["maxsize"], "ttl": s["ttl"], "threshold": self.threshold,
+                    "exact_hits": self.exact_hits, "semantic_hits": self.semantic_hits, "misses": self.misses,
+                    "skipped": self.skipped, "evictions": s["evictions"], "expirations": s["expirations"],
+                    "hit_rate": round(hits / total, 4) if total else 0.0, "semantic": self._vectorize is not None}
+
+
+def bench_response_cache(entries: int = 1000, queries: int = 500, llm_ms: float = 800.0) -> dict:
+    """Lookup latency with `entries` cached questions, and the p50 a repeat-heavy mix would see:
+    three quarters of the traffic repeats earlier questions (verbatim, re-cased, reworded — the
+    rewording changes the tokens, so it misses by design), the rest is new and pays `llm_ms`."""
+    import random
+    rng = random.Random(7)
+    vocab = [f"w{i}" for i in range(3000)]
+    qs = ["what is " + " ".join(rng.sample(vocab, 6)) for _ in range(entries)]
+    rc = ResponseCache(maxsize=entries, ttl=None)
+    for q in qs:
+        rc.put(q, "answer to " + q)
+    mix: List[str] = []
+    for i in range(queries):
+        q = rng.choice(qs)
+        mix.append([q, q.upper() + "?", q.replace("what is", "what's"), "what is " + " ".join(rng.sample(vocab, 6))][i % 4])
+    lat: List[float] = []
+    for q in mix:
+        t0 = time.perf_counter()
+        hit = rc.get(q)
+        ms = 1000 * (time.perf_counter() - t0)
+        lat.append(ms + (0.0 if hit is not None else llm_ms))
+    lookups = sorted(l if l < llm_ms else l - llm_ms for l in lat)
+    lat.sort()
+    return {"entries": entries, "lookup_ms_p50": round(lookups[len(lookups) // 2], 3),
+            "lookup_ms_p99": round(lookups[int(len(lookups) * 0.99)], 3),
+            "p50_ms_with_cache": round(lat[len(lat) // 2], 3), "p50_ms_without_cache": llm_ms,
+            **{k: v for k, v in rc.stats().items() if k in ("exact_hits", "semantic_hits", "misses", "hit_rate")}}
@@ -2,6 +2,8 @@
 from dataclasses import dataclass
 from typing import Literal
 
+from .intents import DEMO_BLOCKED_WORDS, ROUTER, ROUTER_DEMO
+
 Mode = Literal["full", "demo"]
 
 @dataclass
@@ -11,43 +13,41 @@ class RouteDecision:
     blocked: bool = False
     reason: str = ""
 
-DEMO_BLOCKED_WORDS = ("trade", "buy", "sell", "delete", "system", "file", "learn", "alert", "backtest")
-
 def decide(user_msg: str, mode: Mode = "full") -> RouteDecision:
     msg = (user_msg or "").strip()
-    lower = msg.lower()
 
     # demo restrictions
-    if mode == "demo" and any(w in lower for w in DEMO_BLOCKED_WORDS):
+    if mode == "demo" and ROUTER_DEMO.first(msg):
         return RouteDecision(intent="brain", payload=msg, blocked=True, reason="Disabled in demo mode.")
 
-    # intents
-    if lower.startswith(("trade ", "plan ", "signal ")):
+    # intents (one pass over the ROUTER table in core/intents.py)
+    route = ROUTER.first(msg)
+    if route == "trade":
         return RouteDecision("trade", msg)
 
-    if any(k in lower for k in (" latest ", "latest", "news", "headline", "breaking")):
+    if route == "news":
         q = (msg.replace("latest", "").replace("news", "").replace("headline", "").replace("breaking", "").strip()) or msg
         return RouteDecision("news", q)
 
-    if lower.startswith(("wiki ", "wikipedia ", "who is ", "what is ", "define ")):
+    if route == "wiki":
         q = (msg.replace("wiki ", "", 1).replace("wikipedia ", "", 1)
                .replace("who is ", "", 1).replace("what is ", "", 1)
                .replace("define ", "", 1).strip()) or msg
         return RouteDecision("wiki", q)
 
-    if lower.startswith(("search ", "look up ")) or "google " in lower:
+    if route == "search":
         q = (msg.replace("search", "", 1).replace("look up", "", 1).replace("google", "", 1).strip()) or msg
         return RouteDecision("search", q)
 
-    if lower.startswith("weather "):
+    if route == "weather":
         place = msg.split(" ", 1)[1] if " " in msg else "Cape Town"
         return RouteDecision("weather", place)
 
-    if lower.startswith(("crypto ", "price ")):
+    if route == "crypto":
         coin = msg.split(" ", 1)[1] if " " in msg else "bitcoin"
         return RouteDecision("crypto", coin)
 
-    if lower.startswith(("summarize ", "read ", "open ")):
+    if route == "summarize":
         u = msg.split(" ", 1)[1] if " " in msg else ""
         return RouteDecision("summarize", u)
 
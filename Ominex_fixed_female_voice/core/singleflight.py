@@ -0,0 +1,70 @@
+# core/singleflight.py — coalesce identical in-flight calls
+# While a call for some key is running, other callers with the same key don't start their own:
+# they wait for the one in flight and share its result (or its exception).
+import copy, functools, threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List
+
+_FLIGHTS: List["SingleFlight"] = []
+
+
+def squash(text: str) -> str:
+    """Key form of a query: lowercase, whitespace collapsed (punctuation kept — "c++" ≠ "c")."""
+    return " ".join((text or "").lower().split())
+
+
+class SingleFlight:
+    """`do(key, fn, *args)` runs fn once per key at a time; concurrent callers get a deep copy
+    of the leader's result, so nobody can mutate what another caller sees."""
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = self.shared = 0
+        _FLIGHTS.append(self)
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return copy.deepcopy(fut.result())      # re-raises the leader's exception
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "in_flight": len(self._calls),
+                    "leaders": self.leaders, "shared": self.shared}
+
+
+def single_flight(key: Callable[..., Hashable]):
+    """Decorator: coalesce concurrent calls whose `key(*args, **kwargs)` is equal."""
+    def deco(fn):
+        flight = SingleFlight(fn.__name__)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return flight.do(key(*args, **kwargs), fn, *args, **kwargs)
+        wrapper.flight = flight
+        return wrapper
+    return deco
+
+
+def singleflight_stats() -> List[dict]:
+    return [f.stats() for f in _FLIGHTS]
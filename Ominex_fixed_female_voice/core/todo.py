@@ -1,43 +1,54 @@
 # core/todo.py
-import json, os, time
+import json, os, time, threading
 from typing import List, Dict, Any
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 TASKS_PATH = os.path.join(DATA_DIR, "tasks.json")
 
-def _load() -> Dict[str, Any]:
-    if not os.path.exists(TASKS_PATH):
+def _load(path: str = TASKS_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
         return {"tasks": []}
-    with open(TASKS_PATH, "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def _save(obj: Dict[str, Any]) -> None:
-    with open(TASKS_PATH, "w", encoding="utf-8") as f:
+def _save(obj: Dict[str, Any], path: str = TASKS_PATH) -> None:
+    # temp file + rename: a reader (or a crash) never sees a half-written tasks.json
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
 
 class TodoStore:
-    def __init__(self) -> None:
-        self._cache = _load()
+    """Task list shared by every request thread; each change is made and saved under one lock."""
+    def __init__(self, path: str = TASKS_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._cache = _load(path)
+        self._cache.setdefault("tasks", [])
 
     def add(self, text: str) -> int:
         t = {"text": text.strip(), "done": False, "at": time.time()}
-        self._cache["tasks"].append(t)
-        _save(self._cache)
-        return len(self._cache["tasks"])
+        with self._lock:
+            self._cache["tasks"].append(t)
+            _save(self._cache, self.path)
+            return len(self._cache["tasks"])
 
     def list(self) -> List[Dict[str, Any]]:
-        return self._cache.get("tasks", [])
+        with self._lock:
+            return [dict(t) for t in self._cache.get("tasks", [])]
 
     def done(self, index: int) -> bool:
-        arr = self._cache.get("tasks", [])
-        i = index - 1
-        if 0 <= i < len(arr):
-            arr[i]["done"] = True
-            _save(self._cache)
-            return True
-        return False
+        with self._lock:
+            arr = self._cache.get("tasks", [])
+            i = index - 1
+            if 0 <= i < len(arr):
+                arr[i]["done"] = True
+                _save(self._cache, self.path)
+                return True
+            return False
 
     def clear(self) -> None:
-        self._cache["tasks"] = []
-        _save(self._cache)
\ No newline at end of file
+        with self._lock:
+            self._cache["tasks"] = []
+            _save(self._cache, self.path)
@@ -10,6 +10,8 @@ try:
 except Exception as e:
     raise RuntimeError("Please: pip install yfinance pandas numpy") from e
 
+from .singleflight import single_flight
+
 # ---------- storage ----------
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 LEDGER_PATH = os.path.join(DATA_DIR, "ledger.json")
@@ -56,6 +58,7 @@ def fetch_ohlc(symbol: str, interval: str = "1d", min_bars: int = 210) -> pd.Dat
         raise ValueError(f"No data for '{symbol}'. JSE tickers need a dot: try '{symbol.replace('JO', '.JO')}'.")
     raise ValueError(f"No/insufficient data for '{symbol}'. Tried periods: {', '.join(tried)}.")
 
+@single_flight(lambda symbol: (symbol or "").strip().upper())     # one download per symbol at a time
 def price_last(symbol: str) -> float:
     d = yf.download(symbol, period="5d", interval="1d", progress=False, auto_adjust=False)
     if isinstance(d, pd.DataFrame) and not d.empty:
@@ -0,0 +1,205 @@
+# core/vecstore.py — memory-mapped sparse (CSR) embedding matrix for the learner KB
+# Row i of the matrix holds the vector of chunks.id == i, so a top-k over the
+# matrix maps straight back to chunk ids without a lookup table.
+import os, threading
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+
+SparseVec = Tuple[np.ndarray, np.ndarray]   # (int32 indices, float32 values)
+
+_PARTS = (("indptr", np.int64), ("indices", np.int32), ("data", np.float32), ("norms", np.float32))
+
+
+class VecStore:
+    """Append-only CSR matrix on disk: <base>.indptr / .indices / .data + per-row L2 norms (.norms)."""
+
+    def __init__(self, base_path: str, dim: int) -> None:
+        self.dim = int(dim)
+        self.paths = {name: f"{base_path}.{name}" for name, _ in _PARTS}
+        self._lock = threading.Lock()
+        self._maps: Optional[dict] = None
+        self._rows = -1
+        self._repair()
+
+    # ---------- sizes ----------
+    def _count(self, name: str) -> int:
+        try:
+            return os.path.getsize(self.paths[name]) // np.dtype(dict(_PARTS)[name]).itemsize
+        except OSError:
+            return 0
+
+    @property
+    def rows(self) -> int:
+        return self._count("norms")
+
+    def _nnz(self, rows: int) -> int:
+        """indptr[rows]: where row `rows` starts, read as one int64 instead of loading the whole file."""
+        with open(self.paths["indptr"], "rb") as f:
+            f.seek(rows * 8)
+            return int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+
+    def _repair(self) -> None:
+        """Trim a half-written append (norms are written last and define the row count)."""
+        rows = self.rows
+        if self._count("indptr") < rows + 1:
+            self.reset()
+            return
+        with open(self.paths["indptr"], "r+b") as f:
+            f.truncate((rows + 1) * 8)
+        nnz = self._nnz(rows)
+        if self._count("indices") < nnz or self._count("data") < nnz:
+            self.reset()
+            return
+        for name in ("indices", "data"):
+            with open(self.paths[name], "r+b") as f:
+                f.truncate(nnz * 4)
+
+    # ---------- writes ----------
+    def put(self, ids: Iterable[int], vecs: List[SparseVec]) -> None:
+        """Append rows at their chunk ids; ids must be increasing and past the last row (gaps stay empty)."""
+        pairs = sorted(zip((int(i) for i in ids), vecs), key=lambda p: p[0])
+        if not pairs:
+            return
+        with self._lock:
+            rows = self.rows
+            if pairs[0][0] < rows:
+                raise ValueError(f"row {pairs[0][0]} already written (rows={rows})")
+            nnz = self._nnz(rows)
+            indptr, indices, data, norms = [], [], [], []
+            nxt = rows
+            for i, (idx, val) in pairs:
+                while nxt < i:                          # empty rows for id gaps
+                    indptr.append(nnz); norms.append(0.0); nxt += 1
+                keep = idx < self.dim
+                idx = np.asarray(idx[keep], dtype=np.int32); val = np.asarray(val[keep], dtype=np.float32)
+                indices.append(idx); data.append(val)
+                nnz += len(idx)
+                indptr.append(nnz); norms.append(float(np.sqrt(np.dot(val, val))))
+                nxt += 1
+            # order matters for crash safety: payload, then indptr, then norms (the row count)
+            with open(self.paths["indices"], "ab") as f:
+                for a in indices: f.write(a.tobytes())
+            with open(self.paths["data"], "ab") as f:
+                for a in data: f.write(a.tobytes())
+            with open(self.paths["indptr"], "ab") as f:
+                f.write(np.asarray(indptr, dtype=np.int64).tobytes())
+            with open(self.paths["norms"], "ab") as f:
+                f.write(np.asarray(norms, dtype=np.float32).tobytes())
+            self._maps = None   # remap on next read
+
+    def drop(self, ids: Iterable[int]) -> None:
+        """Retire rows in place (norm → 0): they stop matching but keep their slot so ids stay aligned."""
+        ids = sorted(int(i) for i in ids)
+        if not ids:
+            return
+        with self._lock:
+            rows = self.rows
+            zero = np.zeros(1, dtype=np.float32).tobytes()
+            with open(self.paths["norms"], "r+b") as f:
+                for i in ids:
+                    if i < rows:
+                        f.seek(i * 4); f.write(zero)
+            self._maps = None
+
+    def reset(self) -> None:
+        for p in self.paths.values():
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+        with open(self.paths["indptr"], "wb") as f:
+            f.write(np.zeros(1, dtype=np.int64).tobytes())
+        for name in ("indices", "data", "norms"):
+            open(self.paths[name], "wb").close()
+        self._maps = None
+
+    # ---------- reads ----------
+    def arrays(self) -> dict:
+        """indptr / indices / data / norms as read-only memmaps (plain empty arrays when nothing is stored)."""
+        with self._lock:
+            rows = self.rows
+            if self._maps is None or rows != self._rows:
+                indptr = np.memmap(self.paths["indptr"], dtype=np.int64, mode="r", shape=(rows + 1,))
+                nnz = int(indptr[-1])
+                maps = {"indptr": indptr}
+                for name, dt, n in (("indices", np.int32, nnz), ("data", np.float32, nnz), ("norms", np.float32, rows)):
+                    maps[name] = np.memmap(self.paths[name], dtype=dt, mode="r", shape=(n,)) if n else np.zeros(0, dt)
+                self._maps, self._rows = maps, rows
+            return self._maps
+
+    def _dense_query(self, q: SparseVec) -> Tuple[np.ndarray, float]:
+        qd = np.zeros(self.dim, dtype=np.float32)
+        idx, val = q
+        keep = idx < self.dim
+        qd[idx[keep]] = val[keep]
+        return qd, float(np.linalg.norm(qd)) or 1.0
+
+    @staticmethod
+    def _segments(indptr: np.ndarray, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions of the non-zeros of rows `ids` (concatenated) + offsets delimiting each row."""
+        starts = indptr[ids]
+        lens = indptr[ids + 1] - starts
+        bounds = np.concatenate(([0], np.cumsum(lens)))
+        flat = np.arange(bounds[-1]) - np.repeat(bounds[:-1] - starts, lens)
+        return flat, bounds
+
+    @staticmethod
+    def _segsum(vals: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+        # per-row sums along the last axis; cumsum differences handle empty rows
+        pad = [(0, 0)] * (vals.ndim - 1) + [(1, 0)]
+        cs = np.pad(np.cumsum(vals, axis=-1, dtype=np.float64), pad)
+        return cs[..., bounds[1:]] - cs[..., bounds[:-1]]
+
+    @staticmethod
+    def _rank(ids: np.ndarray, sims: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        keep = np.isfinite(sims)
+        ids, sims = ids[keep], sims[keep]
+        k = min(k, len(ids))
+        if k <= 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        idx = np.argpartition(-sims, k - 1)[:k]
+        idx = idx[np.argsort(-sims[idx])]
+        return ids[idx].astype(np.int64), sims[idx]
+
+    def score(self, q: SparseVec, ids: np.ndarray) -> np.ndarray:
+        """Cosine of q against the given rows only (empty rows score -inf)."""
+        m = self.arrays()
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return np.zeros(0, np.float32)
+        qd, qn = self._dense_query(q)
+        flat, bounds = self._segments(m["indptr"], ids)
+        dots = self._segsum(m["data"][flat] * qd[m["indices"][flat]], bounds)
+        norms = m["norms"][ids]
+        sims = (dots / (norms * qn + 1e-9)).astype(np.float32)
+        sims[norms == 0] = -np.inf
+        return sims
+
+    def dot_rows(self, mat_t: np.ndarray, ids: np.ndarray, normalize: bool = True) -> np.ndarray:
+        """Dot products of rows `ids` with the columns of a dense (dim × m) matrix → (len(ids), m)."""
+        m = self.arrays()
+        ids = np.asarray(ids, dtype=np.int64)
+        flat, bounds = self._segments(m["indptr"], ids)
+        data = m["data"][flat]
+        if normalize:
+            data = data / np.maximum(np.repeat(m["norms"][ids], np.diff(bounds)), 1e-9)
+        out = np.zeros((len(ids), mat_t.shape[1]), dtype=np.float32)
+        if len(flat):
+            # reduceat over contiguous (nnz × m) rows is much cheaper than a cumsum; empty rows stay 0
+            prod = mat_t[m["indices"][flat]] * data[:, None]
+            lens = np.diff(bounds)
+            out[lens > 0] = np.add.reduceat(prod, bounds[:-1][lens > 0], axis=0)
+        return out
+
+    def top_k(self, q: SparseVec, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact cosine top-k via a sparse dot product over every row + argpartition. Returns (ids, scores) best first."""
+        m = self.arrays()
+        norms = m["norms"]
+        if not len(norms) or k <= 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        qd, qn = self._dense_query(q)
+        cs = np.concatenate(([0.0], np.cumsum(m["data"] * qd[m["indices"]], dtype=np.float64)))
+        dots = cs[m["indptr"][1:]] - cs[m["indptr"][:-1]]
+        sims = (dots / (norms * qn + 1e-9)).astype(np.float32)
+        sims[norms == 0] = -np.inf                # gaps / empty rows never win
+        return self._rank(np.arange(len(norms)), sims, k)
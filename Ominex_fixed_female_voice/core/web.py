@@ -4,6 +4,8 @@ import os, re, html
 from typing import List, Dict, Optional, Tuple
 import requests
 
+from .singleflight import single_flight, squash
+
 # -------- Optional deps (safe fallbacks) --------
 try:
     from duckduckgo_search import DDGS          # pip install duckduckgo-search
@@ -69,6 +71,8 @@ def _dedupe_title_src(title: str, src: str) -> str:
             return t[: -len(tail)].rstrip()
     return t
 
+# concurrent identical requests share one upstream fetch
+@single_flight(lambda q="", *, country="za", max_items=8: (squash(q), (country or "za").lower(), max_items))
 def news_latest(q: str = "", *, country: str = "za", max_items: int = 8) -> List[Dict[str, str]]:
     """
     No-key path first (Google News RSS) -> fallback to NewsAPI if a key is present.
@@ -145,6 +149,7 @@ def format_news(items: List[Dict[str, str]], limit: int = 6) -> str:
     return "\n".join(out)
 
 # ======================= WEB SEARCH =======================
+@single_flight(lambda query, max_results=5: (squash(query), max_results))
 def search_web_list(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     """
     Structured search results.
@@ -0,0 +1,75 @@
+import os, tempfile, time
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+os.environ.setdefault("OMINEX_INTENT_MODEL_PATH", os.path.join(os.environ["OMINEX_LEARN_DIR"], "intent_model.npz"))
+
+from core import intent_model
+from core.intent_model import IntentModel, get_model, load_corpus
+from core.intents import BRAIN
+
+def test_fixes_known_regex_misroutes():
+    model = get_model()
+    seen = set(load_corpus()[0])
+    cases = {"how do I find the volume of a sphere?": ("chat", "search"),
+             "help me understand photosynthesis": ("chat", "help"),
+             "explain memory leaks in C": ("chat", "recall"),
+             "show my todo list": ("task_list", "task_add")}
+    for text, (want, regex) in cases.items():
+        assert text not in seen
+        assert model.predict(text)[0] == want and BRAIN.first(text) == regex, text
+    for text, want in {"hi there": "greet", "search for rust lifetimes": "search", "what time is it?": "time",
+                       "remember that my car is red": "remember", "list tasks": "task_list"}.items():
+        assert model.predict(text)[0] == want, text
+
+def test_batch_matches_single_and_is_fast():
+    model = get_model()
+    texts, _ = load_corpus()
+    texts = texts[:200] + ["", "   "]
+    assert [l for l, _ in model.predict_batch(texts)] == [model.predict(t)[0] for t in texts]
+    t0 = time.perf_counter()
+    for t in texts:
+        model.predict(t)
+    assert (time.perf_counter() - t0) / len(texts) < 1e-3
+
+def test_low_confidence_falls_back_to_regex():
+    from core import brain
+    saved = brain.INTENT_MODEL, intent_model.INTENT_MIN_CONF
+    try:
+        brain.INTENT_MODEL = True
+        assert brain._classify_intent("help me understand photosynthesis") == "chat"
+        intent_model.INTENT_MIN_CONF = 1.01                 # never sure enough → regexes decide
+        assert brain._classify_intent("help me understand photosynthesis") == "help"
+    finally:
+        brain.INTENT_MODEL, intent_model.INTENT_MIN_CONF = saved
+
+def test_canned_hello_needs_a_real_greeting():
+    from core import brain
+    saved = brain.INTENT_MODEL, brain._fan_out
+    brain._fan_out = lambda text, **kw: ("fanned out", "plan")
+    try:
+        assert brain.think("this is great")["reply"] == "Hello. OMINEX online."     # "hi" in "this"
+        brain.INTENT_MODEL = True
+        assert brain.think("this is great")["reply"] == "fanned out"
+        assert brain.think("hi there")["reply"] == "Hello. OMINEX online."
+    finally:
+        brain.INTENT_MODEL, brain._fan_out = saved
+
+def test_cached_weights_are_tied_to_the_corpus(tmp_path):
+    model = IntentModel.train(["hi", "hello", "news", "headlines"], ["greet", "greet", "news", "news"], dim=1 << 10)
+    path = str(tmp_path / "m.npz")
+    model.save(path, "abc")
+    again = IntentModel.load(path, "abc")
+    assert again is not None and again.predict("hello")[0] == "greet"
+    assert IntentModel.load(path, "other") is None
+
+
+if __name__ == "__main__":
+    import tempfile, pathlib
+    test_fixes_known_regex_misroutes()
+    test_batch_matches_single_and_is_fast()
+    test_low_confidence_falls_back_to_regex()
+    test_canned_hello_needs_a_real_greeting()
+    test_cached_weights_are_tied_to_the_corpus(pathlib.Path(tempfile.mkdtemp()))
+    print("ok")
@@ -0,0 +1,40 @@
+import json, os, random, tempfile
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+
+from core import brain, nlu, router
+from core.intents import TABLES
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ominex_intents_golden.json")
+
+def _route(text):
+    d = nlu.detect_intent(text)
+    r, rd = router.decide(text), router.decide(text, mode="demo")
+    return {"text": text, "brain": brain._classify_intent(text), "reply": brain.conversational_response(text),
+            "nlu": [d.name, d.slots] if d else None,
+            "route": [r.intent, r.payload, r.blocked, r.reason],
+            "route_demo": [rd.intent, rd.payload, rd.blocked, rd.reason]}
+
+def test_routing_matches_golden():
+    # the golden file was recorded from the per-rule regex/substring chains these tables replaced
+    with open(GOLDEN, encoding="utf-8") as f:
+        rows = json.load(f)
+    for row in rows:
+        assert _route(row["text"]) == row, row["text"]
+
+def test_tables_match_sequential_rules():
+    with open(GOLDEN, encoding="utf-8") as f:
+        words = " ".join(r["text"] for r in json.load(f)).split()
+    rng = random.Random(3)
+    texts = [" ".join(rng.sample(words, rng.randint(1, 8))) for _ in range(3000)]
+    for name, table in TABLES.items():
+        for t in texts:
+            assert table.first(t) == table.sequential(t), (name, t)
+
+
+if __name__ == "__main__":
+    test_routing_matches_golden()
+    test_tables_match_sequential_rules()
+    print("ok")
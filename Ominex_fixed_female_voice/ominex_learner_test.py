@@ -0,0 +1,477 @@
+import os, tempfile, threading, time
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+
+import numpy as np
+
+from core import learner
+
+def _insert_raw(texts, url, dense=False):
+    """Chunks written straight to SQLite, as an older build (or another process) would leave them:
+    the vector store has not seen them yet."""
+    vecs = learner._embed_sparse(texts)
+    with learner._pool.transaction() as c:
+        c.execute("INSERT OR IGNORE INTO sources(url,domain,title,topic,first_seen,last_seen) VALUES(?,?,?,?,0,0)",
+                  (url, learner._domain(url), url, "raw"))
+        sid = c.execute("SELECT id FROM sources WHERE url=?", (url,)).fetchone()[0]
+        base = max(c.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM chunks").fetchone()[0], learner._vecs.rows)
+        ids = list(range(base, base + len(texts)))
+        for i, t, (idx, val) in zip(ids, texts, vecs):
+            if dense:
+                d = np.zeros(learner.EMBED_DIM, np.float32); d[idx] = val
+                blob, vfmt = d.tobytes(), 0
+            else:
+                blob, vfmt = learner._pack_sparse((idx, val)), 1
+            c.execute("INSERT INTO chunks(id,source_id,text,vec,vfmt) VALUES(?,?,?,?,?)", (i, sid, t, blob, vfmt))
+        c.execute("UPDATE kb_meta SET value=value+1 WHERE key='corpus_version'")
+    return ids, vecs
+
+def _run_threads(n, fn):
+    errors, start = [], threading.Barrier(n)
+    def run(i):
+        start.wait()
+        try:
+            fn(i)
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return errors
+
+def test_concurrent_queries_backfill_the_store_once():
+    ids, _ = _insert_raw([f"Backfill sample {i} about tidal energy and turbines." for i in range(300)],
+                         "https://example.org/backfill")
+    assert learner._vecs.rows <= ids[0]                     # store is behind the DB
+    errors = _run_threads(8, lambda i: learner.kb_query(f"tidal turbines question {i}", mode="exact"))
+    assert not errors, errors
+    assert learner._vecs.rows == ids[-1] + 1
+    norms = learner._vecs.arrays()["norms"]
+    assert (np.asarray(norms)[ids] > 0).all()
+
+def test_migrates_dense_vectors_to_sparse():
+    ids, vecs = _insert_raw(["Legacy dense chunk about glaciers.", "Another legacy chunk about fjords."],
+                            "https://example.org/legacy", dense=True)
+    assert learner._migrate_sparse() == 2
+    with learner._conn() as c:
+        rows = c.execute(f"SELECT id, vec, vfmt FROM chunks WHERE id IN ({ids[0]},{ids[1]}) ORDER BY id").fetchall()
+    for (_, blob, vfmt), (idx, val) in zip(rows, vecs):
+        got = learner._unpack_vec(blob, vfmt)
+        assert vfmt == 1 and got[0].tolist() == idx.tolist() and np.allclose(got[1], val)
+    assert learner._migrate_sparse() == 0                   # nothing left to rewrite
+    hit = learner.kb_query("glaciers legacy chunk", mode="exact")["matches"][0]
+    assert "glaciers" in hit["text"]
+
+WORDS = ["amber", "basalt", "cobalt", "dune", "ember", "fjord", "garnet", "heron", "indigo", "juniper",
+         "kelp", "lagoon", "mesa", "nectar", "onyx", "prairie"]
+
+def _page(i, topic="overlap"):
+    text = f"Page {WORDS[i]} explains {topic} topic {WORDS[i]} in detail. " * 3
+    chunks, vecs = learner._chunk_embed(text)
+    return {"url": f"https://example.org/{topic}/{i}", "title": f"{topic} {i}", "content_hash": str(i)}, chunks, vecs
+
+def test_overlapping_writers_and_queries_keep_every_vector():
+    pages = [_page(i) for i in range(12)]
+    def work(i):
+        if i < len(pages):
+            item, chunks, vecs = pages[i]
+            learner._store_page("overlap", item, chunks, vecs)
+        else:
+            learner.kb_query(f"overlap topic {WORDS[i]}", mode="exact")
+    errors = _run_threads(len(pages) + 4, work)
+    assert not errors, errors
+    with learner._conn() as c:
+        ids = [r[0] for r in c.execute("SELECT chunks.id FROM chunks JOIN sources ON chunks.source_id=sources.id "
+                                       "WHERE sources.topic='overlap'")]
+    assert len(ids) == len(pages)
+    assert (np.asarray(learner._vecs.arrays()["norms"])[ids] > 0).all()
+    for i in (0, 7):
+        hit = learner.kb_query(f"Page {WORDS[i]} explains overlap topic {WORDS[i]}", mode="exact")["matches"][0]
+        assert hit["url"].endswith(f"/overlap/{i}")
+
+def test_lost_rows_are_rehomed():
+    item, chunks, vecs = _page(1, topic="rehome")
+    learner._store_page("rehome", item, chunks, vecs)
+    with learner._conn() as c:
+        before = [r[0] for r in c.execute("SELECT chunks.id FROM chunks JOIN sources ON chunks.source_id=sources.id "
+                                          "WHERE sources.url=?", (item["url"],))]
+    learner._vecs.drop(before)                              # what an interrupted append leaves behind
+    learner._vec_repair = True
+    hit = learner.kb_query("Page basalt explains rehome topic basalt", mode="exact")["matches"][0]
+    assert hit["url"] == item["url"]
+    with learner._conn() as c:
+        after = [r[0] for r in c.execute("SELECT chunks.id FROM chunks JOIN sources ON chunks.source_id=sources.id "
+                                         "WHERE sources.url=?", (item["url"],))]
+    assert len(after) == len(before) and min(after) > max(before)
+    assert learner._lexical("rehome topic")                 # FTS follows the new ids
+
+def test_learn_auto_stores_agreeing_facts_in_one_write():
+    from core.memory import Memory
+    from core.memstore import InMemoryBackend
+
+    class Counting(InMemoryBackend):
+        writes = 0
+        def write(self, ops):
+            Counting.writes += 1
+            super().write(ops)
+
+    pages = {"https://a.example/x": "Basalt forms when lava cools quickly at the surface of the earth. Short one.",
+             "https://b.example/y": "Basalt forms when lava cools quickly at the surface of the earth. Other text here.",
+             "https://c.example/z": "An unrelated page about herons that nobody else agrees with at all, sadly."}
+    saved = learner.search_web_list, learner.fetch_url_readable
+    learner.search_web_list = lambda q, max_results=5: [{"title": "", "url": ""}] + [{"title": u, "url": u} for u in pages]
+    learner.fetch_url_readable = lambda url: (pages[url], url.split("/")[2], url)
+    mem = Memory(backend=Counting(), flush_interval=0)
+    try:
+        out = learner.learn_auto("basalt", mem)
+    finally:
+        learner.search_web_list, learner.fetch_url_readable = saved
+    assert out["considered_pages"] == 3 and out["facts_stored"] == 1
+    assert Counting.writes == 1
+    hit = mem.search_knowledge("basalt lava")[0]
+    assert hit["content"].startswith("Basalt forms") and len(hit["sources"]) == 2
+
+def test_learn_routes_need_the_token_and_run_one_crawl_at_a_time():
+    import app as web
+    client = web.app.test_client()
+    saved = web.LEARN_TOKEN, learner.crawl_topics
+    release = threading.Event()
+    def slow_crawl(topics, **kw):
+        release.wait(5)
+        return {"summary": {t: [{}] for t in topics}, "pages": {}, "deadline_hit": False}
+    learner.crawl_topics = slow_crawl
+    try:
+        web.LEARN_TOKEN = ""
+        r = client.post("/api/learn/topics", json={"topic": "basalt"})
+        assert r.status_code == 403 and "OMINEX_LEARN_TOKEN" in r.get_json()["error"]
+        web.LEARN_TOKEN = "s3cret"
+        assert client.post("/api/learn/tick", json={}).status_code == 401
+        auth = {"X-Learn-Token": "s3cret"}
+        assert client.post("/api/learn/topics", json={"topic": "basalt"}, headers=auth).status_code == 200
+        t0 = time.monotonic()
+        assert client.post("/api/learn/tick", json={}, headers=auth).status_code == 202
+        assert time.monotonic() - t0 < 1.0                  # the crawl runs in the background
+        assert client.post("/api/learn/tick", json={}, headers=auth).status_code == 409
+        assert learner.learn_tick()["busy"]                 # the hourly job skips too
+        release.set()
+        while learner.tick_status()["running"]:
+            time.sleep(0.01)
+        assert client.get("/api/learn/topics").get_json()["tick"]["summary"]["basalt"] == 1
+    finally:
+        release.set()
+        web.LEARN_TOKEN, learner.crawl_topics = saved
+
+def test_learn_query_validates_and_clamps_k():
+    import app as web
+    client = web.app.test_client()
+    saved, seen = learner.kb_query, []
+    learner.kb_query = lambda q, k=5: seen.append(k) or {"answer": "", "matches": []}
+    try:
+        for bad in ("abc", "1e3", [3], {"n": 1}):
+            assert client.post("/api/learn/query", json={"q": "basalt", "k": bad}).status_code == 400, bad
+        for k, want in ((None, 5), (3, 3), ("4", 4), (0, 5), (-2, 1), (10 ** 6, 10)):
+            assert client.post("/api/learn/query", json={"q": "basalt", "k": k}).status_code == 200
+        assert seen == [5, 3, 4, 5, 1, 10]
+    finally:
+        learner.kb_query = saved
+
+def test_kb_branch_judges_the_best_match_not_the_first():
+    from core import brain
+    saved = brain.kb_query
+    weak, strong = {"score": 0.05, "text": "weak"}, {"score": 0.9, "text": "strong"}
+    try:
+        brain.kb_query = lambda q, k=4: {"answer": "kb answer", "matches": [weak, strong]}   # RRF order
+        assert brain._kb_branch("anything") == "kb answer"
+        brain.kb_query = lambda q, k=4: {"answer": "kb answer", "matches": [weak, dict(weak)]}
+        assert brain._kb_branch("anything") == ""
+    finally:
+        brain.kb_query = saved
+
+def test_kb_hit_never_launches_the_llm():
+    from core import brain
+    saved = dict(brain._BRANCHES), brain.llm_available
+    calls = []
+    def branch(name, reply, delay=0.0):
+        def run(text):
+            calls.append(name)
+            time.sleep(delay)
+            return reply
+        return run
+    def fan_out(kb, kb_delay):
+        calls.clear()
+        brain._BRANCHES.update(kb=branch("kb", kb, kb_delay), plan=branch("plan", ""), llm=branch("llm", "llm answer"))
+        return brain._fan_out("anything")
+    brain.llm_available = lambda: True
+    try:
+        assert fan_out("kb answer", 0.05) == ("kb answer", "kb") and "llm" not in calls
+        time.sleep(brain.KB_GRACE_S + 0.1)
+        assert "llm" not in calls                                  # not launched late either
+        t0 = time.monotonic()
+        assert fan_out("", 0.0) == ("llm answer", "llm")          # a KB miss releases the LLM at once
+        assert time.monotonic() - t0 < brain.KB_GRACE_S
+        assert fan_out("kb answer", brain.KB_GRACE_S + 0.5) == ("llm answer", "llm")   # a slow KB is raced
+    finally:
+        brain._BRANCHES.update(saved[0])
+        brain.llm_available = saved[1]
+
+def test_chunks_stay_within_bounds_and_overlap():
+    text = " ".join(f"Sentence {WORDS[i % len(WORDS)]} number {i} has a few words in it." for i in range(200))
+    chunks = list(learner.iter_chunks(text, max_chars=300, overlap=80))
+    assert len(chunks) > 1 and all(0 < len(c) <= 300 for c in chunks)
+    for a, b in zip(chunks, chunks[1:]):
+        first = b[: b.index(".") + 1]
+        assert a.endswith(first) and len(first) <= 80         # next chunk starts on the last sentence
+    assert chunks[0].startswith("Sentence amber number 0") and chunks[-1].endswith("number 199 has a few words in it.")
+    assert learner._split_chunks(text) == [c for c in learner.iter_chunks(text) if c]
+
+def test_run_on_text_is_cut_at_word_breaks():
+    text = " ".join(WORDS * 40)                              # no sentence ends at all
+    chunks = list(learner.iter_chunks(text, max_chars=120, overlap=0))
+    assert all(len(c) <= 120 for c in chunks)
+    assert " ".join(chunks).split() == text.split()          # nothing dropped, no word split
+    blob = "x" * 1000                                        # no spaces either: hard cut
+    assert [len(c) for c in learner.iter_chunks(blob, max_chars=300, overlap=0)] == [300, 300, 300, 100]
+    assert list(learner.iter_chunks("")) == [] and list(learner.iter_chunks(None)) == []
+    assert learner._split_chunks("   \n  ") == []
+
+def _random_sparse(rng, n, dim, nnz=12):
+    out = []
+    for _ in range(n):
+        idx = np.sort(rng.choice(dim, nnz, replace=False)).astype(np.int32)
+        out.append((idx, rng.random(nnz).astype(np.float32)))
+    return out
+
+def test_sparse_store_matches_dense_cosine_and_survives_a_torn_append(tmp_path):
+    from core.vecstore import VecStore
+    dim, rng = 512, np.random.default_rng(3)
+    store = VecStore(str(tmp_path / "v"), dim)
+    vecs = _random_sparse(rng, 40, dim)
+    ids = [i for i in range(1, 60) if i % 3][:40]           # gaps stay empty rows
+    store.put(ids, vecs)
+    dense = np.zeros((store.rows, dim), np.float32)
+    for i, (idx, val) in zip(ids, vecs):
+        dense[i, idx] = val
+    q = _random_sparse(rng, 1, dim, nnz=40)[0]
+    qd = np.zeros(dim, np.float32); qd[q[0]] = q[1]
+    sims = dense @ qd / (np.linalg.norm(dense, axis=1) * np.linalg.norm(qd) + 1e-9)
+    got_ids, got = store.top_k(q, 5)
+    assert got_ids.tolist() == np.argsort(-sims)[:5].tolist() and np.allclose(got, np.sort(sims)[::-1][:5], atol=1e-5)
+    store.drop([got_ids[0]])
+    assert got_ids[0] not in store.top_k(q, 40)[0]
+    try:
+        store.put([ids[-1]], vecs[:1])
+        assert False, "rewrote a row"
+    except ValueError:
+        pass
+    with open(store.paths["indices"], "ab") as f:           # crash after the payload, before the row count
+        f.write(np.arange(7, dtype=np.int32).tobytes())
+    with open(store.paths["indptr"], "ab") as f:
+        f.write(np.array([10 ** 6], np.int64).tobytes())
+    again = VecStore(str(tmp_path / "v"), dim)
+    assert again.rows == store.rows and again.top_k(q, 4)[0].tolist() == store.top_k(q, 4)[0].tolist()
+    for v in vecs[:5]:                                       # one-row appends find the end offset each time
+        again.put([again.rows], [v])
+        assert again.score(v, np.array([again.rows - 1]))[0] > 0.999
+
+def _clustered(rng, n, dim, clusters=16):
+    cores = [rng.choice(dim, 12, replace=False) for _ in range(clusters)]
+    out = []
+    for i in range(n):
+        idx = np.unique(np.concatenate((cores[i % clusters], rng.choice(dim, 6, replace=False)))).astype(np.int32)
+        out.append((idx, rng.random(len(idx)).astype(np.float32) + 0.5))
+    return out
+
+def test_ivf_recall_tracks_exact_and_covers_new_rows(tmp_path):
+    from core.ann import IVFIndex, MIN_TRAIN_ROWS, make_index
+    from core.vecstore import VecStore
+    dim, rng = 1024, np.random.default_rng(11)
+    store = VecStore(str(tmp_path / "v"), dim)
+    store.put(range(MIN_TRAIN_ROWS + 200), _clustered(rng, MIN_TRAIN_ROWS + 200, dim))
+    index = make_index("ivf", store, str(tmp_path / "ivf"))
+    assert isinstance(index, IVFIndex) and not index.trained
+    index.refresh(train=True)
+    assert index.trained and index.stats()["assigned"] == store.rows
+    queries = _clustered(rng, 40, dim)
+    def recall(nprobe):
+        return np.mean([len(set(store.top_k(q, 5)[0].tolist()) & set(index.search(q, 5, nprobe)[0].tolist())) / 5
+                        for q in queries])
+    assert recall(None) >= 0.8
+    assert recall(index.meta["nlist"]) == 1.0                # probing every list is exact search
+    fresh = queries[0]
+    store.put([store.rows], [fresh])                         # appended after training, not yet filed
+    assert index.search(fresh, 1)[0][0] == store.rows - 1
+    index.refresh()
+    assert index.stats()["assigned"] == store.rows
+    reopened = IVFIndex(store, str(tmp_path / "ivf"))
+    assert reopened.trained and reopened.search(fresh, 1)[0][0] == store.rows - 1
+
+def _stub(**attrs):
+    """Swap learner attributes; call the returned function to put them back."""
+    saved = {k: getattr(learner, k) for k in attrs}
+    for k, v in attrs.items():
+        setattr(learner, k, v)
+    return lambda: [setattr(learner, k, v) for k, v in saved.items()]
+
+def test_domain_limiter_caps_concurrency_and_spaces_requests():
+    limiter = learner._DomainLimiter(per_domain=2, min_interval=0.05)
+    lock, active, peak, starts = threading.Lock(), [0], [0], []
+    def hit(i):
+        with limiter.slot("example.org"):
+            with lock:
+                active[0] += 1; peak[0] = max(peak[0], active[0]); starts.append(time.monotonic())
+            time.sleep(0.1)
+            with lock:
+                active[0] -= 1
+    assert not _run_threads(6, hit)
+    starts.sort()
+    assert peak[0] == 2
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.045
+    t0 = time.monotonic()
+    with limiter.slot("other.example"):                      # another host does not queue behind it
+        assert time.monotonic() - t0 < 0.05
+
+def test_crawl_stops_at_the_deadline():
+    urls = [{"title": "", "url": f"https://slow{i}.example/page"} for i in range(20)]
+    restore = _stub(_search_candidates=lambda topic: [dict(u) for u in urls],
+                    _fetch_page=lambda url, timeout, etag=None, last_modified=None: time.sleep(0.4) or
+                    {"status": 200, "html": "", "etag": None, "last_modified": None})
+    try:
+        t0 = time.monotonic()
+        out = learner.crawl_topics(["slowness"], max_per_topic=20, workers=4, min_interval=0, deadline_s=0.6)
+    finally:
+        restore()
+    assert out["deadline_hit"] and time.monotonic() - t0 < 1.5
+    assert out["pages"]["failed"] < len(urls)               # unstarted fetches were abandoned
+
+def _html(word, n=12):
+    return "<html><body><p>" + f"The {word} report covers revisit behaviour of the crawler in depth. " * n + "</p></body></html>"
+
+def test_revisits_use_validators_and_skip_unchanged_pages():
+    bodies = {"https://etag.example/a": _html("garnet"), "https://plain.example/b": _html("heron")}
+    seen = []
+    def fetch(url, timeout, etag=None, last_modified=None):
+        seen.append((url, etag, last_modified))
+        if url.startswith("https://etag.") and etag == '"v1"':
+            return {"status": 304, "html": "", "etag": etag, "last_modified": last_modified}
+        tag = '"v1"' if url.startswith("https://etag.") else None
+        return {"status": 200, "html": bodies[url], "etag": tag, "last_modified": None}
+    def crawl():
+        seen.clear()
+        return learner.crawl_topics(["revisit"], max_per_topic=2, min_interval=0, deadline_s=10)["pages"]
+    def chunks_of(url):
+        with learner._conn() as c:
+            return c.execute("SELECT chunks.id, chunks.text FROM chunks JOIN sources ON chunks.source_id=sources.id "
+                             "WHERE sources.url=?", (url,)).fetchall()
+    restore = _stub(_search_candidates=lambda topic: [{"title": "", "url": u} for u in bodies], _fetch_page=fetch)
+    try:
+        assert crawl()["stored"] == 2
+        first = chunks_of("https://plain.example/b")
+        pages = crawl()
+        assert ("https://etag.example/a", '"v1"', None) in seen   # If-None-Match on the revisit
+        assert pages["unchanged"] == 2 and pages["stored"] == 0    # 304 + same content hash
+        assert chunks_of("https://plain.example/b") == first
+        bodies["https://plain.example/b"] = _html("onyx")
+        pages = crawl()
+        assert pages["unchanged"] == 1 and pages["stored"] == 1
+        now = chunks_of("https://plain.example/b")
+        assert now and all("onyx" in t for _, t in now) and not {i for i, _ in first} & {i for i, _ in now}
+    finally:
+        restore()
+
+def test_stats_counters_follow_inserts_and_replacements():
+    learner.add_topic("counted")
+    before = learner.kb_stats()
+    for i in range(3):
+        learner._store_page("counted", *_page(i, topic="counted"))
+    item, _, _ = _page(0, topic="counted")
+    learner._store_page("counted", item, *learner._chunk_embed(" ".join(WORDS * 60)))   # longer page replaces it
+    stats = learner.kb_stats(per_topic=True)
+    mine = stats["per_topic"]["counted"]
+    assert mine["sources"] == 3 and mine["chunks"] > 3
+    assert {k: stats[k] - before[k] for k in ("sources", "chunks", "bytes")} == \
+           {k: mine[k] for k in ("sources", "chunks", "bytes")}
+    with learner._pool.transaction() as c:
+        learner._rebuild_stats(c)                            # the full recount agrees with the deltas
+    again = learner.kb_stats(per_topic=True)["per_topic"]["counted"]
+    assert {k: again[k] for k in ("sources", "chunks", "bytes")} == {k: mine[k] for k in ("sources", "chunks", "bytes")}
+
+def test_hybrid_fuses_bm25_and_vector_rankings():
+    common = "Configuring the billing service gateway retries and timeouts for payment processing. " * 3
+    for i in range(8):
+        extra = "Error code zx81q appears when the gateway rejects tokens." if i == 5 else f"Gateway note {WORDS[i]}."
+        learner._store_page("hybrid", {"url": f"https://hybrid.example/{i}", "title": str(i)},
+                            *learner._chunk_embed(common + extra))
+    out = learner.kb_query("what does zx81q mean for the billing gateway", k=3, mode="exact", retrieval="hybrid")
+    hits = out["matches"]
+    assert hits[0]["url"].endswith("/5") and len(hits) == 3
+    assert [m["rrf"] for m in hits] == sorted((m["rrf"] for m in hits), reverse=True)
+    assert len(learner._lexical("zx81q")) == 1              # BM25 alone is short of k ...
+    hits = learner.kb_query("zx81q", k=5, mode="exact", retrieval="hybrid")["matches"]
+    assert len(hits) == 5 and hits[0]["url"].endswith("/5")  # ... so the vector index fills the rest
+    assert learner._fts_query('the "NEAR(x" OR AND -- zx81q?') == '"near" OR "zx81q"'
+    assert learner.kb_query('"NEAR(x" -- zx81q?', retrieval="hybrid")["matches"][0]["url"].endswith("/5")
+
+def test_kb_cache_answers_repeats_until_the_corpus_changes():
+    calls = []
+    real = learner._kb_query
+    restore = _stub(_kb_query=lambda *a: calls.append(a) or real(*a))
+    try:
+        learner._store_page("cached", *_page(2, topic="cached"))
+        first = learner.kb_query("Cobalt explains cached topic?", mode="exact")
+        again = learner.kb_query("  cobalt EXPLAINS cached, topic ", mode="exact")   # same normalized question
+        assert len(calls) == 1 and again == first
+        again["matches"][0]["text"] = "edited by a caller"
+        assert learner.kb_query("cobalt explains cached topic", mode="exact") == first
+        assert len(calls) == 1
+        learner._store_page("cached", *_page(3, topic="cached"))   # bumps corpus_version
+        learner.kb_query("cobalt explains cached topic", mode="exact")
+        assert len(calls) == 2
+        learner.kb_query("cobalt explains cached topic", k=2, mode="exact")
+        assert len(calls) == 3                               # k is part of the key
+    finally:
+        restore()
+
+def test_embed_cache_vectorizes_each_text_once():
+    seen = []
+    real = learner._vectorize
+    restore = _stub(_vectorize=lambda texts: seen.extend(texts) or real(texts))
+    try:
+        texts = ["Juniper mirrors repeat this chunk.", "A second juniper chunk.", "Juniper mirrors repeat this chunk."]
+        first = learner._embed_sparse(texts)
+        assert sorted(seen) == sorted(set(texts))            # duplicates inside a batch embed once
+        again = learner._embed_sparse(texts[:2] + ["A third juniper chunk."])
+        assert seen[2:] == ["A third juniper chunk."]        # memory hits
+        learner._emb_lru.clear()
+        disk = learner.embed_cache_stats()["disk"]["hits"]
+        from_disk = learner._embed_sparse(texts[:2])
+        assert len(seen) == 3 and learner.embed_cache_stats()["disk"]["hits"] == disk + 2
+        for a, b in zip(first[:2] + again[:2], from_disk * 2):
+            assert a[0].tolist() == b[0].tolist() and np.allclose(a[1], b[1])
+    finally:
+        restore()
+
+if __name__ == "__main__":
+    import pathlib
+    test_concurrent_queries_backfill_the_store_once()
+    test_migrates_dense_vectors_to_sparse()
+    test_overlapping_writers_and_queries_keep_every_vector()
+    test_lost_rows_are_rehomed()
+    test_learn_auto_stores_agreeing_facts_in_one_write()
+    test_learn_routes_need_the_token_and_run_one_crawl_at_a_time()
+    test_learn_query_validates_and_clamps_k()
+    test_kb_branch_judges_the_best_match_not_the_first()
+    test_kb_hit_never_launches_the_llm()
+    test_chunks_stay_within_bounds_and_overlap()
+    test_run_on_text_is_cut_at_word_breaks()
+    test_sparse_store_matches_dense_cosine_and_survives_a_torn_append(pathlib.Path(tempfile.mkdtemp()))
+    test_ivf_recall_tracks_exact_and_covers_new_rows(pathlib.Path(tempfile.mkdtemp()))
+    test_domain_limiter_caps_concurrency_and_spaces_requests()
+    test_crawl_stops_at_the_deadline()
+    test_revisits_use_validators_and_skip_unchanged_pages()
+    test_stats_counters_follow_inserts_and_replacements()
+    test_hybrid_fuses_bm25_and_vector_rankings()
+    test_kb_cache_answers_repeats_until_the_corpus_changes()
+    test_embed_cache_vectorizes_each_text_once()
+    print("ok")
@@ -0,0 +1,167 @@
+import os, tempfile, threading, time
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+
+from services.llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable
+from services.stub_llm import serve
+
+MSGS = [{"role": "user", "content": "ping"}]
+
+def _stub(**kwargs):
+    srv, _ = serve(**kwargs)
+    return srv
+
+def test_retries_transient_errors():
+    srv = _stub(fail=2)
+    try:
+        gw = LLMGateway(base_url=srv.base_url, retries=2)
+        assert gw.complete(MSGS).startswith("Stub reply to: ping")
+        assert srv.requests == 3 and gw.stats()["breaker"] == "closed"
+    finally:
+        srv.shutdown()
+
+def test_deadline_covers_the_whole_call():
+    srv = _stub(first_token_delay=2.0)
+    try:
+        gw = LLMGateway(base_url=srv.base_url, retries=3)
+        t0 = time.monotonic()
+        try:
+            gw.complete(MSGS, deadline=0.3)
+            raise AssertionError("expected LLMUnavailable")
+        except LLMUnavailable:
+            pass
+        assert time.monotonic() - t0 < 1.0
+    finally:
+        srv.shutdown()
+
+def test_concurrency_limit():
+    srv = _stub(first_token_delay=0.2)
+    try:
+        gw = LLMGateway(base_url=srv.base_url, max_concurrency=2, queue_wait=5.0)
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(
+                       gw.complete([{"role": "user", "content": f"ping {i}"}]))) for i in range(6)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert len(results) == 6 and srv.peak == 2
+    finally:
+        srv.shutdown()
+
+def _together(calls):
+    """Run the (fn, args) calls at once; results in call order."""
+    out, start = [None] * len(calls), threading.Barrier(len(calls))
+    def run(i, fn, args):
+        start.wait()
+        out[i] = fn(*args)
+    threads = [threading.Thread(target=run, args=(i, fn, args)) for i, (fn, args) in enumerate(calls)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return out
+
+def test_identical_calls_coalesce():
+    srv = _stub(first_token_delay=0.3)
+    try:
+        gw = LLMGateway(base_url=srv.base_url)
+        texts = ["what is 2+2", "What is  2+2"] * 3 + ["what is 2-2", "what is 2-2 "]
+        results = _together([(gw.complete, ([{"role": "user", "content": t}],)) for t in texts])
+        assert len(set(results[:6])) == 1 and "2+2" in results[0]
+        assert len(set(results[6:])) == 1 and "2-2" in results[6]     # punctuation is part of the key
+        assert srv.requests == 2 and gw.stats()["coalesced"] == 6
+    finally:
+        srv.shutdown()
+
+def test_search_and_news_coalesce_and_hand_out_copies():
+    from core import web
+    calls = []
+    class FakeDDGS:
+        def __enter__(self): return self
+        def __exit__(self, *exc): return False
+        def text(self, q, **kw):
+            calls.append(q); time.sleep(0.2)
+            return [{"title": q, "href": f"https://search.example/{q}", "body": ""}]
+    class FakeFeed:
+        def __init__(self, q): self.text = f"<item><title>News on {q}</title><link>https://news.example/{q}</link></item>"
+    saved = web.DDGS, web._http_get
+    web.DDGS = FakeDDGS
+    web._http_get = lambda url, params: calls.append(params.get("q")) or time.sleep(0.2) or FakeFeed(params.get("q"))
+    try:
+        rows = _together([(web.search_web_list, (q,)) for q in ("Rust lifetimes", "rust  LIFETIMES", "c++", "c")])
+        assert len(calls) == 3 and {" ".join(c.lower().split()) for c in calls} == {"rust lifetimes", "c++", "c"}
+        assert rows[0] == rows[1] and rows[0] is not rows[1] and rows[0][0] is not rows[1][0]   # deep copies
+        assert rows[2][0]["url"].endswith("/c++") and rows[3][0]["url"].endswith("/c")
+        calls.clear()
+        items = _together([(web.news_latest, (q,)) for q in ("mars rover", "Mars Rover", "mars rovers")])
+        assert len(calls) == 2 and items[0] == items[1] and items[0] is not items[1]
+        items[0][0]["title"] = "edited"
+        assert items[1][0]["title"] != "edited"
+        assert web.news_latest.flight.stats()["in_flight"] == 0
+    finally:
+        web.DDGS, web._http_get = saved
+
+def test_price_lookups_coalesce_per_symbol():
+    import pytest
+    pytest.importorskip("yfinance")
+    import pandas as pd
+    from core import tradebot
+    calls = []
+    saved = tradebot.yf.download
+    tradebot.yf.download = lambda symbol, **kw: calls.append(symbol) or time.sleep(0.2) or pd.DataFrame({"Close": [1.0, 2.5]})
+    try:
+        prices = _together([(tradebot.price_last, (s,)) for s in ("NPN.JO", "npn.jo ", "SOL.JO")])
+        assert prices == [2.5, 2.5, 2.5] and len(calls) == 2
+    finally:
+        tradebot.yf.download = saved
+
+def test_breaker_fails_fast_then_recovers():
+    srv = _stub(fail=10**6)
+    try:
+        gw = LLMGateway(base_url=srv.base_url, retries=0, breaker=CircuitBreaker(failures=3, reset_after=0.3))
+        for _ in range(3):
+            try: gw.complete(MSGS)
+            except LLMUnavailable: pass
+        assert gw.stats()["breaker"] == "open" and not gw.available()
+        seen = srv.requests
+        t0 = time.monotonic()
+        try:
+            gw.complete(MSGS)
+            raise AssertionError("expected LLMUnavailable")
+        except LLMUnavailable:
+            pass
+        assert srv.requests == seen and time.monotonic() - t0 < 0.05
+        srv.fail = 0
+        time.sleep(0.35)                     # half-open: one probe goes through and closes it
+        assert gw.complete(MSGS) and gw.stats()["breaker"] == "closed"
+    finally:
+        srv.shutdown()
+
+def test_think_falls_back_while_breaker_open():
+    import services.llm as llm
+    from core import brain
+
+    srv = _stub(fail=10**6)
+    saved = llm.gateway
+    llm.gateway = LLMGateway(base_url=srv.base_url, retries=0, breaker=CircuitBreaker(failures=1, reset_after=60))
+    try:
+        try: llm.gateway.complete(MSGS)
+        except LLMUnavailable: pass
+        seen = srv.requests
+        reply, source = brain._fan_out("tell me something about gateways")
+        assert source == "fallback" and reply == brain.conversational_response("tell me something about gateways")
+        assert srv.requests == seen
+    finally:
+        llm.gateway = saved
+        srv.shutdown()
+
+
+if __name__ == "__main__":
+    test_retries_transient_errors()
+    test_deadline_covers_the_whole_call()
+    test_concurrency_limit()
+    test_identical_calls_coalesce()
+    test_search_and_news_coalesce_and_hand_out_copies()
+    test_price_lookups_coalesce_per_symbol()
+    test_breaker_fails_fast_then_recovers()
+    test_think_falls_back_while_breaker_open()
+    print("ok")
@@ -0,0 +1,201 @@
+import os, shutil, tempfile, threading, time
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+
+from core import memory
+from core.memory import Memory, STM_TURNS
+from core.memstore import InMemoryBackend, JournalBackend, SQLiteBackend
+from core.todo import TodoStore
+
+THREADS = 16
+TURNS = 200     # per thread
+SESSIONS = 4
+
+def _hammer(fn):
+    errors = []
+    def run(i):
+        try:
+            fn(i)
+        except Exception as e:      # surface worker failures in the main thread
+            errors.append(e)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(THREADS)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not errors, errors
+
+def _stress_memory(make_backend):
+    mem = Memory(make_backend(), flush_interval=0.01)
+    def worker(i):
+        for n in range(TURNS):
+            mem.add_turn("user", f"t{i}-{n}", session_id=f"s{i % SESSIONS}")
+            if n % 10 == 0:
+                mem.remember(f"thread {i} fact {n}")
+                mem.search(f"thread {i}", k=3)
+    _hammer(worker)
+    mem.close()
+
+    again = Memory(make_backend(), flush_interval=0)
+    for s in range(SESSIONS):
+        turns = again.turns(f"s{s}")
+        assert len(turns) == STM_TURNS, (s, len(turns))
+        assert all(int(t["text"][1:].split("-")[0]) % SESSIONS == s for t in turns)
+    assert len(again.search("thread", k=10 ** 6)) == THREADS * TURNS // 10
+    again.close()
+
+def test_memory_concurrent_turns():
+    tmp = tempfile.mkdtemp(prefix="ominex_mem_")
+    try:
+        _stress_memory(lambda: SQLiteBackend(os.path.join(tmp, "m.db")))
+        _stress_memory(lambda: JournalBackend(os.path.join(tmp, "m.json"), compact_bytes=4096))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def test_todo_concurrent_adds():
+    tmp = tempfile.mkdtemp(prefix="ominex_todo_")
+    try:
+        path = os.path.join(tmp, "tasks.json")
+        todos = TodoStore(path)
+        _hammer(lambda i: [todos.add(f"task {i}-{n}") for n in range(50)])
+        assert len(TodoStore(path).list()) == THREADS * 50
+        assert not os.path.exists(path + ".tmp")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _knowledge(key, topic, content, **extra):
+    return {"id": key, "topic": topic, "content": content, "sources": [], "confidence": 0.5, **extra}
+
+class _Clock:
+    """Stands in for the `time` module inside core.memory so tests can move the clock."""
+    def __init__(self, now):
+        self.now = now
+    def time(self):
+        return self.now
+
+def test_knowledge_search_ignores_punctuation():
+    mem = Memory(InMemoryBackend(), flush_interval=0)
+    mem.upsert_knowledge(_knowledge("guido", "languages", "The language created by Guido van Rossum: Python."))
+    for i in range(200):
+        mem.upsert_knowledge(_knowledge(f"k{i}", "misc", f"filler entry {i} about nothing much"))
+    for q in ("python?", "Python!", "who made python"):
+        assert mem.search_knowledge(q, limit=3)[0]["id"] == "guido", q
+
+def test_knowledge_search_matches_substrings():
+    mem = Memory(InMemoryBackend(), flush_interval=0)
+    for i in range(50):
+        mem.upsert_knowledge(_knowledge(f"k{i}", "misc", f"filler entry {i} about nothing much"))
+    mem.upsert_knowledge(_knowledge("ml", "ai", "Machine learning fits models to data."))
+    for i in range(50, 200):
+        mem.upsert_knowledge(_knowledge(f"k{i}", "misc", f"filler entry {i} about nothing much"))
+    assert mem.search_knowledge("learn", limit=3)[0]["id"] == "ml"
+    mem.remember("an old but important fact", importance=1.0)         # no query term: the full scan finds it
+    for i in range(100):
+        mem.remember(f"unrelated fact {i}")
+    assert mem.search("nothing in common", k=1)[0]["text"] == "an old but important fact"
+
+def test_knowledge_candidates_keep_insertion_order():
+    mem = Memory(InMemoryBackend(), flush_interval=0)
+    for key in ("a", "b", "c"):
+        mem.upsert_knowledge(_knowledge(key, "shared", f"shared term {key}"))
+    mem.upsert_knowledge(_knowledge("a", "shared", "shared term a, updated"))     # keeps its place
+    qv = {"shared": 1}
+    assert mem._candidates("knowledge", qv, 1) == list(mem._ns["knowledge"]) == ["a", "b", "c"]
+
+DAY = 86400.0
+
+def test_expire_drops_only_due_items():
+    t0 = time.time()
+    mem = Memory(InMemoryBackend(), flush_interval=0)
+    mem.upsert_knowledge(_knowledge("short", "ttl", "short lived", created_at=t0, ttl=10))
+    mem.upsert_knowledge(_knowledge("long", "ttl", "long lived", created_at=t0, ttl=100))
+    mem.upsert_knowledge(_knowledge("forever", "ttl", "no ttl at all", created_at=t0))
+    assert mem.expire(now=t0 + 5) == 0
+    assert mem.expire(now=t0 + 50) == 1
+    assert set(mem._ns["knowledge"]) == {"long", "forever"}
+    assert "short" not in mem.backend.load().get("knowledge", {})
+    assert mem.expire(now=t0 + 500) == 1
+    assert set(mem._ns["knowledge"]) == {"forever"} and not mem._expiry
+
+def test_stale_expiry_entry_keeps_the_refreshed_item():
+    t0 = time.time()
+    mem = Memory(InMemoryBackend(), flush_interval=0)
+    mem.upsert_knowledge(_knowledge("k", "ttl", "first", created_at=t0, ttl=10))
+    mem.upsert_knowledge(_knowledge("k", "ttl", "second", ttl=1000))     # new TTL, old heap entry stays
+    assert len(mem._expiry) == 2
+    assert mem.expire(now=t0 + 20) == 0                                 # the stale entry surfaces, is skipped
+    assert mem._ns["knowledge"]["k"]["content"] == "second" and len(mem._expiry) == 1
+    assert mem.expire(now=t0 + 2000) == 1 and "k" not in mem._ns["knowledge"]
+
+def test_confidence_decays_lazily_with_age():
+    now = time.time()
+    mem = Memory(InMemoryBackend(), flush_interval=0)
+    mem.upsert_knowledge(_knowledge("new", "decay", "python facts", confidence=0.8, updated_at=now))
+    mem.upsert_knowledge(_knowledge("old", "decay", "python facts", confidence=0.8, updated_at=now - 30 * DAY))
+    old = mem._ns["knowledge"]["old"]
+    assert mem.knowledge_confidence(mem._ns["knowledge"]["new"], now) == 0.8
+    assert abs(mem.knowledge_confidence(old, now) - 0.8 * memory.exp(-memory.KNOWLEDGE_DECAY * 30)) < 1e-12
+    assert old["confidence"] == 0.8                                     # read-time only, never written back
+    assert [k["id"] for k in mem.search_knowledge("python", limit=2)] == ["new", "old"]
+    mem.decay(0.1)
+    assert mem.knowledge_confidence(old, now) < 0.8 * memory.exp(-memory.KNOWLEDGE_DECAY * 30)
+    assert old["confidence"] == 0.8
+
+def test_sweep_expires_evicts_and_flushes():
+    real, clock = memory.time, _Clock(time.time())
+    memory.time = clock
+    try:
+        backend = InMemoryBackend()
+        mem = Memory(backend, flush_interval=3600)                       # only sweep() will flush
+        mem.upsert_knowledge(_knowledge("due", "ttl", "gone soon", created_at=clock.now, ttl=60))
+        mem.add_turn("user", "hello", session_id="idle")
+        assert backend.load() == {}
+        clock.now += memory.SESSION_IDLE_S + 1
+        assert mem.sweep() == 1
+        assert not mem._ns["knowledge"] and "idle" not in mem.sessions() and not mem._pending
+        assert not backend.load().get("knowledge") and not backend.load().get("turns")
+        mem.close()
+    finally:
+        memory.time = real
+
+def test_evict_idle_drops_only_idle_sessions():
+    real, clock = memory.time, _Clock(time.time())
+    memory.time = clock
+    try:
+        backend = InMemoryBackend()
+        mem = Memory(backend, flush_interval=0)
+        for n in range(3):
+            mem.add_turn("user", f"old {n}", session_id="idle")
+        clock.now += 600
+        mem.add_turn("user", "still here", session_id="busy")
+        assert mem.evict_idle(max_idle=900, now=clock.now + 300) == 0
+        clock.now += 301
+        assert mem.evict_idle(max_idle=900) == 1
+        assert mem.turns("idle") == [] and "idle" not in mem.sessions()
+        assert [t["text"] for t in mem.turns("busy")] == ["still here"]
+        stored = backend.load()["turns"]
+        assert not any(key.startswith("idle:") for key in stored) and len(stored) == 1
+        again = Memory(backend, flush_interval=0)                         # nothing comes back on reload
+        assert set(again.sessions()) == {"busy"} and again.turns("idle") == []
+    finally:
+        memory.time = real
+
+def test_app_schedules_the_memory_sweep():
+    import app
+    from core.brain import mem
+    job = app.sched.get_job("ominex_memory_sweep")
+    assert job is not None and job.func == mem.sweep
+
+if __name__ == "__main__":
+    test_memory_concurrent_turns()
+    test_todo_concurrent_adds()
+    test_knowledge_search_ignores_punctuation()
+    test_knowledge_search_matches_substrings()
+    test_knowledge_candidates_keep_insertion_order()
+    test_expire_drops_only_due_items()
+    test_stale_expiry_entry_keeps_the_refreshed_item()
+    test_confidence_decays_lazily_with_age()
+    test_sweep_expires_evicts_and_flushes()
+    test_evict_idle_drops_only_idle_sessions()
+    test_app_schedules_the_memory_sweep()
+    print("ok")
@@ -0,0 +1,63 @@
+import os, tempfile, time
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+
+from core.response_cache import ResponseCache
+
+DRUGS = "Is it safe to take ibuprofen with {} for a headache after dinner at home in the evening?"
+
+def test_exact_hits_ignore_case_and_spacing_only():
+    rc = ResponseCache()
+    rc.put("what is 2+2", "four")
+    assert rc.get("what is 2+2") == "four" and rc.get("  What IS 2+2 ") == "four"
+    assert rc.stats()["exact_hits"] == 2
+    for other in ("what is 2-2", "What is 2*2?", "what is 2/2"):
+        assert rc.get(other) is None, other
+    rc.put("what is c#", "a language")
+    assert rc.get("what is c") is None and rc.get("what is c++") is None
+
+def test_one_swapped_word_is_never_a_semantic_hit():
+    rc = ResponseCache()
+    rc.put("What is the capital of France and what is it famous for in Europe?", "Paris ...")
+    rc.put(DRUGS.format("paracetamol"), "Yes generally.")
+    assert rc.get("What is the capital of Spain and what is it famous for in Europe?") is None
+    assert rc.get(DRUGS.format("warfarin")) is None
+    assert rc.get(DRUGS.format("paracetamol and aspirin")) is None     # a superset is another question too
+    # the same words re-cased, re-punctuated or reordered still hit
+    assert rc.get(DRUGS.format("paracetamol").upper().rstrip("?")) == "Yes generally."
+    assert rc.get("what is the capital of france, and what is it famous for in europe") == "Paris ..."
+    assert rc.stats()["semantic_hits"] == 2
+
+def test_entries_expire_after_the_ttl():
+    rc = ResponseCache(ttl=0.05)
+    rc.put("who wrote dune", "Frank Herbert")
+    assert rc.get("who wrote dune") == "Frank Herbert"
+    time.sleep(0.1)
+    assert rc.get("who wrote dune") is None and rc.get("Who wrote Dune?") is None
+
+def test_off_intents_and_volatile_wording_are_never_cached():
+    rc = ResponseCache(off={"news", "time"})
+    rc.put("headlines about mars", "...", intent="news")
+    assert rc.get("headlines about mars", intent="news") is None
+    rc.put("what's the weather like", "sunny")
+    rc.put("who won the match today", "...")
+    assert rc.get("what's the weather like") is None and rc.get("who won the match today") is None
+    assert rc.stats()["size"] == 0 and rc.stats()["skipped"] == 3
+    rc.put("explain mars", "a planet", intent="chat")
+    assert rc.get("explain mars", intent="help") is None                 # intents don't share answers
+
+def test_exact_only_without_an_embedder():
+    rc = ResponseCache(vectorize=None)
+    rc.put("who wrote dune", "Frank Herbert")
+    assert rc.get("WHO wrote dune") == "Frank Herbert" and rc.get("who wrote dune?") is None
+    assert not rc.stats()["semantic"]
+
+if __name__ == "__main__":
+    test_exact_hits_ignore_case_and_spacing_only()
+    test_one_swapped_word_is_never_a_semantic_hit()
+    test_entries_expire_after_the_ttl()
+    test_off_intents_and_volatile_wording_are_never_cached()
+    test_exact_only_without_an_embedder()
+    print("ok")
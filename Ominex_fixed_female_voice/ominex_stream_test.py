@@ -0,0 +1,64 @@
+import json, os, tempfile, time
+
+os.environ.setdefault("OMINEX_MEMORY_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("OMINEX_LEARN_DIR", tempfile.mkdtemp(prefix="ominex-test-"))   # learn.db + vectors
+
+import services.llm as llm
+from services.llm_gateway import LLMGateway
+from services.llm import sentence_chunks, stream_ominex
+from services.stub_llm import serve
+
+def _with_stub(fn, **kwargs):
+    srv, _ = serve(**kwargs)
+    saved = llm.gateway
+    llm.gateway = LLMGateway(base_url=srv.base_url, api_key="stub")
+    try:
+        fn(srv)
+    finally:
+        llm.gateway = saved
+        srv.shutdown()
+
+def test_sentence_chunks():
+    toks = ["Hel", "lo there. ", "How are", " you?", " Fine!\n", "Bye"]
+    assert list(sentence_chunks(toks)) == ["Hello there. ", "How are you? ", "Fine!\n", "Bye"]
+    long = ["word "] * 100
+    assert all(len(c) <= 60 for c in sentence_chunks(long, max_chars=60))
+    assert "".join(sentence_chunks(long, max_chars=60)) == "".join(long)
+
+def test_stream_first_sentence_early():
+    def run(srv):
+        t0 = time.monotonic()
+        chunks = sentence_chunks(stream_ominex("ping"))
+        first = next(chunks)
+        first_at = time.monotonic() - t0
+        rest = list(chunks)
+        total = time.monotonic() - t0
+        assert first == "Stub reply to: ping. "
+        assert len(rest) == 2
+        assert first_at < total / 2, (first_at, total)
+    _with_stub(run, delay=0.05)
+
+def test_chat_stream_endpoint():
+    from app import app
+
+    def run(srv):
+        r = app.test_client().post("/api/chat/stream", json={"message": "tell me about streams",
+                                                             "session_id": "streamtest"})
+        assert r.mimetype == "text/event-stream"
+        events = []
+        for block in r.get_data(as_text=True).strip().split("\n\n"):
+            name, data = block.split("\n", 1)
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+        assert events[0][0] == "meta" and events[0][1]["session_id"] == "streamtest"
+        chunks = [d["text"] for n, d in events if n == "chunk"]
+        assert chunks[0] == "Stub reply to: tell me about streams. " and len(chunks) == 3
+        assert events[-1] == ("done", {"reply": "".join(chunks).strip()})
+    _with_stub(run, delay=0.0)
+
+
+if __name__ == "__main__":
+    test_sentence_chunks()
+    test_stream_first_sentence_early()
+    test_chat_stream_endpoint()
+    print("ok")
@@ -1,8 +1,12 @@
 # services/llm.py
-import os
-from openai import OpenAI
+import re
+from typing import Iterable, Iterator
 
-_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from .llm_gateway import LLMGateway, LLMUnavailable
+
+# pooled client + deadline/retry/concurrency/breaker policy; OPENAI_BASE_URL points it at
+# services/stub_llm.py for local testing
+gateway = LLMGateway()
 
 SYSTEM_PROMPT = (
     "You are OMINEX. "
@@ -12,13 +16,48 @@ SYSTEM_PROMPT = (
 )
 
 
-def ask_ominex(user_text: str, max_tokens: int = 120) -> str:
-    resp = _client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_text},
-        ],
-        max_tokens=max_tokens,
-    )
-    return resp.choices[0].message.content.strip()
+def _messages(user_text: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_text},
+    ]
+
+
+def ask_ominex(user_text: str, max_tokens: int = 120, timeout: float | None = None) -> str:
+    # timeout: deadline in seconds for the whole call, retries included (None = gateway default).
+    # Raises LLMUnavailable when the gateway refuses or gives up.
+    return gateway.complete(_messages(user_text), deadline=timeout, max_tokens=max_tokens)
+
+
+def llm_available() -> bool:
+    """False while the gateway's circuit breaker is open (callers should answer locally)."""
+    return gateway.available()
+
+
+def stream_ominex(user_text: str, max_tokens: int = 120, timeout: float | None = None) -> Iterator[str]:
+    """Same request as ask_ominex with stream=True; yields content deltas as they arrive."""
+    return gateway.stream(_messages(user_text), deadline=timeout, max_tokens=max_tokens)
+
+
+# ---------- sentence chunking ----------
+_SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+
+def sentence_chunks(tokens: Iterable[str], max_chars: int = 240) -> Iterator[str]:
+    """Regroup streamed tokens into sentences (trailing whitespace kept, so chunks concatenate
+    back to the reply); a run-on longer than `max_chars` is cut at its last space."""
+    buf = ""
+    for tok in tokens:
+        buf += tok
+        while True:
+            m = _SENTENCE_END.search(buf)
+            if m:
+                cut = m.end()
+            elif len(buf) > max_chars:
+                cut = buf.rfind(" ", 0, max_chars) + 1 or max_chars
+            else:
+                break
+            chunk, buf = buf[:cut], buf[cut:]
+            if chunk.strip():
+                yield chunk
+    if buf.strip():
+        yield buf
@@ -0,0 +1,193 @@
+# services/llm_gateway.py — the one path to the upstream LLM
+# A pooled OpenAI client plus the policies around each call: a per-call deadline (covering queueing,
+# every attempt and the backoff between them), jittered exponential retries on transient errors,
+# a semaphore capping concurrent upstream calls, and a circuit breaker that fails fast while the
+# upstream is unhealthy.
+import os, json, random, threading, time
+from typing import Any, Dict, Iterator, List, Optional
+
+from openai import (OpenAI, DefaultHttpxClient, APIConnectionError, APITimeoutError,
+                    InternalServerError, RateLimitError)
+
+try:
+    import httpx
+except ImportError:     # newer openai releases ship httpx2
+    import httpx2 as httpx
+
+from core.singleflight import SingleFlight, squash
+
+MODEL = "gpt-4o-mini"
+MAX_CONNECTIONS = int(os.getenv("OMINEX_LLM_MAX_CONNECTIONS", "20"))
+MAX_CONCURRENCY = int(os.getenv("OMINEX_LLM_CONCURRENCY", "8"))        # in-flight upstream calls
+QUEUE_WAIT = float(os.getenv("OMINEX_LLM_QUEUE_WAIT_S", "2.0"))        # max wait for a free slot
+DEADLINE = float(os.getenv("OMINEX_LLM_DEADLINE_S", "20.0"))           # default per-call budget
+CONNECT_TIMEOUT = float(os.getenv("OMINEX_LLM_CONNECT_TIMEOUT_S", "3.0"))
+RETRIES = int(os.getenv("OMINEX_LLM_RETRIES", "2"))                    # extra attempts after the first
+BACKOFF_BASE, BACKOFF_MAX = 0.25, 4.0                                  # s; full jitter
+BREAKER_FAILURES = int(os.getenv("OMINEX_LLM_BREAKER_FAILURES", "5"))  # consecutive failed calls → open
+BREAKER_RESET = float(os.getenv("OMINEX_LLM_BREAKER_RESET_S", "30"))   # open → one probe call
+
+RETRYABLE = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+
+class LLMUnavailable(RuntimeError):
+    """The gateway refused or gave up on a call (breaker open, no free slot, deadline spent)."""
+
+
+class CircuitBreaker:
+    """closed → (`failures` consecutive failures) → open → (`reset_after` s) → half-open: one probe
+    call goes through; its success closes the breaker, its failure re-opens it."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET) -> None:
+        self.failures, self.reset_after = failures, reset_after
+        self.state, self._count, self._opened_at, self._probing = "closed", 0, 0.0, False
+        self.opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_after:
+                self.state, self._probing = "half_open", False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return self.state == "closed"
+
+    def available(self) -> bool:
+        """Would a call be let through right now (without claiming the half-open probe)."""
+        with self._lock:
+            return self.state == "closed" or time.monotonic() - self._opened_at >= self.reset_after
+
+    def success(self) -> None:
+        with self._lock:
+            self.state, self._count, self._probing = "closed", 0, False
+
+    def failure(self) -> None:
+        with self._lock:
+            self._count += 1
+            if self.state == "half_open" or self._count >= self.failures:
+                if self.state != "open":
+                    self.opened += 1
+                self.state, self._opened_at, self._probing = "open", time.monotonic(), False
+
+
+class LLMGateway:
+    """Chat completions through one pooled client; `complete()` and `stream()` take a `deadline`
+    (s) for the whole call. The client's own retries are off — retrying happens here, inside
+    the deadline and the concurrency slot."""
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 client: Optional[OpenAI] = None, max_concurrency: int = MAX_CONCURRENCY,
+                 deadline: float = DEADLINE, retries: int = RETRIES, queue_wait: float = QUEUE_WAIT,
+                 breaker: Optional[CircuitBreaker] = None) -> None:
+        self.client = client or OpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+            max_retries=0,
+            http_client=DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                    max_keepalive_connections=MAX_CONNECTIONS, keepalive_expiry=60),
+                timeout=httpx.Timeout(deadline, connect=CONNECT_TIMEOUT)),
+        )
+        self.deadline, self.retries, self.queue_wait = deadline, retries, queue_wait
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.calls = self.attempts = self.failures = self.rejected = 0
+        self._flight = SingleFlight("llm")
+
+    def available(self) -> bool:
+        return self.breaker.available()
+
+    # ---------- calls ----------
+    def complete(self, messages: List[Dict[str, str]], deadline: Optional[float] = None, **params: Any) -> str:
+        """Identical concurrent requests (same messages up to case and spacing, same params) share
+        one upstream call; followers wait on the leader's deadline rather than their own.
+        Punctuation is part of the key: "what is 2+2" and "what is 2-2" are different calls."""
+        key = json.dumps([[m.get("role"), squash(m.get("content", ""))] for m in messages]
+                         + [sorted(params.items())], default=str)
+        return self._flight.do(key, self._complete, messages, deadline, params)
+
+    def _complete(self, messages, deadline, params) -> str:
+        end = self._enter(deadline)
+        try:
+            resp = self._attempts(messages, end, params)
+        except BaseException as e:
+            self._settle(e)
+            raise
+        finally:
+            self._slots.release()
+        self._settle(None)
+        return (resp.choices[0].message.content or "").strip()
+
+    def stream(self, messages: List[Dict[str, str]], deadline: Optional[float] = None,
+               **params: Any) -> Iterator[str]:
+        """Content deltas. Retries cover opening the stream only; the slot is held until it ends."""
+        end = self._enter(deadline)
+        try:
+            stream = self._attempts(messages, end, {**params, "stream": True})
+            try:
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        yield delta
+            finally:
+                stream.close()      # client went away → stop paying for tokens
+        except BaseException as e:
+            self._settle(e)
+            raise
+        finally:
+            self._slots.release()
+        self._settle(None)
+
+    # ---------- policy ----------
+    def _enter(self, deadline: Optional[float]) -> float:
+        """Claim a concurrency slot and the breaker's permission; returns the absolute deadline."""
+        end = time.monotonic() + (deadline or self.deadline)
+        self.calls += 1
+        if not self.breaker.available():
+            self.rejected += 1
+            raise LLMUnavailable("upstream circuit open")
+        if not self._slots.acquire(timeout=max(0.0, min(self.queue_wait, end - time.monotonic()))):
+            self.rejected += 1
+            raise LLMUnavailable("too many concurrent LLM calls")
+        if not self.breaker.allow():        # lost the half-open probe to another thread
+            self._slots.release()
+            self.rejected += 1
+            raise LLMUnavailable("upstream circuit open")
+        return end
+
+    def _attempts(self, messages, end: float, params):
+        for attempt in range(self.retries + 1):
+            left = end - time.monotonic()
+            if left <= 0:
+                break
+            self.attempts += 1
+            try:
+                return self.client.with_options(timeout=left).chat.completions.create(
+                    **{"model": MODEL, **params}, messages=messages)
+            except RETRYABLE as e:
+                pause = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                if attempt == self.retries or time.monotonic() + pause >= end:
+                    raise LLMUnavailable(f"LLM upstream failed: {e.__class__.__name__}") from e
+                time.sleep(pause)
+        raise LLMUnavailable("LLM deadline exceeded")
+
+    def _settle(self, error: Optional[BaseException]) -> None:
+        """Only upstream faults count against the breaker; a 4xx means the upstream is alive,
+        and a caller abandoning a stream (GeneratorExit) says nothing about it."""
+        if isinstance(error, GeneratorExit):
+            if self.breaker.state == "half_open":
+                self.breaker.success()      # the probe got a stream going
+        elif isinstance(error, (LLMUnavailable,) + RETRYABLE):
+            self.failures += 1
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "attempts": self.attempts, "failures": self.failures,
+                "rejected": self.rejected, "breaker": self.breaker.state,
+                "breaker_opened": self.breaker.opened, "max_concurrency": self.max_concurrency,
+                "coalesced": self._flight.shared}
+
@@ -0,0 +1,120 @@
+# services/stub_llm.py — local OpenAI-compatible chat server for tests and offline dev
+# Serves POST /v1/chat/completions, plain or stream=True (SSE), with a canned multi-sentence
+# reply dripped out word by word.  Run:
+#   python -m services.stub_llm --port 8089
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub python app.py
+import argparse, json, re, threading, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+DEFAULT_REPLY = "Stub reply to: {prompt}. Streaming keeps the first sentence fast. The rest follows as it is generated."
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubLLM"
+
+    def log_message(self, *args) -> None:     # quiet
+        pass
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        prompt = next((m.get("content", "") for m in reversed(body.get("messages") or [])
+                       if m.get("role") == "user"), "")
+        text = self.server.reply.format(prompt=prompt.strip().rstrip(".!?"))
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.inflight += 1
+            self.server.peak = max(self.server.peak, self.server.inflight)
+            failing = self.server.fail > 0
+            self.server.fail -= failing
+        try:
+            time.sleep(self.server.first_token_delay)
+            if failing:
+                self._json(self.server.fail_status, {"error": {"message": "stub failure", "type": "server_error"}})
+            else:
+                self._answer(body, text)
+        finally:
+            with self.server.lock:
+                self.server.inflight -= 1
+
+    def _answer(self, body: dict, text: str) -> None:
+        if body.get("stream"):
+            self._stream(text, body.get("model", "stub"))
+        else:
+            self._json(200, {"id": "chatcmpl-" + uuid.uuid4().hex, "object": "chat.completion",
+                             "created": int(time.time()), "model": body.get("model", "stub"),
+                             "choices": [{"index": 0, "finish_reason": "stop",
+                                          "message": {"role": "assistant", "content": text}}],
+                             "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}})
+
+    def _json(self, status: int, obj: dict) -> None:
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, text: str, model: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()      # HTTP/1.0: the body ends when the connection closes
+        cid, created = "chatcmpl-" + uuid.uuid4().hex, int(time.time())
+
+        def event(delta: dict, finish: Optional[str] = None) -> None:
+            chunk = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+            self.wfile.flush()
+
+        try:
+            event({"role": "assistant", "content": ""})
+            for tok in re.findall(r"\S+\s*", text):
+                time.sleep(self.server.delay)
+                event({"content": tok})
+            event({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass                # client hung up mid-stream
+
+
+class StubLLM(ThreadingHTTPServer):
+    """`reply` may use {prompt}; `delay` is the pause before each streamed word and
+    `first_token_delay` the latency before any response. The next `fail` requests get
+    `fail_status` instead; `peak` is the most requests seen in flight at once."""
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, reply: str = DEFAULT_REPLY, delay: float = 0.02,
+                 first_token_delay: float = 0.0, fail: int = 0, fail_status: int = 500) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.reply, self.delay, self.first_token_delay = reply, delay, first_token_delay
+        self.fail, self.fail_status = fail, fail_status
+        self.lock = threading.Lock()
+        self.requests = self.inflight = self.peak = 0
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+def serve(port: int = 0, **kwargs) -> Tuple[StubLLM, threading.Thread]:
+    """Start a stub in a background thread (port 0 = any free port); stop it with .shutdown()."""
+    srv = StubLLM(port, **kwargs)
+    t = threading.Thread(target=srv.serve_forever, daemon=True, name="stub-llm")
+    t.start()
+    return srv, t
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="OpenAI-compatible stub chat server")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--delay", type=float, default=0.05, help="seconds between streamed words")
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds before each response starts")
+    args = ap.parse_args()
+    srv = StubLLM(args.port, delay=args.delay, first_token_delay=args.latency)
+    print(f"stub LLM on {srv.base_url}")
+    srv.serve_forever()
@@ -202,6 +202,16 @@ if (voiceToggleEl){
 if (testVoiceEl){ testVoiceEl.addEventListener('click', () => speak("Hello, I'm OMINEX. Voice is ready.")); }
 
 /* -------------------------- Send flow -------------------------- */
+// one short-term memory per browser tab: the server keys chat history on this id
+function sessionId(){
+  let sid = sessionStorage.getItem('ominexSession');
+  if (!sid){
+    sid = (crypto.randomUUID ? crypto.randomUUID() : Math.random().toString(36).slice(2) + Date.now().toString(36)).replace(/[^A-Za-z0-9_-]/g, '');
+    sessionStorage.setItem('ominexSession', sid);
+  }
+  return sid;
+}
+
 async function postChat(payload){
   const r = await fetch(
     "https://ominex-backend-sxeg.onrender.com/api/demo",
@@ -215,6 +225,43 @@ async function postChat(payload){
   return await r.json();
 }
 
+// SSE over fetch (EventSource can't POST): onEvent(name, data) for meta / chunk / done
+async function postChatStream(payload, onEvent){
+  const r = await fetch(
+    "https://ominex-backend-sxeg.onrender.com/api/demo/stream",
+    {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
+      body: JSON.stringify(payload)
+    }
+  );
+  if (!r.ok || !r.body) throw new Error("Stream API unreachable");
+  const reader = r.body.getReader();
+  const dec = new TextDecoder();
+  let buf = '';
+  for (;;){
+    const { value, done } = await reader.read();
+    if (done) break;
+    buf += dec.decode(value, { stream: true });
+    let i;
+    while ((i = buf.indexOf('\n\n')) >= 0){
+      const block = buf.slice(0, i); buf = buf.slice(i + 2);
+      let name = 'message', data = '';
+      for (const line of block.split('\n')){
+        if (line.startsWith('event:')) name = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      if (data) onEvent(name, JSON.parse(data));
+    }
+  }
+}
+
+function setBubble(row, text){
+  const bubble = row?.querySelector('.bubble');
+  if (bubble) bubble.innerHTML = linkify(decodeHTML(sanitize(text || ''))).replace(/\n/g,'<br>');
+  chat.scrollTop = chat.scrollHeight;
+}
+
 async function sendMessage(text){
   if (!text) return;
   if (/^wiki\s+/i.test(text)) text = text.replace(/^wiki\s+/i, 'search ');
@@ -222,11 +269,35 @@ async function sendMessage(text){
   if (input) input.value = '';
   showTyping();
 
+  const payload = { text, message: text, mood: getCurrentMood(), session_id: sessionId() };
+
+  // streamed: the bubble grows sentence by sentence and each sentence is spoken as it lands
+  let row = null, reply = '';
+  try {
+    await postChatStream(payload, (name, data) => {
+      if (name === 'meta'){
+        if (data.session_id) sessionStorage.setItem('ominexSession', data.session_id);
+        setMood(data.mood || 'Neutral');
+      } else if (name === 'chunk'){
+        if (!row){ hideTyping(); row = add('bot', ''); }
+        reply += data.text;
+        setBubble(row, reply);
+        if (TTS.enabled && !/You can say things like/i.test(reply)) speak(data.text);
+      } else if (name === 'done' && !row){
+        hideTyping(); row = add('bot', data.reply || '');
+      }
+    });
+    if (row) return;
+  } catch (e) {
+    if (row) return;        // partial reply already shown
+    console.warn('[OMINEX] stream unavailable, falling back', e);
+  }
+
   const t0 = performance.now();
   let data;
   try {
-    const payload = { text, message: text, mood: getCurrentMood() };
     data = await postChat(payload);
+    if (data?.session_id) sessionStorage.setItem('ominexSession', data.session_id);
   } catch (e) {
     console.error('[OMINEX] chat error', e);
     hideTyping(); add('bot', 'I could not reach the server.'); setStatus('Backend: error');
@@ -239,7 +310,7 @@ async function sendMessage(text){
 
   hideTyping();
 
-  const reply = data?.reply || '';
+  reply = data?.reply || '';
   const mood  = data?.mood  || 'Neutral';
   setMood(mood);
   add('bot', reply);
@@ -570,25 +641,51 @@ speakIntroOnce(introText);
 
     const render = async ()=>{
       const js = await fetch('/api/learn/topics').then(r=>r.json());
+      const per = js.stats.per_topic || {};
       body.querySelector('#topicList').innerHTML =
-        `<strong>Topics:</strong> ${(js.topics||[]).map(t=>`<span class="badge badge-neutral" style="margin-right:6px">${t}</span>`).join('') || '—'}
+        `<strong>Topics:</strong> ${(js.topics||[]).map(t=>`<span class="badge badge-neutral" style="margin-right:6px">${t}${per[t] ? ` · ${per[t].sources}/${per[t].chunks}` : ''}</span>`).join('') || '—'}
          `;
+      const last = js.stats.last_crawl ? new Date(js.stats.last_crawl*1000).toLocaleString() : 'never';
       body.querySelector('#stats').textContent =
-        `Sources: ${js.stats.sources} | Chunks: ${js.stats.chunks}`;
+        `Sources: ${js.stats.sources} | Chunks: ${js.stats.chunks} | ${(js.stats.bytes/1024).toFixed(0)} KB | Last crawl: ${last}`;
     };
     render();
 
+    // topic / crawl changes need the server's OMINEX_LEARN_TOKEN (asked once, kept in localStorage);
+    // a 403 means the server has none set and shows that in its error message
+    const learnPost = async (path, payload)=>{
+      const send = ()=> fetch(path,{method:'POST',headers:{'Content-Type':'application/json',
+        'X-Learn-Token': localStorage.getItem('ominexLearnToken') || ''}, body: JSON.stringify(payload)});
+      let r = await send();
+      if(r.status === 401){
+        const tok = prompt('Learner token (OMINEX_LEARN_TOKEN on the server):');
+        if(!tok) return r;
+        localStorage.setItem('ominexLearnToken', tok);
+        r = await send();
+      }
+      return r;
+    };
+    const say = (t)=>{ body.querySelector('#ans').textContent = t; };
+
     body.querySelector('#addTopic').onclick = async ()=>{
       const t = body.querySelector('#topicIn').value.trim();
       if(!t) return;
-      await fetch('/api/learn/topics',{method:'POST',headers:{'Content-Type':'application/json'}, body: JSON.stringify({topic:t})});
+      const r = await learnPost('/api/learn/topics', {topic:t});
+      if(!r.ok){ say((await r.json()).error || 'Could not add topic.'); return; }
       body.querySelector('#topicIn').value = ''; render();
     };
     body.querySelector('#tickNow').onclick = async ()=>{
-      const r = await fetch('/api/learn/tick',{method:'POST',headers:{'Content-Type':'application/json'}, body: JSON.stringify({max_per_topic:2})}).then(r=>r.json());
-      const msg = 'Learned: ' + Object.entries(r.summary||{}).map(([k,v])=>`${k} (+${v.length})`).join(', ');
-      body.querySelector('#ans').textContent = msg;
-      render();
+      const r = await learnPost('/api/learn/tick', {max_per_topic:2});
+      const js = await r.json();
+      if(r.status !== 202){ say(js.error || 'Could not start learning.'); return; }
+      say('Learning…');
+      const poll = setInterval(async ()=>{
+        const t = (await fetch('/api/learn/topics').then(r=>r.json())).tick || {};
+        if(t.running) return;
+        clearInterval(poll);
+        say('Learned: ' + Object.entries(t.summary||{}).map(([k,n])=>`${k} (+${n})`).join(', '));
+        render();
+      }, 3000);
     };
     body.querySelector('#askQ').onclick = async ()=>{
       const q = body.querySelector('#qIn').value.trim(); if(!q) return;